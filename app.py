@@ -6,15 +6,15 @@ import gradio as gr
 import asyncio
 
 from langchain_core.messages import HumanMessage, AIMessage
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
 
+from database.engine import create_engine, create_session_factory
 from database.models import Base
 from graph.workflow import process_message
+from gradio_ui.chat_component_v2 import MAX_HISTORY_TURNS
 from services.llm_service import LLMService
 from services.tts_service import TTSService
 from services.rag_service import RAGService
-from services.config_manager import ConfigManager
+from services.config_manager import get_config_manager
 from utils.logging_config import setup_logging, get_logger
 
 # Load environment
@@ -26,8 +26,8 @@ logger = get_logger(__name__)
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./sales_bot.db")
-engine = create_async_engine(DATABASE_URL, echo=False)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+engine = create_engine(DATABASE_URL)
+AsyncSessionLocal = create_session_factory(engine)
 
 # Initialize services
 logger.info("Initializing services...")
@@ -44,20 +44,37 @@ async def init_services():
     llm_service = LLMService()
     tts_service = TTSService()
     rag_service = RAGService()
-    config_manager = ConfigManager()
+    config_manager = get_config_manager()  # Shared with the panels so saves invalidate its cache
 
     # Load default config
     async with AsyncSessionLocal() as db:
         await config_manager.initialize_defaults(db)
 
+    # Pooled connections belong to this one-off event loop; drop them so the
+    # server's loop opens its own instead of reusing them
+    await engine.dispose()
+
     logger.info("All services initialized")
 
-# Run initialization
+# Run initialization (once, at import; UI callbacks are awaited by Gradio directly)
 asyncio.run(init_services())
 
 
-async def process_chat(message: str, history: list, user_phone: str = "+1234567890") -> tuple:
-    """Process chat message with database persistence (async version)."""
+async def process_chat(message: str, history: list, user_phone: str = "+1234567890", messages: list = None) -> tuple:
+    """Process chat message with database persistence (async version).
+
+    Args:
+        message: User message text
+        history: Chatbot history (list of role/content dicts)
+        user_phone: Phone number of the simulated user
+        messages: Session list of LangChain messages. When provided it is
+            loaded from the database only once and then extended in place
+            with the new turn, instead of being rebuilt on every message.
+            Only the last MAX_HISTORY_TURNS turns are kept.
+
+    Returns:
+        Tuple of (new_history, "")
+    """
     from database import crud
 
     print(f"\n{'='*60}")
@@ -81,16 +98,18 @@ async def process_chat(message: str, history: list, user_phone: str = "+12345678
             else:
                 print(f"✅ Found existing user: {user.id} - {user.phone}")
 
-            # Load conversation history from database
-            db_messages = await crud.get_user_messages(db, user.id, limit=50)
-            messages = []
-            for db_msg in db_messages:
-                if db_msg.sender == "user":
-                    messages.append(HumanMessage(content=db_msg.message_text))
-                elif db_msg.sender == "bot":
-                    messages.append(AIMessage(content=db_msg.message_text))
-
-            print(f"Loaded {len(messages)} messages from database")
+            # Load conversation history from database (only when the session has none yet)
+            if messages is None:
+                messages = []
+            if not messages:
+                db_messages = await crud.get_user_messages(db, user.id, limit=50)
+                for db_msg in db_messages:
+                    if db_msg.sender == "user":
+                        messages.append(HumanMessage(content=db_msg.message_text))
+                    elif db_msg.sender == "bot":
+                        messages.append(AIMessage(content=db_msg.message_text))
+                del messages[:-2 * MAX_HISTORY_TURNS]
+                print(f"Loaded {len(messages)} messages from database")
             print(f"Config keys: {list(config.keys())}")
 
             # Process through graph
@@ -106,6 +125,11 @@ async def process_chat(message: str, history: list, user_phone: str = "+12345678
             bot_response = result.get("current_response", "No response generated")
             print(f"BOT: {bot_response[:100]}...")
 
+            # Extend the session messages with this turn (O(1) per turn)
+            messages.append(HumanMessage(content=message))
+            messages.append(AIMessage(content=bot_response))
+            del messages[:-2 * MAX_HISTORY_TURNS]
+
             # Save messages to database
             await crud.create_message(
                 db=db,
@@ -277,6 +301,9 @@ with gr.Blocks(title="WhatsApp Sales Bot", theme=gr.themes.Soft()) as demo:
                         height=500,
                         type="messages",
                     )
+                    # LangChain messages for this session, extended turn by turn
+                    # (capped at MAX_HISTORY_TURNS in process_chat)
+                    lc_messages_state = gr.State([])
 
                     with gr.Row():
                         msg = gr.Textbox(
@@ -345,7 +372,7 @@ with gr.Blocks(title="WhatsApp Sales Bot", theme=gr.themes.Soft()) as demo:
                     return [], "🆔 ID: ERROR", f"📝 Nombre: Error: {str(e)}", "📧 Email: -", phone_display, "🕐 Último contacto: -", "🎯 Intención: -", "😊 Sentimiento: -", "📊 Etapa: -", "💡 Necesidades: -", "👨‍💼 Solicita Humano: No", "📋 Notas: -"
 
             # Función para actualizar datos del usuario
-            async def process_chat_with_data(message: str, history: list, current_user_id, current_name, current_email, current_phone, current_last_contact, current_intent, current_sentiment, current_stage, current_needs, current_requests_human, current_notes) -> tuple:
+            async def process_chat_with_data(message: str, history: list, lc_messages: list, current_user_id, current_name, current_email, current_phone, current_last_contact, current_intent, current_sentiment, current_stage, current_needs, current_requests_human, current_notes) -> tuple:
                 """Procesar chat y actualizar datos del usuario."""
                 from datetime import datetime
                 import uuid
@@ -354,7 +381,7 @@ with gr.Blocks(title="WhatsApp Sales Bot", theme=gr.themes.Soft()) as demo:
                 phone = current_phone.split(": ", 1)[1] if ": " in current_phone else "+1234567890"
 
                 # Procesar mensaje normalmente con persistencia
-                new_history, empty_str = await process_chat(message, history, user_phone=phone)
+                new_history, empty_str = await process_chat(message, history, user_phone=phone, messages=lc_messages)
 
                 # Manejar mensajes multiparte con [PAUSA]
                 if new_history and len(new_history) > 0:
@@ -513,29 +540,8 @@ with gr.Blocks(title="WhatsApp Sales Bot", theme=gr.themes.Soft()) as demo:
                             "requests_human": requests_human == "Sí"
                         }
 
-                        # Fix 2: Manejo de errores mejorado en conversión de historial
-                        from langchain_core.messages import HumanMessage, AIMessage
-                        conversation_history = []
-                        try:
-                            for msg in history:
-                                # Validar que msg es dict y tiene las keys necesarias
-                                if not isinstance(msg, dict):
-                                    print(f"⚠️ Mensaje no es dict, saltando: {type(msg)}")
-                                    continue
-
-                                role = msg.get("role")
-                                content = msg.get("content", "")
-
-                                if role == "user" and content:
-                                    conversation_history.append(HumanMessage(content=content))
-                                elif role == "assistant" and content:
-                                    conversation_history.append(AIMessage(content=content))
-                        except Exception as conv_error:
-                            print(f"⚠️ Error convirtiendo historial para notas: {conv_error}")
-                            # Continuar con el historial parcial que se haya construido
-
                         # Generar notas con LLM
-                        notes = await llm_service.generate_conversation_notes(user_data, conversation_history)
+                        notes = await llm_service.generate_conversation_notes(user_data, lc_messages)
 
                         # Fix 3: Logging mejorado
                         print(f"📝 Notas generadas con LLM para User ID: {user_id} (Trigger: etapa={stage}, solicita_humano={requests_human}, msgs={len(new_history)})")
@@ -630,18 +636,18 @@ with gr.Blocks(title="WhatsApp Sales Bot", theme=gr.themes.Soft()) as demo:
                 requests_human_display = f"👨‍💼 Solicita Humano: {requests_human}"
                 notes_display = f"📋 Notas: {notes if notes else '-'}"
 
-                return new_history, "", user_id_display, name_display, email_display, phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display
+                return new_history, "", lc_messages, user_id_display, name_display, email_display, phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display
 
             # Connect events
             msg.submit(
                 process_chat_with_data,
-                [msg, chatbot, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display],
-                [chatbot, msg, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display]
+                [msg, chatbot, lc_messages_state, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display],
+                [chatbot, msg, lc_messages_state, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display]
             )
             send.click(
                 process_chat_with_data,
-                [msg, chatbot, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display],
-                [chatbot, msg, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display]
+                [msg, chatbot, lc_messages_state, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display],
+                [chatbot, msg, lc_messages_state, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display]
             )
 
             # Load history when phone changes
@@ -650,11 +656,14 @@ with gr.Blocks(title="WhatsApp Sales Bot", theme=gr.themes.Soft()) as demo:
                 [user_phone_display],
                 [chatbot, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display]
             )
+            # Reset session messages so the next turn reloads them for the new
+            # phone (.input: only user edits, not the phone shown after each turn)
+            user_phone_display.input(lambda: [], None, lc_messages_state)
 
             clear.click(
-                lambda: ([], "🆔 ID: USRPRUEBAS_00", "📝 Nombre: Aún no mencionó su nombre", "📧 Email: No proporcionado", "📱 Teléfono: +1234567890", "🕐 Último contacto: -", "🎯 Intención: -", "😊 Sentimiento: -", "📊 Etapa: -", "💡 Necesidades: -", "👨‍💼 Solicita Humano: No", "📋 Notas: -"),
+                lambda: ([], [], "🆔 ID: USRPRUEBAS_00", "📝 Nombre: Aún no mencionó su nombre", "📧 Email: No proporcionado", "📱 Teléfono: +1234567890", "🕐 Último contacto: -", "🎯 Intención: -", "😊 Sentimiento: -", "📊 Etapa: -", "💡 Necesidades: -", "👨‍💼 Solicita Humano: No", "📋 Notas: -"),
                 None,
-                [chatbot, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display]
+                [chatbot, lc_messages_state, user_id_display, user_name_display, user_email_display, user_phone_display, last_contact_display, intent_display, sentiment_display, stage_display, needs_display, requests_human_display, notes_display]
             )
 
     gr.Markdown("""
@@ -0,0 +1,64 @@
+"""In-process change notifications for data shown in the UI panels."""
+
+import asyncio
+from typing import Dict, List, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ChangeBus:
+    """Per-topic change counter with optional queue subscribers."""
+
+    def __init__(self):
+        """Initialize the bus."""
+        self._versions: Dict[str, int] = {}
+        self._subs: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+
+    def version(self, topic: str) -> int:
+        """
+        Get the number of changes notified for a topic.
+
+        Args:
+            topic: Topic name (e.g. "users")
+
+        Returns:
+            Monotonically increasing change counter
+        """
+        return self._versions.get(topic, 0)
+
+    def notify(self, topic: str) -> None:
+        """
+        Record a change and wake up subscribers.
+
+        Args:
+            topic: Topic name (e.g. "users")
+        """
+        self._versions[topic] = self._versions.get(topic, 0) + 1
+        for loop, queue in self._subs:
+            loop.call_soon_threadsafe(queue.put_nowait, topic)
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Get a queue receiving the topic of every future change.
+
+        Returns:
+            Queue bound to the running event loop
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subs.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """
+        Stop delivering changes to a queue.
+
+        Args:
+            queue: Queue returned by ``subscribe``
+        """
+        self._subs = [(loop, q) for loop, q in self._subs if q is not queue]
+
+
+# Global instance
+change_bus = ChangeBus()
@@ -1,13 +1,22 @@
 """CRUD operations for database models."""
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import desc
+from sqlalchemy import Row, case, delete, desc, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from database.models import Config, FollowUp, Message, User
+from database.changes import change_bus
+from database.models import Config, FollowUp, Message, UploadedDocument, User
+
+# Dialects supporting INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+# Fields update_user may set (unknown keyword arguments are ignored)
+_USER_COLUMNS = frozenset(User.__mapper__.column_attrs.keys())
 
 
 # ============================================================================
@@ -62,6 +71,7 @@ async def create_user(db: AsyncSession, phone: str, name: Optional[str] = None,
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    change_bus.notify("users")
     return user
 
 
@@ -77,17 +87,76 @@ async def update_user(db: AsyncSession, user_id: int, **kwargs: Any) -> Optional
     Returns:
         Updated User object if found, None otherwise
     """
-    user = await get_user_by_id(db, user_id)
+    # Single UPDATE ... RETURNING instead of select + commit + refresh
+    values = {key: value for key, value in kwargs.items() if key in _USER_COLUMNS}
+    values["updated_at"] = datetime.utcnow()
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(**values)
+        .returning(User)
+        .execution_options(populate_existing=True)
+    )
+    user = result.scalar_one_or_none()
+    await db.commit()
     if user:
-        for key, value in kwargs.items():
-            if hasattr(user, key):
-                setattr(user, key, value)
-        user.updated_at = datetime.utcnow()
-        await db.commit()
-        await db.refresh(user)
+        change_bus.notify("users")
     return user
 
 
+async def set_conversation_mode(db: AsyncSession, user_id: int, mode: str) -> bool:
+    """
+    Set a user's conversation mode with a single UPDATE.
+
+    Args:
+        db: Database session
+        user_id: User's ID
+        mode: New mode (AUTO, MANUAL or NEEDS_ATTENTION)
+
+    Returns:
+        True if the user exists, False otherwise
+    """
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(conversation_mode=mode, updated_at=datetime.utcnow())
+    )
+    await db.commit()
+    if not result.rowcount:
+        return False
+    change_bus.notify("users")
+    return True
+
+
+async def toggle_conversation_mode(db: AsyncSession, user_id: int) -> Optional[str]:
+    """
+    Switch a user between AUTO and MANUAL in one UPDATE ... RETURNING.
+
+    Any mode other than AUTO (including NEEDS_ATTENTION) goes back to AUTO.
+
+    Args:
+        db: Database session
+        user_id: User's ID
+
+    Returns:
+        The new mode, or None if the user does not exist
+    """
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            conversation_mode=case((User.conversation_mode == "AUTO", "MANUAL"), else_="AUTO"),
+            updated_at=datetime.utcnow(),
+        )
+        .returning(User.conversation_mode)
+    )
+    new_mode = result.scalar_one_or_none()
+    await db.commit()
+    if new_mode is not None:
+        change_bus.notify("users")
+    return new_mode
+
+
 async def get_all_active_users(db: AsyncSession, limit: int = 100) -> List[User]:
     """
     Get all users with recent activity.
@@ -108,6 +177,73 @@ async def get_all_active_users(db: AsyncSession, limit: int = 100) -> List[User]
     return list(result.scalars().all())
 
 
+def _last_message_text():
+    """Correlated scalar subquery selecting each user's latest message text."""
+    return (
+        select(Message.message_text)
+        .where(Message.user_id == User.id)
+        .order_by(desc(Message.timestamp), desc(Message.id))
+        .limit(1)
+        .correlate(User)
+        .scalar_subquery()
+    )
+
+
+async def get_active_users_with_last_message(
+    db: AsyncSession, limit: int = 100
+) -> List[Tuple[User, Optional[str]]]:
+    """
+    Get users with recent activity together with their last message, in one query.
+
+    Args:
+        db: Database session
+        limit: Maximum number of users to retrieve
+
+    Returns:
+        List of (User, last message text or None) tuples, most recent first
+    """
+    last_message = _last_message_text()
+    result = await db.execute(
+        select(User, last_message.label("last_message"))
+        .where(User.last_message_at.isnot(None))
+        .order_by(desc(User.last_message_at))
+        .limit(limit)
+    )
+    return [(user, text) for user, text in result.all()]
+
+
+async def get_active_users_compact(db: AsyncSession, limit: int = 100) -> List[Row]:
+    """
+    Get the columns the conversation lists display, without loading ORM objects.
+
+    Same users and order as ``get_active_users_with_last_message``, returned as
+    plain rows for the periodically refreshed panels.
+
+    Args:
+        db: Database session
+        limit: Maximum number of users to retrieve
+
+    Returns:
+        List of rows with id, phone, name, conversation_mode, last_message_at
+        and last_message (text or None), most recent first
+    """
+    last_message = _last_message_text()
+    result = await db.execute(
+        select(
+            User.id,
+            User.phone,
+            User.name,
+            User.conversation_mode,
+            User.last_message_at,
+            last_message.label("last_message"),
+        )
+        .where(User.last_message_at.isnot(None))
+        .order_by(desc(User.last_message_at))
+        .limit(limit)
+    )
+    return list(result.all())
+
+
 async def get_users_by_mode(db: AsyncSession, mode: str) -> List[User]:
     """
     Get all users in a specific conversation mode.
@@ -155,14 +291,17 @@ async def create_message(
     message = Message(user_id=user_id, message_text=message_text, sender=sender, message_metadata=metadata)
     db.add(message)
 
-    # Update user's message count and last message time
-    user = await get_user_by_id(db, user_id)
-    if user:
-        user.total_messages += 1
-        user.last_message_at = datetime.utcnow()
+    # Update user's message count and last message time in place (no SELECT,
+    # and concurrent messages cannot lose an increment)
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(total_messages=func.coalesce(User.total_messages, 0) + 1, last_message_at=datetime.utcnow())
+    )
 
     await db.commit()
     await db.refresh(message)
+    change_bus.notify("users")
     return message
 
 
@@ -176,15 +315,17 @@ async def get_user_messages(db: AsyncSession, user_id: int, limit: int = 50) ->
         limit: Maximum number of messages to retrieve
 
     Returns:
-        List of Message objects ordered by timestamp
+        The latest ``limit`` Message objects, in chronological order
     """
+    # Newest first so LIMIT keeps the recent tail, then flip back
     result = await db.execute(
         select(Message)
         .where(Message.user_id == user_id)
-        .order_by(Message.timestamp)
+        .order_by(desc(Message.timestamp), desc(Message.id))
         .limit(limit)
     )
-    return list(result.scalars().all())
+    messages = list(result.scalars().all())
+    return list(reversed(messages))
 
 
 async def get_recent_messages(db: AsyncSession, user_id: int, count: int = 10) -> List[Message]:
@@ -209,6 +350,37 @@ async def get_recent_messages(db: AsyncSession, user_id: int, count: int = 10) -
     return list(reversed(messages))  # Return in chronological order
 
 
+async def get_latest_messages_for_users(db: AsyncSession, user_ids: List[int]) -> Dict[int, Message]:
+    """
+    Get the most recent message of each user in a single query.
+
+    Args:
+        db: Database session
+        user_ids: IDs of the users to look up
+
+    Returns:
+        Dictionary mapping user ID to its latest Message (users without
+        messages are omitted)
+    """
+    if not user_ids:
+        return {}
+
+    ranked = (
+        select(
+            Message.id,
+            func.row_number()
+            .over(partition_by=Message.user_id, order_by=(desc(Message.timestamp), desc(Message.id)))
+            .label("rn"),
+        )
+        .where(Message.user_id.in_(user_ids))
+        .subquery()
+    )
+    result = await db.execute(
+        select(Message).join(ranked, Message.id == ranked.c.id).where(ranked.c.rn == 1)
+    )
+    return {message.user_id: message for message in result.scalars().all()}
+
+
 # ============================================================================
 # FOLLOW-UP OPERATIONS
 # ============================================================================
@@ -381,21 +553,119 @@ async def set_config(db: AsyncSession, key: str, value: Dict[str, Any]) -> Confi
     return config
 
 
-async def get_all_configs(db: AsyncSession) -> Dict[str, Any]:
+async def bulk_set_configs(db: AsyncSession, configs: Dict[str, Any], only_missing: bool = False) -> None:
+    """
+    Set several configuration values in a single transaction.
+
+    Args:
+        db: Database session
+        configs: Dictionary mapping config keys to values
+        only_missing: Insert only keys not stored yet, leaving existing
+            values untouched (used to seed defaults)
+    """
+    if not configs:
+        return
+
+    now = datetime.utcnow()
+    insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+
+    if insert is not None:
+        # Single INSERT ... ON CONFLICT (key) DO UPDATE / DO NOTHING for all keys
+        stmt = insert(Config).values(
+            [{"key": key, "value": value, "updated_at": now} for key, value in configs.items()]
+        )
+        if only_missing:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Config.key])
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Config.key],
+                set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+            )
+        await db.execute(stmt)
+    else:
+        result = await db.execute(select(Config).where(Config.key.in_(list(configs.keys()))))
+        existing = {config.key: config for config in result.scalars().all()}
+
+        for key, value in configs.items():
+            config = existing.get(key)
+            if config is None:
+                db.add(Config(key=key, value=value))
+            elif not only_missing:
+                config.value = value
+                config.updated_at = now
+
+    await db.commit()
+
+
+async def get_all_configs(db: AsyncSession, keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
     """
     Get all configuration values.
 
     Args:
         db: Database session
+        keys: Optional subset of keys to load (single ``IN`` query)
 
     Returns:
         Dictionary mapping config keys to values
     """
-    result = await db.execute(select(Config))
+    # Refresh rows already in the session (bulk upserts bypass the ORM)
+    stmt = select(Config).execution_options(populate_existing=True)
+    if keys is not None:
+        stmt = stmt.where(Config.key.in_(list(keys)))
+    result = await db.execute(stmt)
     configs = result.scalars().all()
     return {config.key: config.value for config in configs}
 
 
+# ============================================================================
+# UPLOADED DOCUMENT OPERATIONS
+# ============================================================================
+
+
+async def get_uploaded_document(db: AsyncSession, sha256: str) -> Optional[UploadedDocument]:
+    """
+    Get an ingested document by content hash.
+
+    Args:
+        db: Database session
+        sha256: Hex SHA-256 of the file contents
+
+    Returns:
+        UploadedDocument if this content was already ingested, None otherwise
+    """
+    return await db.get(UploadedDocument, sha256)
+
+
+async def add_uploaded_document(db: AsyncSession, sha256: str, path: str, n_chunks: int) -> UploadedDocument:
+    """
+    Record an ingested document.
+
+    Args:
+        db: Database session
+        sha256: Hex SHA-256 of the file contents
+        path: Original file path
+        n_chunks: Number of chunks added to the collection
+
+    Returns:
+        Created UploadedDocument object
+    """
+    document = UploadedDocument(sha256=sha256, path=path, n_chunks=n_chunks)
+    db.add(document)
+    await db.commit()
+    return document
+
+
+async def clear_uploaded_documents(db: AsyncSession) -> None:
+    """
+    Remove every ingested-document record (used when the collection is cleared).
+
+    Args:
+        db: Database session
+    """
+    await db.execute(delete(UploadedDocument))
+    await db.commit()
+
+
 # ============================================================================
 # DATABASE INITIALIZATION
 # ============================================================================
@@ -418,7 +688,4 @@ async def init_default_configs(db: AsyncSession) -> None:
         "rag_enabled": False,
     }
 
-    for key, value in defaults.items():
-        existing = await get_config(db, key)
-        if existing is None:
-            await set_config(db, key, value)
+    await bulk_set_configs(db, defaults, only_missing=True)
@@ -0,0 +1,184 @@
+"""Async engine construction and connection pool diagnostics."""
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, Pool, QueuePool
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Pool settings for server databases (SQLite uses its own pool class)
+POOL_SIZE = 20
+POOL_RECYCLE_SECONDS = 1800
+
+# Applied to every SQLite connection: WAL lets readers (UI panels) run while
+# the webhook writes; the rest trades durability on power loss for speed
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",  # 64 MiB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+)
+
+# Connections bounded_session leaves free for the webhook and background
+# jobs, which use the session factory directly
+DB_HEADROOM = 2
+
+# bounded_session limit for pools without a fixed capacity (NullPool,
+# StaticPool, unlimited overflow)
+UNBOUNDED_POOL_CONCURRENCY = POOL_SIZE - DB_HEADROOM
+
+# One semaphore per pool, sized from that pool's capacity
+_DB_SEMS: "weakref.WeakKeyDictionary[Pool, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def create_engine(database_url: str, **kwargs: Any) -> AsyncEngine:
+    """
+    Create an async engine with a pool sized for concurrent chat turns.
+
+    SQLite connections are tuned with SQLITE_PRAGMAS (WAL journal, larger
+    page cache) instead, since SQLite uses its own pool class.
+
+    Args:
+        database_url: SQLAlchemy database URL
+        **kwargs: Extra arguments forwarded to ``create_async_engine``
+
+    Returns:
+        Configured async engine
+    """
+    is_sqlite = database_url.startswith("sqlite")
+    if not is_sqlite:
+        kwargs.setdefault("pool_size", POOL_SIZE)
+        kwargs.setdefault("max_overflow", 0)
+        kwargs.setdefault("pool_pre_ping", False)
+        kwargs.setdefault("pool_recycle", POOL_RECYCLE_SECONDS)
+
+    engine = create_async_engine(database_url, echo=False, **kwargs)
+    if is_sqlite:
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+def _apply_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    """Run SQLITE_PRAGMAS on a new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def create_session_factory(engine: AsyncEngine) -> sessionmaker:
+    """
+    Create the session factory used across the application.
+
+    Args:
+        engine: Async engine to bind sessions to
+
+    Returns:
+        Session factory producing ``AsyncSession`` objects
+    """
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def describe_pool(engine: AsyncEngine) -> Dict[str, Any]:
+    """
+    Summarize the engine's connection pool.
+
+    Args:
+        engine: Async engine
+
+    Returns:
+        Dict with the pool class and, when available, size and checkout counts
+    """
+    pool = engine.sync_engine.pool
+    info: Dict[str, Any] = {"pool": type(pool).__name__}
+    for attr in ("size", "checkedout", "overflow"):
+        method = getattr(pool, attr, None)
+        if callable(method):
+            info[attr] = method()
+    return info
+
+
+def log_pool_status(session_factory: sessionmaker) -> None:
+    """
+    Log the pool behind a session factory so pool regressions are noticed.
+
+    Args:
+        session_factory: Session factory bound to an async engine
+    """
+    engine = session_factory.kw.get("bind")
+    if not isinstance(engine, AsyncEngine):
+        logger.warning("Session factory is not bound to an async engine")
+        return
+    if isinstance(engine.sync_engine.pool, NullPool):
+        logger.warning("DB engine uses NullPool: every session opens a new connection")
+    logger.info(f"DB pool: {describe_pool(engine)}")
+
+
+def pool_capacity(engine: AsyncEngine) -> Optional[int]:
+    """
+    Get the most connections the engine's pool hands out at once.
+
+    Args:
+        engine: Async engine
+
+    Returns:
+        ``size + max_overflow`` for queue pools (e.g. 5 + 10 for the default
+        SQLite pool, POOL_SIZE for server databases), None if unbounded
+    """
+    pool = engine.sync_engine.pool
+    if isinstance(pool, QueuePool):
+        max_overflow = pool._max_overflow
+        return None if max_overflow < 0 else pool.size() + max_overflow
+    return None
+
+
+def bounded_concurrency(engine: AsyncEngine) -> int:
+    """
+    Get how many sessions bounded_session lets through for an engine.
+
+    Args:
+        engine: Async engine
+
+    Returns:
+        Pool capacity minus DB_HEADROOM (at least 1)
+    """
+    capacity = pool_capacity(engine)
+    if capacity is None:
+        return UNBOUNDED_POOL_CONCURRENCY
+    return max(capacity - DB_HEADROOM, 1)
+
+
+@asynccontextmanager
+async def bounded_session(session_factory: sessionmaker) -> AsyncIterator[AsyncSession]:
+    """
+    Open a session, waiting while the engine's pool is nearly exhausted.
+
+    Used by the auto-refreshing UI panels so many open tabs queue up here
+    instead of exhausting the connection pool.
+
+    Args:
+        session_factory: Session factory bound to an async engine
+
+    Yields:
+        Database session
+    """
+    engine = session_factory.kw["bind"]
+    pool = engine.sync_engine.pool
+    sem = _DB_SEMS.get(pool)
+    if sem is None:
+        sem = _DB_SEMS[pool] = asyncio.Semaphore(bounded_concurrency(engine))
+
+    async with sem:
+        async with session_factory() as db:
+            yield db
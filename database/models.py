@@ -98,3 +98,17 @@ class Config(Base):
 
     def __repr__(self) -> str:
         return f"<Config(key={self.key})>"
+
+
+class UploadedDocument(Base):
+    """Manifest of documents ingested into the RAG collection, keyed by content hash."""
+
+    __tablename__ = "uploaded_docs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String(500), nullable=False)
+    n_chunks = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<UploadedDocument(path={self.path}, chunks={self.n_chunks})>"
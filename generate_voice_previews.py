@@ -0,0 +1,31 @@
+"""Script para pregenerar las muestras de voz del panel de configuración."""
+import asyncio
+
+from dotenv import load_dotenv
+
+from gradio_ui.config_panel_v2 import PREVIEW_TEXT, VOICE_PREVIEW_ASSETS_DIR
+from services.tts_service import TTSService, get_tts_service
+
+# Load environment
+load_dotenv()
+
+
+async def generate_previews(overwrite: bool = False):
+    """Generar assets/voice_previews/{voz}.mp3 para cada voz disponible."""
+    tts_service = get_tts_service()
+    VOICE_PREVIEW_ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+
+    for voice in TTSService.AVAILABLE_VOICES:
+        path = VOICE_PREVIEW_ASSETS_DIR / f"{voice}.mp3"
+        if path.exists() and not overwrite:
+            print(f"  = {voice} (ya existe)")
+            continue
+
+        audio_bytes = await tts_service.generate_audio(PREVIEW_TEXT, voice=voice)
+        path.write_bytes(audio_bytes)
+        print(f"  OK {voice} -> {path}")
+
+
+if __name__ == "__main__":
+    print("Generando muestras de voz...")
+    asyncio.run(generate_previews())
@@ -1,16 +1,89 @@
 """Simplified Chat component that works with Gradio + FastAPI."""
 
-from typing import List, Dict
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
 import gradio as gr
 import asyncio
+import hashlib
+import logging
+import time
 from langchain_core.messages import AIMessage, HumanMessage
 
-from graph.workflow import process_message
+from database.engine import log_pool_status
+from graph.nodes import SENTIMENT_HISTORY_LEN
+from graph.workflow import FALLBACK_RESPONSE, process_message_stream
 from services.config_manager import get_config_manager
+from utils.circuit_breaker import CircuitBreaker
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Maximum time to wait for a single chat turn (seconds)
+PROCESS_TIMEOUT_SECONDS = 20
+
+# Reply shown while the circuit breaker is open
+SERVICE_BUSY_RESPONSE = "Service busy, please try again in a few seconds."
+
+# Trips after more than 25 failed/timed-out turns among the last 50
+_BREAKER = CircuitBreaker("chat", window=50, max_failures=25, cooldown_seconds=30.0)
+
+# Number of user/assistant turns forwarded to the graph (older turns are dropped)
+MAX_HISTORY_TURNS = 20
+
+# Histories longer than this have their LangChain messages built off the loop
+OFFLOAD_HISTORY_THRESHOLD = 50
+
+# Chatbot role -> LangChain message class
+_ROLE_TO_MSG = {"user": HumanMessage, "assistant": AIMessage}
+
+# Phone number used for the simulated test user
+TEST_USER_PHONE = "+1234567890"
+
+# LRU cache of (bot response, turn sentiment) keyed by (message, recent history, config)
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_HISTORY = 6
+_RESPONSE_CACHE: "OrderedDict[str, Tuple[str, Optional[str]]]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = asyncio.Lock()
+
+# Turns currently being generated, keyed like the response cache, so that
+# identical concurrent requests share one graph run
+_INFLIGHT: Dict[str, asyncio.Future] = {}
+
+def _new_session_messages() -> deque:
+    """Create the empty LangChain message buffer kept in a session's ``gr.State``."""
+    return deque(maxlen=2 * MAX_HISTORY_TURNS)
+
+
+def _session_messages(cached: deque, recent_history: List[Dict]) -> deque:
+    """
+    Sync a session's LangChain messages with its chatbot history.
+
+    The buffer is rebuilt in place from the chatbot history only when it has
+    drifted (different length or last message), e.g. after clearing the chat.
+    """
+    if len(cached) != len(recent_history) or (
+        recent_history and cached[-1].content != recent_history[-1].get("content")
+    ):
+        cached.clear()
+        cached.extend(
+            _ROLE_TO_MSG[role](content=msg["content"])
+            for msg in recent_history
+            if (role := msg.get("role")) in _ROLE_TO_MSG
+        )
+    return cached
+
+
+def _response_cache_key(message: str, history: List[Dict], config: Dict[str, Any]) -> str:
+    """Build a stable cache key for a chat turn."""
+    tail = tuple((m.get("role"), m.get("content")) for m in history[-RESPONSE_CACHE_HISTORY:])
+    raw = f"{message.strip().lower()}|{tail}|{sorted(config.items())}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _use_response_cache(config: Dict[str, Any]) -> bool:
+    """Responses depending on retrieved documents are not cached."""
+    return not config.get("rag_enabled")
+
 
 def create_chat_component(db_session_factory):
     """
@@ -24,80 +97,211 @@ def create_chat_component(db_session_factory):
     """
     logger.info("Creating simplified chat component")
 
-    def process_chat_message(message: str, history: List[Dict]) -> tuple:
-        """Process chat message synchronously."""
-        logger.info(f"=" * 60)
-        logger.info(f"CHAT MESSAGE RECEIVED: '{message}'")
-        logger.info(f"=" * 60)
+    # Config loads on cache misses check out a pooled connection per turn
+    log_pool_status(db_session_factory)
+
+    config_manager = get_config_manager()
+
+    async def process_chat_message(
+        message: str, history: List[Dict], session_msgs: deque, sentiments: List[str]
+    ):
+        """
+        Process chat message, yielding the history as the reply streams in.
+
+        ``history``, ``session_msgs`` (its LangChain counterpart) and
+        ``sentiments`` (the recent user-turn sentiments) are the session's
+        ``gr.State`` values; they are updated in place instead of copying the
+        whole conversation every message.
+        """
+        # Checked once per turn; formatting below is skipped when INFO is off
+        log_info = logger.isEnabledFor(logging.INFO)
+        if log_info:
+            logger.info(f"CHAT MESSAGE RECEIVED: '{message}'")
 
         if not message.strip():
             logger.warning("Empty message, ignoring")
-            return history, ""
+            yield history, ""
+            return
 
-        try:
-            # Run async code in new event loop
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        if not _BREAKER.allow():
+            history.append({"role": "user", "content": message})
+            history.append({"role": "assistant", "content": SERVICE_BUSY_RESPONSE})
+            yield history, ""
+            return
 
-            try:
-                # Get config
-                config_manager = get_config_manager()
+        # Snapshot taken before this turn is appended below
+        history_len = len(history)
+        recent_history = history[-2 * MAX_HISTORY_TURNS:]
 
-                async def async_process():
-                    """Async processing function."""
-                    # Load config
+        try:
+            events: "asyncio.Queue[tuple]" = asyncio.Queue()
+
+            async def async_process():
+                """Async processing function, reporting progress through ``events``."""
+                async def load_config() -> Dict[str, Any]:
                     async with db_session_factory() as db:
-                        config = await config_manager.load_all_configs(db)
+                        return await config_manager.load_all_configs(db)
+
+                async def prepare_messages() -> deque:
+                    # Thread hand-off only pays off for long histories
+                    if history_len > OFFLOAD_HISTORY_THRESHOLD:
+                        return await asyncio.to_thread(_session_messages, session_msgs, recent_history)
+                    return _session_messages(session_msgs, recent_history)
 
-                    logger.info(f"Config loaded: {list(config.keys())}")
+                # Load config while the session's LangChain messages are
+                # prepared (reused, or rebuilt on drift)
+                config, messages = await asyncio.gather(load_config(), prepare_messages())
+                message_count = len(messages)
 
-                    # Convert history to LangChain messages
-                    messages = []
-                    for msg in history:
-                        if msg.get("role") == "user":
-                            messages.append(HumanMessage(content=msg["content"]))
-                        elif msg.get("role") == "assistant":
-                            messages.append(AIMessage(content=msg["content"]))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Config loaded: {list(config.keys())}")
 
-                    logger.info(f"Processing {len(messages)} history messages")
+                if log_info:
+                    logger.info(f"Processing {message_count} history messages")
 
-                    # Process through graph
-                    result = await process_message(
-                        user_phone="+1234567890",
+                cache_key = None
+                cached = None
+                if _use_response_cache(config):
+                    cache_key = _response_cache_key(message, recent_history, config)
+                    async with _RESPONSE_CACHE_LOCK:
+                        cached = _RESPONSE_CACHE.get(cache_key)
+                        if cached is not None:
+                            _RESPONSE_CACHE.move_to_end(cache_key)
+
+                async def run_graph() -> Dict[str, Any]:
+                    """Process through graph, forwarding tokens as they arrive."""
+                    final_state = {}
+                    async for event in process_message_stream(
+                        user_phone=TEST_USER_PHONE,
                         message=message,
-                        conversation_history=messages,
+                        conversation_history=list(messages),
                         config=config,
-                    )
+                        sentiment_history=list(sentiments),
+                    ):
+                        if event["type"] == "token":
+                            events.put_nowait(("token", event["content"]))
+                        else:
+                            final_state = event["state"]
+                    return final_state
 
-                    bot_response = result.get("current_response", "Sorry, no response generated.")
-                    logger.info(f"Bot response: {bot_response[:100]}...")
+                async def generate() -> Tuple[str, Optional[str]]:
+                    """Get (reply, sentiment), sharing a graph run with identical concurrent turns."""
+                    leader = _INFLIGHT.get(cache_key) if cache_key is not None else None
+                    if leader is not None:
+                        logger.info("Joining identical in-flight request")
+                        try:
+                            return await asyncio.shield(leader)
+                        except asyncio.CancelledError:
+                            # Re-raise if this turn was cancelled; if only the
+                            # leader was (e.g. its client left), run the graph here
+                            if not leader.cancelled() or asyncio.current_task().cancelling():
+                                raise
+                            logger.info("In-flight request was cancelled, running the graph")
 
-                    return bot_response
+                    inflight = None
+                    if cache_key is not None and cache_key not in _INFLIGHT:
+                        inflight = asyncio.get_running_loop().create_future()
+                        _INFLIGHT[cache_key] = inflight
 
-                # Run the async function
-                bot_response = loop.run_until_complete(async_process())
+                    try:
+                        result = await run_graph()
+                        bot_response = result.get("current_response") or FALLBACK_RESPONSE
+                        turn = (bot_response, result.get("sentiment"))
 
-                # Update history
-                new_history = history + [
-                    {"role": "user", "content": message},
-                    {"role": "assistant", "content": bot_response}
-                ]
+                        if cache_key is not None and bot_response != FALLBACK_RESPONSE:
+                            async with _RESPONSE_CACHE_LOCK:
+                                _RESPONSE_CACHE[cache_key] = turn
+                                _RESPONSE_CACHE.move_to_end(cache_key)
+                                if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+                                    _RESPONSE_CACHE.popitem(last=False)
 
-                logger.info("Message processed successfully!")
-                logger.info("=" * 60)
+                        if inflight is not None:
+                            inflight.set_result(turn)
+                        return turn
+                    except asyncio.CancelledError:
+                        if inflight is not None:
+                            inflight.cancel()
+                        raise
+                    except Exception as e:
+                        if inflight is not None:
+                            inflight.set_exception(e)
+                            # Mark retrieved so an unjoined failure is not logged twice
+                            inflight.exception()
+                        raise
+                    finally:
+                        if inflight is not None and _INFLIGHT.get(cache_key) is inflight:
+                            del _INFLIGHT[cache_key]
+
+                if cached is not None:
+                    logger.info("Response cache hit")
+                    bot_response, sentiment = cached
+                else:
+                    bot_response, sentiment = await generate()
+                    if log_info:
+                        logger.info(f"Bot response: {bot_response[:100]}...")
+
+                # The only place this turn is added to the session's messages
+                messages.append(HumanMessage(content=message))
+                messages.append(AIMessage(content=bot_response))
+                if sentiment:
+                    # Same bounded history the graph keeps, so repeated
+                    # negative turns hand off like on WhatsApp
+                    sentiments.append(sentiment)
+                    del sentiments[:-SENTIMENT_HISTORY_LEN]
+                return bot_response
 
-                return new_history, ""
+            def on_done(task: asyncio.Task) -> None:
+                """Push the final response (or error) once the turn finishes."""
+                if task.cancelled():
+                    events.put_nowait(("error", asyncio.CancelledError()))
+                elif task.exception() is not None:
+                    events.put_nowait(("error", task.exception()))
+                else:
+                    events.put_nowait(("final", task.result()))
 
-            finally:
-                loop.close()
+            # Runs on Gradio's own loop, so pooled clients are reused across turns
+            task = asyncio.create_task(async_process())
+            task.add_done_callback(on_done)
+
+            history.append({"role": "user", "content": message})
+            reply = {"role": "assistant", "content": ""}
+            history.append(reply)
+            deadline = time.monotonic() + PROCESS_TIMEOUT_SECONDS
+            while True:
+                try:
+                    kind, payload = await asyncio.wait_for(
+                        events.get(), timeout=max(deadline - time.monotonic(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    task.cancel()
+                    raise TimeoutError(f"No response within {PROCESS_TIMEOUT_SECONDS}s")
+                if kind == "token":
+                    reply["content"] += payload
+                    yield history, ""
+                elif kind == "final":
+                    reply["content"] = payload
+                    break
+                else:
+                    raise payload
+
+            # The graph and LLM service swallow their own errors and answer
+            # with FALLBACK_RESPONSE, which must count as a failed turn
+            succeeded = reply["content"] != FALLBACK_RESPONSE
+            _BREAKER.record(succeeded)
+            if succeeded:
+                logger.info("Message processed successfully!")
+            else:
+                logger.warning("Turn answered with the fallback response")
+
+            yield history, ""
 
         except Exception as e:
+            _BREAKER.record(False)
             logger.error(f"ERROR: {e}", exc_info=True)
-            error_history = history + [
-                {"role": "user", "content": message},
-                {"role": "assistant", "content": f"Error: {str(e)}"}
-            ]
-            return error_history, ""
+            del history[history_len:]
+            history.append({"role": "user", "content": message})
+            history.append({"role": "assistant", "content": f"Error: {str(e)}"})
+            yield history, ""
 
     # Create UI
     with gr.Column(scale=1) as col:
@@ -107,7 +311,11 @@ def create_chat_component(db_session_factory):
         chatbot = gr.Chatbot(
             label="Conversation",
             height=400,
+            type="messages",
         )
+        chat_state = gr.State([])
+        session_msgs_state = gr.State(_new_session_messages())
+        sentiments_state = gr.State([])
 
         with gr.Row():
             msg_input = gr.Textbox(
@@ -120,9 +328,14 @@ def create_chat_component(db_session_factory):
         clear_btn = gr.Button("Clear Chat", size="sm")
 
         # Connect events
-        msg_input.submit(process_chat_message, [msg_input, chatbot], [chatbot, msg_input])
-        send_btn.click(process_chat_message, [msg_input, chatbot], [chatbot, msg_input])
-        clear_btn.click(lambda: [], None, chatbot)
+        chat_inputs = [msg_input, chat_state, session_msgs_state, sentiments_state]
+        msg_input.submit(process_chat_message, chat_inputs, [chatbot, msg_input])
+        send_btn.click(process_chat_message, chat_inputs, [chatbot, msg_input])
+        clear_btn.click(
+            lambda: ([], [], _new_session_messages(), []),
+            None,
+            [chatbot, chat_state, session_msgs_state, sentiments_state],
+        )
 
     logger.info("Chat component created")
     return col
@@ -1,16 +1,63 @@
 """Configuration panel for Gradio UI."""
 
-from typing import Any, Dict, List
+import asyncio
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import gradio as gr
 
+from database import crud
 from services.config_manager import get_config_manager
-from services.rag_service import get_rag_service
+from services.rag_service import RAGService, get_rag_service
 from services.tts_service import TTSService
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Maximum number of documents ingested concurrently
+MAX_CONCURRENT_UPLOADS = 4
+_UPLOAD_SEM = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+
+# Files below this size are read once and parsed from memory
+IN_MEMORY_UPLOAD_BYTES = 8 * 1024 * 1024
+
+# Finished upload jobs nobody polled (e.g. the tab was closed) are dropped after this
+UPLOAD_JOB_TTL_SECONDS = 3600
+
+# Static UI content, built once at import time
+_VOICES = tuple(TTSService.AVAILABLE_VOICES)
+
+_VOICE_HELP_MD = """
+**Voice Descriptions:**
+- **alloy**: Neutral and balanced
+- **echo**: Clear and articulate
+- **fable**: Warm and engaging
+- **onyx**: Deep and authoritative
+- **nova**: Friendly and energetic
+- **shimmer**: Bright and cheerful
+"""
+
+_DEPLOY_MD = """
+### 🚀 Production Deployment
+
+**Status:** Ready to deploy
+
+**Before deploying:**
+1. Ensure all configurations are saved
+2. Test conversations in the chat interface
+3. Verify Twilio webhook is configured
+4. Check environment variables are set
+
+**Deployment checklist:**
+- ✅ Database initialized
+- ✅ Services configured
+- ✅ OpenAI API key set
+- ✅ Twilio credentials set
+"""
+
 
 class ConfigPanelComponent:
     """Component for managing system configuration."""
@@ -23,6 +70,9 @@ class ConfigPanelComponent:
             db_session_factory: Factory function to create DB sessions
         """
         self.db_session_factory = db_session_factory
+        # Background upload jobs: job_id -> {status, processed, total, total_chunks}
+        self._upload_tasks: Dict[str, Dict[str, Any]] = {}
+        self._running_uploads: set = set()
         logger.info("Config panel component initialized")
 
     async def load_current_config(self) -> Dict[str, Any]:
@@ -88,38 +138,144 @@ class ConfigPanelComponent:
             logger.error(f"Error saving configuration: {e}")
             return f"❌ Error saving configuration: {str(e)}"
 
-    async def upload_rag_documents(self, files: List[Any]) -> str:
+    async def upload_rag_documents(self, files: List[Any]) -> Tuple[str, Optional[str], None]:
         """
-        Upload documents for RAG.
+        Queue documents for RAG ingestion and return immediately.
 
         Args:
             files: List of uploaded files
 
         Returns:
-            Status message
+            Tuple of (status message, job id to poll, cleared file selector)
         """
         if not files:
-            return "No files selected"
+            return "No files selected", None, None
+
+        self._drop_stale_jobs()
+
+        job_id = uuid.uuid4().hex
+        self._upload_tasks[job_id] = {
+            "status": "queued",
+            "processed": 0,
+            "total": len(files),
+            "total_chunks": 0,
+        }
+
+        task = asyncio.create_task(self._run_upload(job_id, files))
+        self._running_uploads.add(task)
+        task.add_done_callback(self._running_uploads.discard)
+
+        logger.info(f"Queued RAG upload job {job_id} ({len(files)} files)")
+        # The temporary files are deleted once ingested, so the selector is cleared
+        return f"⏳ Queued as {job_id}", job_id, None
+
+    async def _run_upload(self, job_id: str, files: List[Any]) -> None:
+        """
+        Ingest documents in the background, recording progress for polling.
+
+        Args:
+            job_id: Upload job identifier
+            files: List of uploaded files
+        """
+        job = self._upload_tasks[job_id]
+        job["status"] = "running"
 
         try:
             rag_service = get_rag_service()
-            total_chunks = 0
-
-            for file in files:
-                try:
-                    chunks = await rag_service.upload_document(file.name)
-                    total_chunks += chunks
-                    logger.info(f"Uploaded {file.name}: {chunks} chunks")
-                except Exception as e:
-                    logger.error(f"Failed to upload {file.name}: {e}")
-                    continue
 
-            stats = rag_service.get_collection_stats()
-            return f"✅ Uploaded {len(files)} files ({total_chunks} chunks)\nTotal in DB: {stats['total_chunks']} chunks"
+            async def upload_one(file) -> int:
+                async with _UPLOAD_SEM:
+                    try:
+                        chunks = await self._ingest_file(rag_service, file.name)
+                        logger.info(f"Uploaded {file.name}: {chunks} chunks")
+                        job["total_chunks"] += chunks
+                        return chunks
+                    except Exception as e:
+                        logger.error(f"Failed to upload {file.name}: {e}")
+                        return 0
+                    finally:
+                        job["processed"] += 1
+
+            if len(files) == 1:
+                await upload_one(files[0])
+            else:
+                await asyncio.gather(*(upload_one(f) for f in files))
+
+            job["status"] = "done"
 
         except Exception as e:
             logger.error(f"Error uploading RAG documents: {e}")
-            return f"❌ Error: {str(e)}"
+            job["status"] = "error"
+            job["error"] = str(e)
+
+        finally:
+            job["finished_at"] = time.monotonic()
+
+    def _drop_stale_jobs(self) -> None:
+        """Forget finished jobs whose result was never polled within UPLOAD_JOB_TTL_SECONDS."""
+        cutoff = time.monotonic() - UPLOAD_JOB_TTL_SECONDS
+        for job_id in [
+            job_id for job_id, job in self._upload_tasks.items()
+            if job.get("finished_at", cutoff + 1) < cutoff
+        ]:
+            del self._upload_tasks[job_id]
+
+    async def _ingest_file(self, rag_service: RAGService, path: str) -> int:
+        """
+        Ingest one uploaded file and delete Gradio's temporary copy afterwards.
+
+        Small files in a supported format are read once and parsed from
+        memory; everything else is handed to the RAG service by path.
+
+        Args:
+            rag_service: RAG service instance
+            path: Path of the uploaded temporary file
+
+        Returns:
+            Number of chunks created
+        """
+        file_path = Path(path)
+        try:
+            if (
+                file_path.suffix.lower() in RAGService.BYTES_EXTENSIONS
+                and os.path.getsize(path) < IN_MEMORY_UPLOAD_BYTES
+            ):
+                data = await asyncio.to_thread(file_path.read_bytes)
+                return await rag_service.upload_document(data, filename=file_path.name)
+            return await rag_service.upload_document(path)
+        finally:
+            file_path.unlink(missing_ok=True)
+
+    def _poll_status(self, job_id: Optional[str]):
+        """
+        Describe the state of an upload job.
+
+        Finished jobs are reported once and then forgotten.
+
+        Args:
+            job_id: Upload job identifier (None if nothing was queued)
+
+        Returns:
+            Status text for the RAG stats box, or ``gr.update()`` (no change)
+            when there is no job to report on
+        """
+        job = self._upload_tasks.get(job_id) if job_id else None
+        if job is None:
+            return gr.update()
+
+        if job["status"] == "error":
+            del self._upload_tasks[job_id]
+            return f"❌ Error: {job['error']}"
+
+        if job["status"] == "done":
+            del self._upload_tasks[job_id]
+            stats = get_rag_service().get_collection_stats()
+            return (
+                f"✅ Uploaded {job['total']} files ({job['total_chunks']} chunks)\n"
+                f"Total in DB: {stats['total_chunks']} chunks"
+            )
+
+        return f"⏳ Processing {job['processed']}/{job['total']} files ({job['total_chunks']} chunks so far)"
 
     async def clear_rag_documents(self) -> str:
         """
@@ -131,6 +287,9 @@ class ConfigPanelComponent:
         try:
             rag_service = get_rag_service()
             rag_service.clear_collection()
+            # Forget the ingested-file manifest too, or re-uploads would be skipped
+            async with self.db_session_factory() as db:
+                await crud.clear_uploaded_documents(db)
             logger.info("RAG collection cleared")
             return "✅ All RAG documents cleared"
         except Exception as e:
@@ -190,20 +349,12 @@ class ConfigPanelComponent:
 
                     tts_voice = gr.Dropdown(
                         label="TTS Voice",
-                        choices=TTSService.AVAILABLE_VOICES,
+                        choices=_VOICES,
                         value="nova",
                         info="Select voice for text-to-speech",
                     )
 
-                    gr.Markdown("""
-                    **Voice Descriptions:**
-                    - **alloy**: Neutral and balanced
-                    - **echo**: Clear and articulate
-                    - **fable**: Warm and engaging
-                    - **onyx**: Deep and authoritative
-                    - **nova**: Friendly and energetic
-                    - **shimmer**: Bright and cheerful
-                    """)
+                    gr.Markdown(_VOICE_HELP_MD)
 
                 # Tab 3: RAG Configuration
                 with gr.Tab("RAG (Knowledge Base)"):
@@ -230,12 +381,15 @@ class ConfigPanelComponent:
                             placeholder="No documents uploaded",
                         )
 
-                    # Upload handler
+                    upload_job = gr.State(None)
+
+                    # Upload handler (returns immediately, progress is polled)
                     upload_btn.click(
                         self.upload_rag_documents,
                         file_upload,
-                        upload_status,
+                        [upload_status, upload_job, file_upload],
                     )
+                    gr.Timer(value=2).tick(self._poll_status, upload_job, rag_stats)
 
                     # Clear handler
                     clear_rag_btn.click(
@@ -246,23 +400,7 @@ class ConfigPanelComponent:
 
                 # Tab 4: Deployment
                 with gr.Tab("Deployment"):
-                    gr.Markdown("""
-                    ### 🚀 Production Deployment
-
-                    **Status:** Ready to deploy
-
-                    **Before deploying:**
-                    1. Ensure all configurations are saved
-                    2. Test conversations in the chat interface
-                    3. Verify Twilio webhook is configured
-                    4. Check environment variables are set
-
-                    **Deployment checklist:**
-                    - ✅ Database initialized
-                    - ✅ Services configured
-                    - ✅ OpenAI API key set
-                    - ✅ Twilio credentials set
-                    """)
+                    gr.Markdown(_DEPLOY_MD)
 
                     deploy_btn = gr.Button("🚀 Deploy to Production", variant="primary", size="lg")
                     deploy_status = gr.Textbox(label="Deployment Status", interactive=False)
@@ -1,14 +1,97 @@
 """Panel de configuración mejorado con pestañas para Chatbot, Producto/Servicio y Documentos RAG."""
 
+import asyncio
+import hashlib
+import itertools
+import os
+import time
+
+import aiofiles
+import aiofiles.os
 import gradio as gr
+from markdown_it import MarkdownIt
 from pathlib import Path
 import tempfile
+from database import crud
+from database.engine import log_pool_status
 from services.config_manager import get_config_manager
 from services.rag_service import get_rag_service
+from services.tts_service import TTSService, get_tts_service
+from utils.cache import TTLCache
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Claves de cada pestaña
+CONFIG_KEYS_CHATBOT: tuple[str, ...] = (
+    "system_prompt", "welcome_message", "payment_link", "response_delay_minutes",
+    "text_audio_ratio", "use_emojis", "tts_voice",
+    "multi_part_messages", "max_words_per_response",
+)
+CONFIG_KEYS_PRODUCT: tuple[str, ...] = (
+    "product_name", "product_description", "product_features",
+    "product_benefits", "product_price", "product_target_audience",
+)
+
+# Claves guardadas por el botón "Guardar", en el mismo orden que sus inputs
+_CONFIG_KEYS: tuple[str, ...] = CONFIG_KEYS_CHATBOT + CONFIG_KEYS_PRODUCT
+
+# Ventana (segundos) para agrupar clics repetidos en "Guardar" de una misma sesión
+SAVE_DEBOUNCE_SECONDS = 0.5
+
+# Sesiones del navegador cuyo estado de guardado se recuerda, y por cuánto tiempo
+SAVE_STATE_MAX_SESSIONS = 256
+SAVE_STATE_TTL_SECONDS = 3600
+
+# Vida (segundos) de las estadísticas del RAG mostradas en el panel
+RAG_STATS_TTL_SECONDS = 2.0
+
+# Máximo de documentos procesados a la vez al subir archivos
+MAX_CONCURRENT_UPLOADS = 4
+
+# Tamaño de bloque al calcular el hash de un documento subido
+HASH_BLOCK_BYTES = 1024 * 1024
+
+# Resultado de un archivo omitido por duplicado (no cuenta como subido)
+_SKIPPED = object()
+
+# Texto fijo de la muestra de voz y máximo de MP3 de muestra guardados en disco
+PREVIEW_TEXT = "Hola, soy tu asistente virtual. Esta es una muestra de mi voz."
+PREVIEW_CACHE_MAX_FILES = 20
+PREVIEW_CACHE_DIRNAME = "sales_bot_voice_previews"
+
+# Muestras pregeneradas ({voz}.mp3, ver generate_voice_previews.py)
+VOICE_PREVIEW_ASSETS_DIR = Path(__file__).resolve().parent.parent / "assets" / "voice_previews"
+
+# Contenido estático de la UI, construido una sola vez al importar
+_VOICES = tuple(TTSService.AVAILABLE_VOICES)
+
+_RAG_HELP_MD = """
+**¿Qué puedes subir?**
+- Catálogos de productos
+- Manuales de usuario
+- FAQs
+- Guías de precios
+- Políticas y términos
+
+**¿Cómo funciona?**
+1. Sube tus documentos
+2. Activa RAG en Chatbot
+3. El bot usará automáticamente esta información
+"""
+
+# Renderizado una sola vez a HTML (markdown-it-py viene con Gradio)
+_RAG_HELP_HTML = MarkdownIt().render(_RAG_HELP_MD)
+
+
+def _file_sha256(path: str) -> str:
+    """Calcular el SHA-256 de un archivo leyendo bloques de 1 MiB."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
 
 class ConfigPanelComponentV2:
     """Componente de configuración con pestañas para Chatbot, Producto y Documentos RAG."""
@@ -21,126 +104,252 @@ class ConfigPanelComponentV2:
             db_session_factory: Factory para crear sesiones de BD
         """
         self.db_session_factory = db_session_factory
-        self.temp_dir = tempfile.mkdtemp()
+        # Cada clic abre una sesión: el engine debe tener un pool real
+        log_pool_status(db_session_factory)
+        self._cfg = get_config_manager()
+        self._rag = get_rag_service()
+        self._tts: TTSService | None = None  # se crea en la primera muestra de voz
+        # Directorio fijo: las muestras sobreviven reinicios y no se filtran
+        # directorios temporales nuevos en cada arranque
+        self._preview_cache_dir = Path(tempfile.gettempdir()) / PREVIEW_CACHE_DIRNAME
+        self._preview_cache_dir.mkdir(exist_ok=True)
+        for leftover in self._preview_cache_dir.glob("*.tmp"):
+            leftover.unlink(missing_ok=True)
+        # Debounce por sesión del navegador (session_hash -> último clic)
+        self._save_sessions = TTLCache(SAVE_STATE_MAX_SESSIONS, SAVE_STATE_TTL_SECONDS)
+        # Guardado en segundo plano de cada clic (id del clic -> tarea), leído
+        # por save_result con el id que ese clic dejó en su gr.State
+        self._save_tasks = TTLCache(SAVE_STATE_MAX_SESSIONS, SAVE_STATE_TTL_SECONDS)
+        self._save_ids = itertools.count(1)
+        self._stats_cache: tuple[float, str] | None = None
         logger.info("Config panel V2 initialized")
 
     async def load_all_configs(self):
         """Cargar todas las configuraciones."""
         try:
-            config_manager = get_config_manager()
             async with self.db_session_factory() as db:
-                configs = await config_manager.load_all_configs(db)
+                configs = await self._cfg.load_all_configs(db, keys=_CONFIG_KEYS)
                 return configs
         except Exception as e:
             logger.error(f"Error loading configs: {e}")
             return {}
 
-    async def save_all_configs(self, *args):
-        """Guardar todas las configuraciones."""
-        try:
-            config_manager = get_config_manager()
-
-            # Mapear args a config keys
-            config_keys = [
-                # Chatbot config
-                "system_prompt", "welcome_message", "payment_link", "response_delay_minutes",
-                "text_audio_ratio", "use_emojis", "tts_voice",
-                "multi_part_messages", "max_words_per_response",
-                # Producto/Servicio config
-                "product_name", "product_description", "product_features",
-                "product_benefits", "product_price", "product_target_audience"
-            ]
+    async def save_all_configs(self, request: gr.Request, *args):
+        """
+        Guardar todas las configuraciones.
 
-            configs = dict(zip(config_keys, args))
+        Gradio inyecta ``request`` por su anotación; ``args`` son los valores
+        de los inputs de save_btn.
 
+        Returns:
+            Tupla (mensaje de estado, id del guardado para save_result o None)
+        """
+        try:
+            # Mapear args a config keys (mismo orden que los inputs de save_btn)
+            configs = dict(zip(_CONFIG_KEYS, args, strict=True))
+        except ValueError as e:
+            logger.error(f"Error saving configs: {e}")
+            return f"❌ Error: {str(e)}", None
+
+        # Debounce por sesión: un clic dentro de la ventana espera, y solo se
+        # descarta si un clic posterior de la misma sesión envió los mismos valores
+        session_key = getattr(request, "session_hash", None)
+        session = self._save_sessions.get(session_key)
+        if session is None:
+            session = {"last": 0.0, "seq": 0, "configs": None}
+            self._save_sessions.set(session_key, session)
+
+        now = time.monotonic()
+        wait = SAVE_DEBOUNCE_SECONDS - (now - session["last"])
+        session["last"] = now
+        session["seq"] += 1
+        session["configs"] = configs
+        seq = session["seq"]
+        if wait > 0:
+            await asyncio.sleep(wait)
+            if seq != session["seq"] and session["configs"] == configs:
+                return "⏳ Guardado agrupado con un clic posterior", None
+
+        # La escritura sigue en segundo plano; save_result informa el resultado
+        save_id = next(self._save_ids)
+        self._save_tasks.set(save_id, asyncio.create_task(self._do_save(configs)))
+        return "💾 Guardando...", save_id
+
+    async def _do_save(self, configs):
+        """Escribir en la BD solo las configuraciones modificadas y devolver el estado."""
+        try:
             async with self.db_session_factory() as db:
-                await config_manager.save_all_configs(db, configs)
+                # Comparar con los valores actuales (normalmente desde la caché del manager)
+                current = await self._cfg.load_all_configs(db, keys=configs.keys())
+                changed = {key: value for key, value in configs.items() if current.get(key) != value}
+
+                if not changed:
+                    logger.info("Save skipped: no config changes")
+                    return "✅ Sin cambios que guardar"
+
+                await self._cfg.save_all_configs(db, changed)
 
-            logger.info("All configs saved successfully")
+            logger.info(f"Saved {len(changed)} changed config(s): {list(changed)}")
             return "✅ Configuración guardada exitosamente"
 
         except Exception as e:
             logger.error(f"Error saving configs: {e}")
             return f"❌ Error: {str(e)}"
 
-    async def upload_documents(self, files):
-        """Subir documentos al RAG."""
+    async def save_result(self, save_id: int | None):
+        """
+        Esperar el guardado lanzado por un clic y devolver su mensaje de estado.
+
+        Args:
+            save_id: Id devuelto por save_all_configs para ese clic (None si no guardó)
+        """
+        task = self._save_tasks.get(save_id) if save_id is not None else None
+        if task is None:
+            return gr.update()
+        return await asyncio.shield(task)
+
+    async def upload_documents(self, files, progress=gr.Progress(track_tqdm=True)):
+        """Subir documentos al RAG (en paralelo, con concurrencia limitada)."""
         if not files:
-            return "⚠️ No se seleccionaron archivos", self.get_rag_stats()
+            return gr.update(value="⚠️ No se seleccionaron archivos", visible=True), self.get_rag_stats()
 
         try:
-            rag_service = get_rag_service()
-
-            # Procesar cada archivo
-            uploaded_count = 0
-            total_chunks = 0
-
-            for file in files:
-                try:
-                    # El archivo ya está en una ubicación temporal
-                    file_path = file.name
-                    chunks = await rag_service.upload_document(file_path)
-                    total_chunks += chunks
-                    uploaded_count += 1
-                    logger.info(f"Uploaded {file_path}: {chunks} chunks")
-                except Exception as e:
-                    logger.error(f"Error uploading {file.name}: {e}")
-                    continue
+            sem = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+            done = 0
+            progress(0, desc="Procesando documentos...")
+
+            duplicates = 0
+            seen = set()
+
+            async def _one(file):
+                nonlocal done, duplicates
+                # El archivo ya está en una ubicación temporal
+                path = file if isinstance(file, str) else file.name
+                async with sem:
+                    try:
+                        digest = await asyncio.to_thread(_file_sha256, path)
+                        if digest in seen:
+                            duplicates += 1
+                            return _SKIPPED
+                        seen.add(digest)
+
+                        async with self.db_session_factory() as db:
+                            known = await crud.get_uploaded_document(db, digest)
+                        if known is not None:
+                            logger.info(f"Skipping {path}: already ingested as {known.path}")
+                            duplicates += 1
+                            return _SKIPPED
+
+                        progress(done / len(files), desc=f"Subiendo {Path(path).name}")
+                        chunks = await self._rag.upload_document(path)
+                        async with self.db_session_factory() as db:
+                            await crud.add_uploaded_document(db, digest, path, chunks)
+                        logger.info(f"Uploaded {path}: {chunks} chunks")
+                        return chunks
+                    except Exception as e:
+                        logger.error(f"Error uploading {path}: {e}")
+                        return None
+                    finally:
+                        done += 1
+                        progress(done / len(files), desc=f"{done}/{len(files)} documentos ({duplicates} duplicados)")
+
+            results = [
+                r for r in await asyncio.gather(*(_one(f) for f in files))
+                if r is not None and r is not _SKIPPED
+            ]
+            self._stats_cache = None
+            uploaded_count = len(results)
+            total_chunks = sum(results)
+            skipped = f" ({duplicates} duplicados omitidos)" if duplicates else ""
 
             if uploaded_count > 0:
-                return f"✅ {uploaded_count} archivo(s) subido(s) correctamente ({total_chunks} fragmentos)", self.get_rag_stats()
+                return gr.update(value=f"✅ {uploaded_count} archivo(s) subido(s) correctamente ({total_chunks} fragmentos){skipped}", visible=True), self.get_rag_stats()
+            elif duplicates:
+                return gr.update(value=f"ℹ️ Ningún archivo nuevo{skipped}", visible=True), self.get_rag_stats()
             else:
-                return "❌ No se pudo subir ningún archivo", self.get_rag_stats()
+                return gr.update(value="❌ No se pudo subir ningún archivo", visible=True), self.get_rag_stats()
 
         except Exception as e:
             logger.error(f"Error in upload_documents: {e}")
-            return f"❌ Error: {str(e)}", self.get_rag_stats()
+            return gr.update(value=f"❌ Error: {str(e)}", visible=True), self.get_rag_stats()
 
     def get_rag_stats(self):
-        """Obtener estadísticas del RAG."""
+        """Obtener estadísticas del RAG (cacheadas durante RAG_STATS_TTL_SECONDS)."""
+        if self._stats_cache and time.monotonic() - self._stats_cache[0] < RAG_STATS_TTL_SECONDS:
+            return self._stats_cache[1]
+
         try:
-            rag_service = get_rag_service()
-            stats = rag_service.get_collection_stats()
-            return f"📊 Fragmentos en base de datos: {stats['total_chunks']}"
+            stats = self._rag.get_collection_stats()
+            text = f"📊 Fragmentos en base de datos: {stats['total_chunks']}"
+            self._stats_cache = (time.monotonic(), text)
+            return text
         except Exception as e:
             logger.error(f"Error getting RAG stats: {e}")
             return "📊 Fragmentos en base de datos: 0"
 
+    async def get_rag_stats_async(self):
+        """Obtener estadísticas del RAG sin bloquear el event loop."""
+        return await asyncio.to_thread(self.get_rag_stats)
+
     async def preview_voice(self, voice_name: str):
-        """Preview TTS voice."""
+        """Preview TTS voice (muestra incluida o cacheada en disco por voz y texto)."""
         try:
-            from services.tts_service import get_tts_service
-            tts_service = get_tts_service()
-
-            # Sample text for preview
-            preview_text = "Hola, soy tu asistente virtual. Esta es una muestra de mi voz."
-
-            # Generate audio
-            audio_bytes = await tts_service.generate_audio(preview_text, voice=voice_name)
-
-            # Save temporarily
-            import tempfile
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-                tmp.write(audio_bytes)
-                tmp_path = tmp.name
+            bundled = VOICE_PREVIEW_ASSETS_DIR / f"{voice_name}.mp3"
+            if bundled.exists():
+                return str(bundled)
+
+            key = hashlib.sha256(f"{voice_name}|{PREVIEW_TEXT}".encode()).hexdigest()
+            path = self._preview_cache_dir / f"{key}.mp3"
+
+            if path.exists():
+                # Marcar como usado recientemente para la expulsión LRU
+                os.utime(path)
+                logger.debug(f"Voice preview cache hit for {voice_name}")
+                return str(path)
+
+            if self._tts is None:
+                self._tts = get_tts_service()
+
+            # Escribir el audio a medida que llega en un temporal propio de esta
+            # petición (dos muestras simultáneas de la misma voz no se mezclan);
+            # el reemplazo atómico evita servir un archivo a medio escribir
+            fd, tmp_path = tempfile.mkstemp(dir=self._preview_cache_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    async for chunk in self._tts.stream_audio(PREVIEW_TEXT, voice=voice_name):
+                        await f.write(chunk)
+                await aiofiles.os.replace(tmp_path, path)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+            self._evict_previews()
 
             logger.info(f"Generated voice preview for {voice_name}")
-            return tmp_path
+            return str(path)
 
         except Exception as e:
             logger.error(f"Error generating voice preview: {e}")
             return None
 
+    def _evict_previews(self):
+        """Borrar las muestras menos usadas recientemente por encima del límite."""
+        previews = sorted(self._preview_cache_dir.glob("*.mp3"), key=lambda p: p.stat().st_mtime)
+        for old in previews[:-PREVIEW_CACHE_MAX_FILES]:
+            old.unlink(missing_ok=True)
+
     async def clear_rag_collection(self):
         """Limpiar todos los documentos del RAG."""
         try:
-            rag_service = get_rag_service()
-            rag_service.clear_collection()
+            self._rag.clear_collection()
+            async with self.db_session_factory() as db:
+                await crud.clear_uploaded_documents(db)
+            self._stats_cache = None
             logger.info("RAG collection cleared")
-            return "✅ Base de conocimientos limpiada exitosamente", self.get_rag_stats()
+            return gr.update(value="✅ Base de conocimientos limpiada exitosamente", visible=True), self.get_rag_stats()
         except Exception as e:
             logger.error(f"Error clearing RAG collection: {e}")
-            return f"❌ Error: {str(e)}", self.get_rag_stats()
+            return gr.update(value=f"❌ Error: {str(e)}", visible=True), self.get_rag_stats()
 
     def create_component(self):
         """Crear componente UI con pestañas para Chatbot y Producto."""
@@ -222,7 +431,7 @@ class ConfigPanelComponentV2:
                     with gr.Row():
                         tts_voice = gr.Radio(
                             label="Voz TTS",
-                            choices=["alloy", "echo", "fable", "onyx", "nova", "shimmer"],
+                            choices=_VOICES,
                             value="nova",
                             info="Selecciona la voz para mensajes de audio"
                         )
@@ -277,97 +486,100 @@ class ConfigPanelComponentV2:
                         )
 
                 # Tab 3: Documentos RAG
-                with gr.Tab("📚 Base de Conocimientos"):
-                    gr.Markdown("### Documentos para el Chatbot")
-                    gr.Markdown("*Sube archivos con información sobre tu producto/servicio. El chatbot usará esta información para responder preguntas específicas.*")
-
-                    with gr.Row():
-                        with gr.Column(scale=2):
-                            gr.Markdown("**Formatos soportados:** TXT, PDF, DOC, DOCX")
-
-                            file_upload = gr.File(
-                                label="Subir Documentos",
-                                file_count="multiple",
-                                file_types=[".txt", ".pdf", ".doc", ".docx"],
-                                type="filepath"
-                            )
-
-                            upload_btn = gr.Button("📤 Subir Archivos", variant="primary")
-
-                        with gr.Column(scale=1):
-                            gr.Markdown("### ℹ️ Información")
-                            gr.Markdown("""
-                            **¿Qué puedes subir?**
-                            - Catálogos de productos
-                            - Manuales de usuario
-                            - FAQs
-                            - Guías de precios
-                            - Políticas y términos
-
-                            **¿Cómo funciona?**
-                            1. Sube tus documentos
-                            2. Activa RAG en Chatbot
-                            3. El bot usará automáticamente esta información
-                            """)
-
+                with gr.Tab("📚 Base de Conocimientos") as rag_tab:
+                    # Se rellena al abrir la pestaña, sin bloquear el render
                     rag_stats = gr.Textbox(
                         label="Estado",
-                        value=self.get_rag_stats(),
+                        value="📊 Cargando...",
                         interactive=False
                     )
+                    rag_tab.select(self.get_rag_stats_async, None, rag_stats)
 
-                    upload_status = gr.Textbox(
-                        label="Resultado de Carga",
-                        interactive=False,
-                        visible=False
-                    )
+                    # Contenido construido al abrir la pestaña (no en el render inicial)
+                    @gr.render(triggers=[rag_tab.select])
+                    def render_rag_tab():
+                        gr.Markdown("### Documentos para el Chatbot")
+                        gr.Markdown("*Sube archivos con información sobre tu producto/servicio. El chatbot usará esta información para responder preguntas específicas.*")
 
-                    gr.Markdown("---")
-                    gr.Markdown("### ⚠️ Zona de Peligro")
+                        with gr.Row():
+                            with gr.Column(scale=2):
+                                gr.Markdown("**Formatos soportados:** TXT, PDF, DOC, DOCX")
 
-                    with gr.Row():
-                        clear_btn = gr.Button("🗑️ Limpiar Base de Conocimientos", variant="stop", size="sm")
-                        clear_status = gr.Textbox(
-                            label="",
+                                file_upload = gr.File(
+                                    label="Subir Documentos",
+                                    file_count="multiple",
+                                    file_types=[".txt", ".pdf", ".doc", ".docx"],
+                                    type="filepath"
+                                )
+
+                                upload_btn = gr.Button("📤 Subir Archivos", variant="primary")
+
+                            with gr.Column(scale=1):
+                                gr.Markdown("### ℹ️ Información")
+                                gr.HTML(_RAG_HELP_HTML)
+
+                        upload_status = gr.Textbox(
+                            label="Resultado de Carga",
                             interactive=False,
-                            show_label=False,
                             visible=False
                         )
 
-                    # Conectar eventos RAG
-                    upload_btn.click(
-                        self.upload_documents,
-                        inputs=[file_upload],
-                        outputs=[upload_status, rag_stats]
-                    ).then(
-                        lambda: gr.update(visible=True),
-                        outputs=[upload_status]
-                    )
+                        gr.Markdown("---")
+                        gr.Markdown("### ⚠️ Zona de Peligro")
 
-                    clear_btn.click(
-                        self.clear_rag_collection,
-                        outputs=[clear_status, rag_stats]
-                    ).then(
-                        lambda: gr.update(visible=True),
-                        outputs=[clear_status]
-                    )
+                        with gr.Row():
+                            clear_btn = gr.Button("🗑️ Limpiar Base de Conocimientos", variant="stop", size="sm")
+                            clear_status = gr.Textbox(
+                                label="",
+                                interactive=False,
+                                show_label=False,
+                                visible=False
+                            )
+
+                        # Conectar eventos RAG
+                        upload_btn.click(
+                            self.upload_documents,
+                            inputs=[file_upload],
+                            outputs=[upload_status, rag_stats]
+                        )
+
+                        clear_btn.click(
+                            self.clear_rag_collection,
+                            outputs=[clear_status, rag_stats]
+                        )
 
             # Botón de guardar
             save_btn = gr.Button("💾 Guardar Configuración", variant="primary", size="lg")
             status_msg = gr.Textbox(label="Estado", interactive=False)
+            save_id_state = gr.State(None)
 
             # Conectar evento de guardar
+            config_inputs = {
+                # Chatbot config
+                "system_prompt": system_prompt,
+                "welcome_message": welcome_message,
+                "payment_link": payment_link,
+                "response_delay_minutes": response_delay,
+                "text_audio_ratio": text_audio_ratio,
+                "use_emojis": use_emojis,
+                "tts_voice": tts_voice,
+                "multi_part_messages": multi_part,
+                "max_words_per_response": max_words,
+                # Product config
+                "product_name": product_name,
+                "product_description": product_description,
+                "product_features": product_features,
+                "product_benefits": product_benefits,
+                "product_price": product_price,
+                "product_target_audience": product_target_audience,
+            }
             save_btn.click(
                 self.save_all_configs,
-                inputs=[
-                    # Chatbot config
-                    system_prompt, welcome_message, payment_link, response_delay,
-                    text_audio_ratio, use_emojis, tts_voice,
-                    multi_part, max_words,
-                    # Product config
-                    product_name, product_description, product_features,
-                    product_benefits, product_price, product_target_audience
-                ],
+                inputs=[config_inputs[key] for key in _CONFIG_KEYS],
+                outputs=[status_msg, save_id_state]
+            ).then(
+                self.save_result,
+                inputs=save_id_state,
                 outputs=status_msg
             )
 
@@ -1,16 +1,23 @@
 """Active conversations panel for Gradio UI."""
 
+import asyncio
 from typing import List, Tuple
 
 import gradio as gr
 
 from database import crud
+from database.changes import change_bus
+from database.engine import bounded_session
+from services.active_conversations import get_active_conversations_service
 from services.twilio_service import get_twilio_service
 from utils.helpers import format_timestamp
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Conversation mode with emoji, as shown in the table
+MODE_DISPLAY = {"AUTO": "🟢 AUTO", "MANUAL": "🔴 MANUAL", "NEEDS_ATTENTION": "⚠️ ATTENTION"}
+
 
 class ConversationsPanelComponent:
     """Component for managing active conversations and manual handoff."""
@@ -30,51 +37,63 @@ class ConversationsPanelComponent:
         """
         Get list of active conversations.
 
+        Served from the process-wide snapshot shared with the live chats panel,
+        so every open tab and overlapping refresh ticks share one database query.
+
         Returns:
             List of conversation rows [phone, mode, last_message, time]
         """
         try:
-            async with self.db_session_factory() as db:
-                users = await crud.get_all_active_users(db, limit=50)
-
-                if not users:
-                    return []
-
-                # Format for table display
-                rows = []
-                for user in users:
-                    # Format mode with emoji
-                    mode = user.conversation_mode
-                    if mode == "AUTO":
-                        mode_display = "🟢 AUTO"
-                    elif mode == "MANUAL":
-                        mode_display = "🔴 MANUAL"
-                    elif mode == "NEEDS_ATTENTION":
-                        mode_display = "⚠️ ATTENTION"
-                    else:
-                        mode_display = mode
-
-                    # Get last message
-                    messages = await crud.get_recent_messages(db, user.id, count=1)
-                    last_msg = messages[0].message_text[:50] + "..." if messages else "No messages"
-
-                    # Format time
-                    time_str = format_timestamp(user.last_message_at) if user.last_message_at else "N/A"
-
-                    rows.append([
-                        str(user.id),
-                        user.phone,
-                        user.name or "Unknown",
-                        mode_display,
-                        last_msg,
-                        time_str,
-                    ])
-
-                return rows
-
+            _, users = await get_active_conversations_service().snapshot(self.db_session_factory)
         except Exception as e:
             logger.error(f"Error getting active conversations: {e}")
             return []
+        return self._format_rows(users)
+
+    async def refresh_if_changed(self, seen_version: int):
+        """
+        Refresh the table only if users or messages changed since the last render.
+
+        Args:
+            seen_version: Change-bus version the table currently reflects
+
+        Returns:
+            Tuple of (table update, version now reflected)
+        """
+        current = change_bus.version("users")
+        if current == seen_version:
+            return gr.update(), seen_version
+
+        try:
+            version, users = await get_active_conversations_service().snapshot(
+                self.db_session_factory, min_version=current
+            )
+        except Exception as e:
+            logger.error(f"Error getting active conversations: {e}")
+            return gr.update(), seen_version
+        return self._format_rows(users), version
+
+    @staticmethod
+    def _format_rows(users) -> List[List[str]]:
+        """Format active-conversation rows (plain column tuples) for the table."""
+        rows = []
+        for user in users:
+            # Get last message
+            last_msg = user.last_message[:50] + "..." if user.last_message else "No messages"
+
+            # Format time
+            time_str = format_timestamp(user.last_message_at) if user.last_message_at else "N/A"
+
+            rows.append([
+                str(user.id),
+                user.phone,
+                user.name or "Unknown",
+                MODE_DISPLAY.get(user.conversation_mode, user.conversation_mode),
+                last_msg,
+                time_str,
+            ])
+
+        return rows
 
     async def take_control(self, selected_index: int, dataframe_data: List[List[str]]) -> Tuple[str, str]:
         """
@@ -98,10 +117,11 @@ class ConversationsPanelComponent:
             user_phone = dataframe_data[selected_index][1]
 
             # Update conversation mode to MANUAL
-            async with self.db_session_factory() as db:
-                user = await crud.update_user(db, user_id, conversation_mode="MANUAL")
+            async with bounded_session(self.db_session_factory) as db:
+                updated = await crud.set_conversation_mode(db, user_id, "MANUAL")
+                get_active_conversations_service().invalidate()
 
-                if user:
+                if updated:
                     self.selected_user_id = user_id
                     logger.info(f"Took manual control of conversation: {user_phone}")
                     return f"✅ You now have control of {user_phone}", user_phone
@@ -134,10 +154,11 @@ class ConversationsPanelComponent:
             user_phone = dataframe_data[selected_index][1]
 
             # Update conversation mode to AUTO
-            async with self.db_session_factory() as db:
-                user = await crud.update_user(db, user_id, conversation_mode="AUTO")
+            async with bounded_session(self.db_session_factory) as db:
+                updated = await crud.set_conversation_mode(db, user_id, "AUTO")
+                get_active_conversations_service().invalidate()
 
-                if user:
+                if updated:
                     self.selected_user_id = None
                     logger.info(f"Returned conversation to bot: {user_phone}")
                     return f"✅ {user_phone} is now in AUTO mode"
@@ -167,11 +188,15 @@ class ConversationsPanelComponent:
 
         try:
             twilio_service = get_twilio_service()
-            result = twilio_service.send_message(phone, message)
+            # Blocking HTTP call runs in a thread while the user is looked up
+            send_task = asyncio.create_task(
+                asyncio.to_thread(twilio_service.send_message, phone, message)
+            )
 
-            # Save message to database
-            async with self.db_session_factory() as db:
+            # Save message to database once Twilio accepted it
+            async with bounded_session(self.db_session_factory) as db:
                 user = await crud.get_user_by_phone(db, phone)
+                result = await send_task
                 if user:
                     await crud.create_message(
                         db,
@@ -205,12 +230,19 @@ class ConversationsPanelComponent:
                 label="Active Conversations",
                 interactive=False,
                 wrap=True,
-                every=3,  # Auto-refresh every 3 seconds
             )
 
             # Populate initial data
             conversations_df.value = self.get_active_conversations
 
+            # Every 3 seconds, re-query only if the data changed (no DB hit when idle)
+            seen_version = gr.State(value=-1)
+            gr.Timer(value=3).tick(
+                self.refresh_if_changed,
+                seen_version,
+                [conversations_df, seen_version],
+            )
+
             # Control buttons
             with gr.Row():
                 take_control_btn = gr.Button("🎮 Take Control", variant="primary")
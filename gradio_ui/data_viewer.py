@@ -2,11 +2,15 @@
 
 import gradio as gr
 
+from utils.cache import AsyncTTLCache
 from utils.helpers import calculate_intent_emoji, calculate_sentiment_emoji
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Seconds a composed state snapshot is shared by every open viewer
+STATE_REFRESH_SECONDS = 2.0
+
 
 class DataViewerComponent:
     """Component for displaying real-time conversation data."""
@@ -19,6 +23,7 @@ class DataViewerComponent:
             chat_component: Reference to chat component to get state
         """
         self.chat_component = chat_component
+        self._snapshot = AsyncTTLCache(STATE_REFRESH_SECONDS)
         logger.info("Data viewer component initialized")
 
     def get_current_state(self) -> dict:
@@ -62,6 +67,22 @@ class DataViewerComponent:
             logger.error(f"Error getting current state: {e}")
             return {"error": str(e)}
 
+    async def _latest_state(self) -> dict:
+        """
+        Get the shared state snapshot, recomposed at most once per STATE_REFRESH_SECONDS.
+
+        Every viewer reads the same snapshot, so the state is composed once
+        per interval regardless of how many tabs are open, and not at all
+        once none are polling.
+
+        Returns:
+            Dict with formatted state data
+        """
+        async def compose() -> dict:
+            return self.get_current_state()
+
+        return await self._snapshot.get(compose)
+
     def create_component(self) -> gr.Column:
         """
         Create the data viewer UI component.
@@ -73,11 +94,10 @@ class DataViewerComponent:
             gr.Markdown("## 📊 Real-Time Data Viewer")
             gr.Markdown("Live conversation state and metrics")
 
-            # JSON display with auto-refresh
+            # JSON display (refreshed by the timer below)
             json_display = gr.JSON(
-                value=self.get_current_state,
+                value=self._latest_state,
                 label="Current State",
-                every=2,  # Refresh every 2 seconds
             )
 
             # Visual metrics
@@ -99,23 +119,24 @@ class DataViewerComponent:
                 interactive=False,
             )
 
-            # Update function for metrics
-            def update_metrics():
-                state = self.get_current_state()
+            # Update function for the JSON and the metrics
+            async def update_metrics():
+                state = await self._latest_state()
                 return (
+                    state,
                     state.get("intent_score", "0.00"),
                     state.get("sentiment", "neutral"),
                     state.get("stage", "N/A"),
                 )
 
-            # Auto-refresh metrics
+            # Auto-refresh everything with one poll per tab
             gr.Timer(
-                value=2,  # 2 seconds
+                value=STATE_REFRESH_SECONDS,
                 active=True,
             ).tick(
                 update_metrics,
                 None,
-                [intent_gauge, sentiment_box, stage_box],
+                [json_display, intent_gauge, sentiment_box, stage_box],
             )
 
         return col
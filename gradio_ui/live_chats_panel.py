@@ -3,15 +3,61 @@
 from typing import List, Dict, Optional, Tuple
 import gradio as gr
 import asyncio
+import html
 from datetime import datetime
+from string import Template
 
 from database import crud
+from database.changes import change_bus
+from database.engine import bounded_session
+from services.active_conversations import get_active_conversations_service
 from services.twilio_service import get_twilio_service
 from utils.helpers import format_timestamp
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Modo de conversacion: emoji de la lista y etiqueta de la ficha (otro modo => ⚠️)
+MODE_INDICATOR = {"AUTO": "🟢", "MANUAL": "🔴"}
+MODE_DISPLAY = {"AUTO": "🟢 Automatico", "MANUAL": "🔴 Manual"}
+
+# Rol de Gradio por remitente; cualquier otro remitente se muestra como "assistant"
+_ROLES = {"user": "user"}
+
+# Plantilla de cada item de la lista, compilada una sola vez
+_ITEM_TMPL = Template(
+    '<div style="padding: 12px; border-bottom: 1px solid #e0e0e0; cursor: pointer; $style">'
+    '<div style="display: flex; justify-content: space-between;">'
+    '<span style="font-size: 16px;">$mode $name</span>'
+    '<span style="font-size: 12px; color: #666;">$time</span>'
+    '</div>'
+    '<div style="font-size: 14px; color: #666; margin-top: 4px;">$preview</div>'
+    '</div>'
+)
+
+
+def _to_chat_messages(messages) -> List[Dict]:
+    """Convertir mensajes de BD a formato Gradio chatbot (todo lo que no es "user" es el bot)."""
+    return [
+        {"role": _ROLES.get(msg.sender, "assistant"), "content": msg.message_text}
+        for msg in messages
+    ]
+
+
+def _error_html(error: Exception) -> str:
+    """HTML de error para la lista de conversaciones."""
+    return f"<div style='padding: 20px; color: red;'>Error: {html.escape(str(error))}</div>"
+
+
+async def _send_via_twilio(phone: str, message: str) -> None:
+    """Enviar por Twilio en un hilo si esta configurado; los fallos solo se registran."""
+    try:
+        twilio_service = get_twilio_service()
+        if twilio_service:
+            await asyncio.to_thread(twilio_service.send_message, phone, message)
+    except Exception as e:
+        logger.warning(f"Twilio no disponible: {e}")
+
 
 class LiveChatsPanel:
     """Panel de chats en vivo estilo WhatsApp Web."""
@@ -32,21 +78,13 @@ class LiveChatsPanel:
         Formatear item de conversacion para la lista.
 
         Args:
-            user: Objeto User
+            user: Objeto User o fila con name, phone, conversation_mode y last_message_at
             last_message: Ultimo mensaje
             unread: Si tiene mensajes sin leer
 
         Returns:
             HTML formateado
         """
-        # Indicator de modo
-        if user.conversation_mode == "AUTO":
-            mode_indicator = "🟢"
-        elif user.conversation_mode == "MANUAL":
-            mode_indicator = "🔴"
-        else:
-            mode_indicator = "⚠️"
-
         # Nombre o telefono
         display_name = user.name or user.phone
 
@@ -58,45 +96,63 @@ class LiveChatsPanel:
 
         style = "font-weight: bold;" if unread else ""
 
-        return f"""
-        <div style="padding: 12px; border-bottom: 1px solid #e0e0e0; cursor: pointer; {style}">
-            <div style="display: flex; justify-content: space-between;">
-                <span style="font-size: 16px;">{mode_indicator} {display_name}</span>
-                <span style="font-size: 12px; color: #666;">{time_str}</span>
-            </div>
-            <div style="font-size: 14px; color: #666; margin-top: 4px;">
-                {msg_preview}
-            </div>
-        </div>
-        """
+        return _ITEM_TMPL.substitute(
+            style=style,
+            mode=MODE_INDICATOR.get(user.conversation_mode, "⚠️"),
+            name=html.escape(display_name),
+            time=time_str,
+            preview=html.escape(msg_preview),
+        )
 
     async def get_conversations_list(self) -> str:
         """
         Obtener lista de conversaciones activas.
 
+        Se sirve desde la instantanea compartida con el panel de conversaciones,
+        por lo que todas las pestañas abiertas comparten una sola consulta.
+
         Returns:
             HTML con la lista de conversaciones
         """
         try:
-            async with self.db_session_factory() as db:
-                users = await crud.get_all_active_users(db, limit=50)
-
-                if not users:
-                    return "<div style='padding: 20px; text-align: center; color: #999;'>No hay conversaciones activas</div>"
+            _, users = await get_active_conversations_service().snapshot(self.db_session_factory)
+        except Exception as e:
+            logger.error(f"Error obteniendo lista de conversaciones: {e}")
+            return _error_html(e)
+        return self._render_list(users)
 
-                html_parts = []
-                for user in users:
-                    # Obtener ultimo mensaje
-                    messages = await crud.get_recent_messages(db, user.id, count=1)
-                    last_msg = messages[0].message_text if messages else "Sin mensajes"
+    async def refresh_if_changed(self, seen_version: int):
+        """
+        Refrescar la lista solo si cambiaron usuarios o mensajes desde el ultimo render.
 
-                    html_parts.append(self.format_conversation_item(user, last_msg))
+        Args:
+            seen_version: Version del change bus que refleja la lista actual
 
-                return "".join(html_parts)
+        Returns:
+            Tupla (update de la lista, version reflejada)
+        """
+        current = change_bus.version("users")
+        if current == seen_version:
+            return gr.update(), seen_version
 
+        try:
+            version, users = await get_active_conversations_service().snapshot(
+                self.db_session_factory, min_version=current
+            )
         except Exception as e:
             logger.error(f"Error obteniendo lista de conversaciones: {e}")
-            return f"<div style='padding: 20px; color: red;'>Error: {str(e)}</div>"
+            return _error_html(e), seen_version
+        return self._render_list(users), version
+
+    def _render_list(self, users) -> str:
+        """Generar el HTML de la lista a partir de filas simples (columnas del usuario + ultimo mensaje)."""
+        if not users:
+            return "<div style='padding: 20px; text-align: center; color: #999;'>No hay conversaciones activas</div>"
+
+        return "".join(
+            self.format_conversation_item(user, user.last_message or "Sin mensajes")
+            for user in users
+        )
 
     async def get_conversation_messages(self, user_id: int) -> List[Dict]:
         """
@@ -109,24 +165,10 @@ class LiveChatsPanel:
             Lista de mensajes en formato Gradio
         """
         try:
-            async with self.db_session_factory() as db:
+            async with bounded_session(self.db_session_factory) as db:
                 messages = await crud.get_user_messages(db, user_id, limit=100)
 
-                # Convertir a formato Gradio chatbot
-                formatted_messages = []
-                for msg in messages:
-                    if msg.sender == "user":
-                        formatted_messages.append({
-                            "role": "user",
-                            "content": msg.message_text
-                        })
-                    else:
-                        formatted_messages.append({
-                            "role": "assistant",
-                            "content": msg.message_text
-                        })
-
-                return formatted_messages
+                return _to_chat_messages(messages)
 
         except Exception as e:
             logger.error(f"Error obteniendo mensajes: {e}")
@@ -143,19 +185,13 @@ class LiveChatsPanel:
             HTML con info del usuario
         """
         try:
-            async with self.db_session_factory() as db:
+            async with bounded_session(self.db_session_factory) as db:
                 user = await crud.get_user_by_id(db, user_id)
 
                 if not user:
                     return "Usuario no encontrado"
 
-                # Modo
-                if user.conversation_mode == "AUTO":
-                    mode_display = "🟢 Automatico"
-                elif user.conversation_mode == "MANUAL":
-                    mode_display = "🔴 Manual"
-                else:
-                    mode_display = "⚠️ Necesita Atencion"
+                mode_display = MODE_DISPLAY.get(user.conversation_mode, "⚠️ Necesita Atencion")
 
                 return f"""
                 <div style="padding: 16px; background: #f5f5f5; border-radius: 8px;">
@@ -187,19 +223,14 @@ class LiveChatsPanel:
             return "Por favor ingresa un mensaje", []
 
         try:
-            async with self.db_session_factory() as db:
+            async with bounded_session(self.db_session_factory) as db:
                 user = await crud.get_user_by_id(db, user_id)
 
                 if not user:
                     return "Usuario no encontrado", []
 
-                # Enviar via Twilio si esta configurado
-                try:
-                    twilio_service = get_twilio_service()
-                    if twilio_service:
-                        twilio_service.send_message(user.phone, message)
-                except Exception as e:
-                    logger.warning(f"Twilio no disponible: {e}")
+                # Twilio (HTTP bloqueante) corre en un hilo mientras se guarda el mensaje
+                send_task = asyncio.create_task(_send_via_twilio(user.phone, message))
 
                 # Guardar en BD
                 await crud.create_message(
@@ -210,8 +241,10 @@ class LiveChatsPanel:
                     metadata={"manual": True, "timestamp": datetime.utcnow().isoformat()},
                 )
 
-                # Obtener historial actualizado
-                updated_history = await self.get_conversation_messages(user_id)
+                # Historial actualizado con la misma sesion
+                updated_history = _to_chat_messages(await crud.get_user_messages(db, user_id, limit=100))
+
+                await send_task
 
                 logger.info(f"Mensaje manual enviado a usuario {user_id}")
                 return "✅ Mensaje enviado", updated_history
@@ -231,15 +264,14 @@ class LiveChatsPanel:
             Mensaje de estado
         """
         try:
-            async with self.db_session_factory() as db:
-                user = await crud.get_user_by_id(db, user_id)
+            async with bounded_session(self.db_session_factory) as db:
+                # Alternar modo (un solo UPDATE ... RETURNING)
+                new_mode = await crud.toggle_conversation_mode(db, user_id)
 
-                if not user:
+                if new_mode is None:
                     return "Usuario no encontrado"
 
-                # Alternar modo
-                new_mode = "MANUAL" if user.conversation_mode == "AUTO" else "AUTO"
-                await crud.update_user(db, user_id, conversation_mode=new_mode)
+                get_active_conversations_service().invalidate()
 
                 if new_mode == "MANUAL":
                     return "🔴 Modo MANUAL activado - El bot no respondera"
@@ -266,8 +298,7 @@ class LiveChatsPanel:
                     gr.Markdown("### Chats Activos")
 
                     conversations_html = gr.HTML(
-                        value=lambda: asyncio.run(self.get_conversations_list()),
-                        every=5,  # Auto-refresh cada 5 segundos
+                        value=self.get_conversations_list,
                         label="Conversaciones",
                     )
 
@@ -308,6 +339,14 @@ class LiveChatsPanel:
             # Estado: usuario seleccionado
             selected_user_id_state = gr.State(value=None)
 
+            # Cada 5 segundos, solo se regenera la lista si hubo cambios (sin consultas en reposo)
+            seen_version = gr.State(value=-1)
+            gr.Timer(value=5).tick(
+                self.refresh_if_changed,
+                seen_version,
+                [conversations_html, seen_version],
+            )
+
             # Handlers - Gradio soporta async nativamente
             # Refresh conversaciones
             refresh_btn.click(
@@ -1,11 +1,16 @@
 """LangGraph nodes for sales conversation workflow."""
 
+import asyncio
+import hashlib
+import re
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Any, Dict, Optional
 
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
-from graph.state import ConversationState
+from database import crud
+from database.engine import create_session_factory
+from graph.state import ConfigView, ConversationState
 from services.llm_service import get_llm_service
 from services.rag_service import get_rag_service
 from services.hubspot_sync import get_hubspot_service
@@ -19,16 +24,93 @@ logger = get_logger(__name__)
 # ============================================================================
 
 
+# Phrases asking to talk to a human (substring match, one compiled pass per message)
+HUMAN_REQUEST_RE = re.compile(
+    r"humano|persona|supervisor|agente|operador|hablar con (?:alguien|un|una)|asistente real",
+    re.IGNORECASE,
+)
+
+# Whole messages with an unambiguous buying / leaving intent, classified without
+# the analysis LLM call (compared after lowercasing and dropping punctuation;
+# anything else, e.g. "¿aceptan tarjeta?" or "pago mañana", goes to the LLM)
+HIGH_INTENT_PHRASES = frozenset({
+    "quiero pagar", "quiero pagar ya", "quiero comprar", "quiero comprarlo",
+    "lo compro", "lo quiero", "listo quiero pagar", "listo lo compro",
+})
+LOW_INTENT_PHRASES = frozenset({
+    "no gracias", "no por ahora", "mañana te aviso", "luego te aviso",
+    "después te aviso", "despues te aviso", "lo voy a pensar", "lo pienso",
+})
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+# User-turn sentiments kept in state (two negatives in a row trigger handoff)
+SENTIMENT_HISTORY_LEN = 4
+
+# Most recent messages sent to the response LLM; older turns are only
+# represented by the conversation summary
+HISTORY_WINDOW = 10
+
+# Config fields the enhanced system prompt is built from
+_PROMPT_FIELDS = (
+    "system_prompt", "product_name", "product_description", "product_features",
+    "product_benefits", "product_price", "product_target_audience",
+)
+
+# Built prompts keyed by a hash of _PROMPT_FIELDS (one entry per config version)
+_PROMPT_CACHE: Dict[str, str] = {}
+_PROMPT_CACHE_MAX = 64
+
+
 def build_enhanced_system_prompt(config: Dict[str, Any]) -> str:
     """
     Build an enhanced system prompt that includes product/service information.
 
+    The result is memoized per distinct set of prompt fields, so every turn
+    sharing a config reuses the identical string (and LLM prompt prefix).
+
     Args:
         config: Configuration dictionary with system_prompt and product info
 
     Returns:
         Enhanced system prompt string or None if not configured
     """
+    raw = "\x1f".join(str(config.get(field, "")) for field in _PROMPT_FIELDS)
+    key = hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    if key in _PROMPT_CACHE:
+        return _PROMPT_CACHE[key]
+
+    prompt = _build_enhanced_system_prompt(config)
+    if len(_PROMPT_CACHE) >= _PROMPT_CACHE_MAX:
+        _PROMPT_CACHE.clear()
+    _PROMPT_CACHE[key] = prompt
+    return prompt
+
+
+def build_config_view(config: Dict[str, Any]) -> ConfigView:
+    """
+    Resolve the config values used by the nodes.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        ConfigView with the enhanced system prompt and per-node settings
+    """
+    return ConfigView(
+        enhanced_prompt=build_enhanced_system_prompt(config),
+        use_emojis=config.get("use_emojis", True),
+        product_name=config.get("product_name"),
+        payment_link=config.get("payment_link"),
+    )
+
+
+def _config_view(state: Dict[str, Any]) -> ConfigView:
+    """Get the turn's config view, building it if the state lacks one."""
+    return state.get("config_view") or build_config_view(state["config"])
+
+
+def _build_enhanced_system_prompt(config: Dict[str, Any]) -> str:
+    """Build the enhanced system prompt (uncached)."""
     base_prompt = config.get("system_prompt", "").strip()
 
     # If no base prompt, return None to signal configuration error
@@ -76,6 +158,46 @@ def build_enhanced_system_prompt(config: Dict[str, Any]) -> str:
     return enhanced_prompt
 
 
+def _last_user_message(state: ConversationState):
+    """Get the content of the latest HumanMessage, or None if there is none."""
+    # Set once when the message is ingested; scan only for states built without it
+    if state.get("last_user_message") is not None:
+        return state["last_user_message"]
+    for m in reversed(state["messages"]):
+        if isinstance(m, HumanMessage):
+            return m.content
+    return None
+
+
+def _user_message_count(state: ConversationState) -> int:
+    """
+    Get the number of HumanMessages in the state.
+
+    Uses the count set at ingestion; for states built without it, counts
+    until the second HumanMessage (callers only distinguish 0, 1 and "2+").
+    """
+    if state.get("user_message_count") is not None:
+        return state["user_message_count"]
+    count = 0
+    for m in state["messages"]:
+        if isinstance(m, HumanMessage):
+            count += 1
+            if count > 1:
+                break
+    return count
+
+
+# Background tasks (HubSpot syncs) kept referenced until they finish
+_BACKGROUND_TASKS: set = set()
+
+
+def _run_in_background(coro) -> None:
+    """Schedule a coroutine without awaiting it, keeping a reference until done."""
+    task = asyncio.create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
 # ============================================================================
 # NODE 1: WELCOME
 # ============================================================================
@@ -91,8 +213,7 @@ async def welcome_node(state: ConversationState) -> Dict[str, Any]:
     logger.info("Executing welcome_node")
 
     # Check if this is first message
-    user_messages = [m for m in state["messages"] if isinstance(m, HumanMessage)]
-    if len(user_messages) <= 1:
+    if _user_message_count(state) <= 1:
         # Validate configuration is set
         welcome_message = state["config"].get("welcome_message", "").strip()
         system_prompt = state["config"].get("system_prompt", "").strip()
@@ -112,8 +233,9 @@ async def welcome_node(state: ConversationState) -> Dict[str, Any]:
             logger.warning("No welcome_message configured, using fallback")
 
         # Add initial questions to start conversation
-        product_name = state["config"].get("product_name", "nuestros servicios")
-        use_emojis = state["config"].get("use_emojis", True)
+        config_view = _config_view(state)
+        product_name = config_view.product_name or "nuestros servicios"
+        use_emojis = config_view.use_emojis
 
         # Build complete welcome with questions
         if use_emojis:
@@ -133,186 +255,226 @@ async def welcome_node(state: ConversationState) -> Dict[str, Any]:
 
 
 # ============================================================================
-# NODE 2: INTENT CLASSIFIER
+# STATE UPDATE HELPERS
 # ============================================================================
 
 
-async def intent_classifier_node(state: ConversationState) -> Dict[str, Any]:
+def build_transcript(messages: list) -> str:
     """
-    Classify user intent and update intent score.
+    Render the conversation as "Cliente: ..." / "Bot: ..." lines.
 
-    Runs on EVERY turn. Uses GPT-4o-mini for efficiency.
+    Args:
+        messages: Conversation messages
+
+    Returns:
+        Transcript text (other message types are skipped)
     """
-    logger.info("Executing intent_classifier_node")
+    lines = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            lines.append(f"Cliente: {msg.content}")
+        elif isinstance(msg, AIMessage):
+            lines.append(f"Bot: {msg.content}")
+    return "\n".join(lines)
 
-    llm_service = get_llm_service()
 
-    # Get last user message
-    user_messages = [m for m in state["messages"] if isinstance(m, HumanMessage)]
-    if not user_messages:
-        return {}
+def _sentiment_updates(state: ConversationState, sentiment: str) -> Dict[str, Any]:
+    """Build the state updates for a sentiment, flagging handoff on repeated negativity."""
+    history = (state.get("sentiment_history") or [])[-(SENTIMENT_HISTORY_LEN - 1):] + [sentiment]
+    updates = {"sentiment": sentiment, "sentiment_history": history}
 
-    last_message = user_messages[-1].content
+    # If negative and previous was also negative, trigger handoff
+    if history[-2:] == ["negative", "negative"]:
+        logger.warning("Multiple negative sentiments detected, will trigger handoff")
+        updates["conversation_mode"] = "NEEDS_ATTENTION"
 
-    # Classify intent
-    intent_data = await llm_service.classify_intent(last_message, state["messages"])
+    return updates
 
-    logger.info(f"Intent: {intent_data['category']}, Score: {intent_data['score']}")
 
-    return {
-        "intent_score": intent_data["score"],
-    }
+def _collected_data_updates(state: ConversationState, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge newly extracted data into the collected data and build the state updates."""
+    logger.info(f"Extracted data: {extracted_data}")
 
+    # Merge with existing collected data
+    collected_data = state.get("collected_data", {})
+    collected_data.update(extracted_data)
 
-# ============================================================================
-# NODE 3: SENTIMENT ANALYZER
-# ============================================================================
+    # Update user_name and user_email in state if found
+    updates = {"collected_data": collected_data}
+
+    # Always update name and email if newly extracted (allows user to correct/update)
+    if "name" in extracted_data:
+        updates["user_name"] = extracted_data["name"]
+
+    if "email" in extracted_data:
+        updates["user_email"] = extracted_data["email"]
+
+    return updates
 
 
-async def sentiment_analyzer_node(state: ConversationState) -> Dict[str, Any]:
+def _schedule_hubspot_sync(state: Dict[str, Any]) -> None:
     """
-    Analyze sentiment of user's message.
+    Sync the contact to HubSpot in the background, if HubSpot is enabled.
 
-    Runs on EVERY turn. Uses GPT-4o-mini for efficiency.
-    Triggers handoff if negative sentiment persists.
+    Args:
+        state: Conversation state with this turn's updates already applied
     """
-    logger.info("Executing sentiment_analyzer_node")
+    hubspot_service = get_hubspot_service()
+    if hubspot_service.enabled:
+        _run_in_background(_sync_hubspot(hubspot_service, state))
 
-    llm_service = get_llm_service()
 
-    # Get last user message
-    user_messages = [m for m in state["messages"] if isinstance(m, HumanMessage)]
-    if not user_messages:
-        return {}
+async def _sync_hubspot(hubspot_service, state: Dict[str, Any]) -> None:
+    """Push the collected data to HubSpot and record the contact on the DB user."""
+    collected_data = state.get("collected_data", {})
 
-    last_message = user_messages[-1].content
+    # Generate incremental notes from collected data
+    notes_parts = []
 
-    # Analyze sentiment
-    sentiment = await llm_service.analyze_sentiment(last_message)
+    # Add collected data to notes
+    if collected_data.get("needs"):
+        notes_parts.append(f"Necesidades: {collected_data['needs']}")
+    if collected_data.get("pain_points"):
+        notes_parts.append(f"Pain Points: {collected_data['pain_points']}")
+    if collected_data.get("budget"):
+        notes_parts.append(f"Presupuesto: {collected_data['budget']}")
 
-    logger.info(f"Sentiment: {sentiment}")
+    # Add current stage and sentiment
+    current_stage = state.get("stage", "unknown")
+    current_sentiment = state.get("sentiment", "neutral")
+    notes_parts.append(f"Etapa: {current_stage} | Sentimiento: {current_sentiment}")
 
-    # Check for consecutive negative sentiments
-    updates = {"sentiment": sentiment}
+    # Use existing summary if available, otherwise use generated notes
+    conversation_notes = state.get("conversation_summary") or " | ".join(notes_parts)
 
-    # If negative and previous was also negative, trigger handoff
-    if sentiment == "negative":
-        # Count recent negative sentiments
-        recent_messages = state["messages"][-4:]  # Last 4 messages
-        negative_count = sum(
-            1
-            for m in recent_messages
-            if isinstance(m, HumanMessage) and getattr(m, "metadata", {}).get("sentiment") == "negative"
-        )
+    user_data = {
+        "phone": state["user_phone"],
+        "name": state.get("user_name"),
+        "email": state.get("user_email"),
+        "needs": collected_data.get("needs"),
+        "pain_points": collected_data.get("pain_points"),
+        "budget": collected_data.get("budget"),
+        "intent_score": state.get("intent_score"),
+        "sentiment": state.get("sentiment"),
+        "stage": state.get("stage"),
+        "conversation_summary": conversation_notes,
+    }
+    try:
+        # Get db_user from state if available
+        db_user = state.get("db_user")
+        result = await hubspot_service.sync_contact(user_data, db_user=db_user)
 
-        if negative_count >= 2:
-            logger.warning("Multiple negative sentiments detected, will trigger handoff")
-            updates["conversation_mode"] = "NEEDS_ATTENTION"
+        # Update our DB with HubSpot contact_id and lifecyclestage
+        if result and db_user:
+            await _save_hubspot_result(state.get("db_session"), db_user.id, result)
+            logger.info(f"✅ Updated DB with HubSpot data: {result['action']} contact {result['contact_id']}")
 
-    return updates
+    except Exception as e:
+        logger.error(f"HubSpot sync failed (non-blocking): {e}")
+        import traceback
+        traceback.print_exc()
+
+
+async def _save_hubspot_result(db_session, user_id: int, result: Dict[str, Any]) -> None:
+    """
+    Store the HubSpot contact on the user through a fresh session.
+
+    The sync runs in the background, after the turn's session has committed
+    or closed, so the result cannot ride on that session (or its ORM objects).
+
+    Args:
+        db_session: The turn's session, used only for its engine
+        user_id: User's ID
+        result: sync_contact result
+    """
+    engine = getattr(db_session, "bind", None)
+    if engine is None:
+        logger.warning("No DB session in state, HubSpot contact not stored")
+        return
+
+    async with create_session_factory(engine)() as db:
+        await crud.update_user(
+            db,
+            user_id,
+            hubspot_contact_id=result["contact_id"],
+            hubspot_lifecyclestage=result["lifecyclestage"],
+            hubspot_synced_at=result["synced_at"],
+        )
 
 
 # ============================================================================
-# NODE 4: DATA COLLECTOR
+# NODE 2: ANALYSIS (intent + sentiment + data collection, one LLM call)
 # ============================================================================
 
 
-async def data_collector_node(state: ConversationState) -> Dict[str, Any]:
+def _keyword_analysis(message: str) -> Optional[Dict[str, Any]]:
     """
-    Extract structured data from user messages.
+    Classify messages that are exactly an obvious buying or leaving phrase.
 
-    Uses GPT-4o-mini with structured output.
-    Does NOT block the sale waiting for complete data.
-    """
-    logger.info("Executing data_collector_node")
+    Questions never match, and since the whole message must be a known phrase
+    there is no name, email or other data left to extract.
 
-    llm_service = get_llm_service()
+    Args:
+        message: User's message
 
-    # Get last user message
-    user_messages = [m for m in state["messages"] if isinstance(m, HumanMessage)]
-    if not user_messages:
-        return {}
+    Returns:
+        Analysis in the analyze_turn format, or None if the LLM is needed
+    """
+    if "?" in message or "¿" in message:
+        return None
 
-    last_message = user_messages[-1].content
+    phrase = " ".join(_PUNCTUATION_RE.sub(" ", message.lower()).split())
+    if phrase in HIGH_INTENT_PHRASES:
+        intent = {"category": "ready_to_buy", "score": 0.95}
+    elif phrase in LOW_INTENT_PHRASES:
+        intent = {"category": "leaving", "score": 0.1}
+    else:
+        return None
 
-    # Extract data
-    extracted_data = await llm_service.extract_data(last_message, state["messages"])
+    return {"intent": intent, "sentiment": "neutral", "extracted_data": {}}
 
-    if extracted_data:
-        logger.info(f"Extracted data: {extracted_data}")
 
-        # Merge with existing collected data
-        collected_data = state.get("collected_data", {})
-        collected_data.update(extracted_data)
+async def analysis_node(state: ConversationState) -> Dict[str, Any]:
+    """
+    Run intent classification, sentiment analysis and data extraction at once.
 
-        # Update user_name and user_email in state if found
-        updates = {"collected_data": collected_data}
+    A single structured GPT-4o-mini call (llm_service.analyze_turn) returns all
+    three analyses, skipped for messages that are exactly a known phrase
+    ("quiero pagar", "mañana te aviso"). Updates the intent score, sentiment
+    history (flagging handoff on repeated negativity) and collected data.
+    """
+    logger.info("Executing analysis_node")
 
-        # Always update name and email if newly extracted (allows user to correct/update)
-        if "name" in extracted_data:
-            updates["user_name"] = extracted_data["name"]
+    # Get last user message
+    last_message = _last_user_message(state)
+    if last_message is None:
+        return {}
 
-        if "email" in extracted_data:
-            updates["user_email"] = extracted_data["email"]
+    analysis = _keyword_analysis(last_message)
+    if analysis is None:
+        llm_service = get_llm_service()
+        analysis = await llm_service.analyze_turn(last_message, state["messages"])
+    intent_data = analysis["intent"]
+    sentiment = analysis["sentiment"]
+    extracted_data = analysis["extracted_data"]
 
-        # Async sync to HubSpot (non-blocking)
-        hubspot_service = get_hubspot_service()
-        if hubspot_service.enabled:
-            # Generate incremental notes from collected data
-            notes_parts = []
-
-            # Add collected data to notes
-            if collected_data.get("needs"):
-                notes_parts.append(f"Necesidades: {collected_data['needs']}")
-            if collected_data.get("pain_points"):
-                notes_parts.append(f"Pain Points: {collected_data['pain_points']}")
-            if collected_data.get("budget"):
-                notes_parts.append(f"Presupuesto: {collected_data['budget']}")
-
-            # Add current stage and sentiment
-            current_stage = state.get("stage", "unknown")
-            current_sentiment = state.get("sentiment", "neutral")
-            notes_parts.append(f"Etapa: {current_stage} | Sentimiento: {current_sentiment}")
-
-            # Use existing summary if available, otherwise use generated notes
-            conversation_notes = state.get("conversation_summary") or " | ".join(notes_parts)
-
-            user_data = {
-                "phone": state["user_phone"],
-                "name": state.get("user_name"),
-                "email": state.get("user_email"),
-                "needs": collected_data.get("needs"),
-                "pain_points": collected_data.get("pain_points"),
-                "budget": collected_data.get("budget"),
-                "intent_score": state.get("intent_score"),
-                "sentiment": state.get("sentiment"),
-                "stage": state.get("stage"),
-                "conversation_summary": conversation_notes,
-            }
-            try:
-                # Get db_user from state if available
-                db_user = state.get("db_user")
-                result = await hubspot_service.sync_contact(user_data, db_user=db_user)
+    logger.info(f"Intent: {intent_data['category']}, Score: {intent_data['score']}")
+    logger.info(f"Sentiment: {sentiment}")
 
-                # Update our DB with HubSpot contact_id and lifecyclestage
-                if result and db_user:
-                    db_user.hubspot_contact_id = result["contact_id"]
-                    db_user.hubspot_lifecyclestage = result["lifecyclestage"]
-                    db_user.hubspot_synced_at = result["synced_at"]
-                    logger.info(f"✅ Updated DB with HubSpot data: {result['action']} contact {result['contact_id']}")
+    updates: Dict[str, Any] = {"intent_score": intent_data["score"]}
+    updates.update(_sentiment_updates(state, sentiment))
 
-            except Exception as e:
-                logger.error(f"HubSpot sync failed (non-blocking): {e}")
-                import traceback
-                traceback.print_exc()
+    if extracted_data:
+        updates.update(_collected_data_updates(state, extracted_data))
 
-        return updates
+        # Async sync to HubSpot (non-blocking), with this turn's intent and sentiment
+        _schedule_hubspot_sync({**state, **updates})
 
-    return {}
+    return updates
 
 
 # ============================================================================
-# NODE 5: ROUTER
+# NODE 3: ROUTER
 # ============================================================================
 
 
@@ -324,7 +486,8 @@ def router_node(state: ConversationState) -> str:
     Returns the name of the next node to execute.
 
     Routing logic:
-    - If conversation_mode is NEEDS_ATTENTION → handoff_node
+    - If conversation_mode is NEEDS_ATTENTION (set by the analysis on
+      consecutive negative sentiments) → handoff_node
     - If intent_score > 0.8 → closing_node
     - If stage == 'closing' and not payment_link_sent → payment_node
     - If user wants to leave / come back later → follow_up_node
@@ -337,17 +500,6 @@ def router_node(state: ConversationState) -> str:
         logger.info("Routing to handoff_node (NEEDS_ATTENTION)")
         return "handoff"
 
-    # Check if negative sentiment triggered handoff
-    if state.get("sentiment") == "negative":
-        # Check if this should trigger handoff
-        user_messages = [m for m in state["messages"] if isinstance(m, HumanMessage)]
-        if len(user_messages) >= 2:
-            # If last 2 messages were negative, go to handoff
-            recent_sentiments = [state.get("sentiment")]  # Current
-            if len(recent_sentiments) >= 2 and all(s == "negative" for s in recent_sentiments[-2:]):
-                logger.info("Routing to handoff_node (negative sentiment)")
-                return "handoff"
-
     # Check high intent score
     intent_score = state.get("intent_score", 0.0)
     if intent_score > 0.8:
@@ -370,10 +522,31 @@ def router_node(state: ConversationState) -> str:
 
 
 # ============================================================================
-# NODE 6: CONVERSATION
+# NODE 4: CONVERSATION
 # ============================================================================
 
 
+def _windowed_history(state: Dict[str, Any]) -> list:
+    """
+    Get the history to send to the response LLM.
+
+    Keeps the last HISTORY_WINDOW messages and, when a conversation summary
+    exists, prepends it so earlier turns are not lost entirely. The prompt
+    size therefore stays bounded however long the conversation gets.
+
+    Args:
+        state: Conversation state
+
+    Returns:
+        List of messages
+    """
+    windowed = list(state["messages"][-HISTORY_WINDOW:])
+    summary = state.get("conversation_summary")
+    if summary and len(state["messages"]) > HISTORY_WINDOW:
+        windowed.insert(0, SystemMessage(content=f"Resumen previo: {summary}"))
+    return windowed
+
+
 async def conversation_node(state: ConversationState) -> Dict[str, Any]:
     """
     Generate main conversational response.
@@ -388,7 +561,8 @@ async def conversation_node(state: ConversationState) -> Dict[str, Any]:
     rag_service = get_rag_service()
 
     # Get configuration with enhanced product context
-    enhanced_prompt = build_enhanced_system_prompt(state["config"])
+    config_view = _config_view(state)
+    enhanced_prompt = config_view.enhanced_prompt
 
     # Check if configuration is missing
     if enhanced_prompt is None:
@@ -399,23 +573,20 @@ async def conversation_node(state: ConversationState) -> Dict[str, Any]:
             "stage": "error",
         }
 
-    use_emojis = state["config"].get("use_emojis", True)
+    use_emojis = config_view.use_emojis
 
     # Auto-enable RAG if there are documents in the collection
     rag_stats = rag_service.get_collection_stats()
     rag_enabled = rag_stats['total_chunks'] > 0
 
     # Get last user message for RAG
-    user_messages = [m for m in state["messages"] if isinstance(m, HumanMessage)]
-    last_message = user_messages[-1].content if user_messages else ""
+    last_message = _last_user_message(state) or ""
 
     # Check if user is requesting to speak with a human
-    human_request_keywords = ["humano", "persona", "supervisor", "agente", "operador", "hablar con alguien", "hablar con un", "hablar con una", "asistente real", "persona real"]
-    last_message_lower = last_message.lower()
-    if any(keyword in last_message_lower for keyword in human_request_keywords):
+    if HUMAN_REQUEST_RE.search(last_message):
         logger.info("Human request detected - triggering handoff")
         # Get product name for personalized response
-        product_name = state["config"].get("product_name", "nuestros servicios")
+        product_name = config_view.product_name or "nuestros servicios"
         handoff_response = f"¡Claro que sí! 😊 Dame unos minutos para avisar a mi supervisor. Mientras tanto, ¿te gustaría saber más sobre {product_name}?"
 
         return {
@@ -436,7 +607,7 @@ async def conversation_node(state: ConversationState) -> Dict[str, Any]:
 
     # Generate response with product-aware prompt
     response = await llm_service.generate_response(
-        messages=state["messages"],
+        messages=_windowed_history(state),
         system_prompt=enhanced_prompt,
         use_emojis=use_emojis,
         rag_context=rag_context,
@@ -457,7 +628,7 @@ async def conversation_node(state: ConversationState) -> Dict[str, Any]:
 
 
 # ============================================================================
-# NODE 7: CLOSING
+# NODE 5: CLOSING
 # ============================================================================
 
 
@@ -485,7 +656,7 @@ async def closing_node(state: ConversationState) -> Dict[str, Any]:
 
 
 # ============================================================================
-# NODE 8: PAYMENT
+# NODE 6: PAYMENT
 # ============================================================================
 
 
@@ -499,14 +670,16 @@ async def payment_node(state: ConversationState) -> Dict[str, Any]:
     logger.info("Executing payment_node")
 
     llm_service = get_llm_service()
-    payment_link = state["config"].get("payment_link", "https://example.com/pay")
+    config_view = _config_view(state)
+    payment_link = config_view.payment_link or "https://example.com/pay"
 
     # Build product context for closing message
-    product_name = state["config"].get("product_name", "nuestro producto")
+    product_name = config_view.product_name or "nuestro producto"
 
     # Generate closing message with payment link
     user_data = {
-        "name": state.get("user_name", "there"),
+        "name": state.get("user_name"),
+        "phone": state.get("user_phone"),
         "product_name": product_name,
     }
 
@@ -520,7 +693,7 @@ async def payment_node(state: ConversationState) -> Dict[str, Any]:
 
 
 # ============================================================================
-# NODE 9: FOLLOW-UP
+# NODE 7: FOLLOW-UP
 # ============================================================================
 
 
@@ -566,7 +739,7 @@ async def follow_up_node(state: ConversationState) -> Dict[str, Any]:
 
 
 # ============================================================================
-# NODE 10: HANDOFF
+# NODE 8: HANDOFF
 # ============================================================================
 
 
@@ -580,7 +753,7 @@ async def handoff_node(state: ConversationState) -> Dict[str, Any]:
     logger.info("Executing handoff_node - User requested human assistance")
 
     # Get product name for personalized response
-    product_name = state["config"].get("product_name", "nuestros servicios")
+    product_name = _config_view(state).product_name or "nuestros servicios"
 
     response = f"¡Claro que sí! 😊 Dame unos minutos para avisar a mi supervisor. Mientras tanto, ¿te gustaría saber más sobre {product_name}?"
 
@@ -592,7 +765,7 @@ async def handoff_node(state: ConversationState) -> Dict[str, Any]:
 
 
 # ============================================================================
-# NODE 11: CONVERSATION SUMMARY
+# NODE 9: CONVERSATION SUMMARY
 # ============================================================================
 
 
@@ -607,15 +780,8 @@ async def summary_node(state: ConversationState) -> Dict[str, Any]:
     llm_service = get_llm_service()
     hubspot_service = get_hubspot_service()
 
-    # Build conversation text
-    conversation_text = []
-    for msg in state["messages"]:
-        if isinstance(msg, HumanMessage):
-            conversation_text.append(f"Cliente: {msg.content}")
-        elif isinstance(msg, AIMessage):
-            conversation_text.append(f"Bot: {msg.content}")
-
-    full_conversation = "\n".join(conversation_text)
+    # Conversation text (built only here: most turns never reach this node)
+    full_conversation = build_transcript(state["messages"])
 
     # Generate summary
     summary_prompt = f"""Genera un resumen conciso de esta conversación de ventas.
@@ -653,11 +819,9 @@ Genera SOLO el resumen en formato de párrafo conciso (máximo 150 palabras)."""
             "stage": state.get("stage", "unknown"),
         }
 
-        try:
-            await hubspot_service.sync_contact(user_data)
-            logger.info(f"Summary synced to HubSpot for {user_phone}")
-        except Exception as e:
-            logger.warning(f"Failed to sync to HubSpot: {e}")
+        # Non-blocking: the summary is returned without waiting for HubSpot
+        if hubspot_service.enabled:
+            _run_in_background(_safe_sync_summary(hubspot_service, user_data))
 
         return {
             "conversation_summary": summary,
@@ -669,3 +833,12 @@ Genera SOLO el resumen en formato de párrafo conciso (máximo 150 palabras)."""
         return {
             "conversation_summary": "Error al generar resumen",
         }
+
+
+async def _safe_sync_summary(hubspot_service, user_data: Dict[str, Any]) -> None:
+    """Sync a conversation summary to HubSpot, logging instead of raising on failure."""
+    try:
+        await hubspot_service.sync_contact(user_data)
+        logger.info(f"Summary synced to HubSpot for {user_data['phone']}")
+    except Exception as e:
+        logger.warning(f"Failed to sync to HubSpot: {e}")
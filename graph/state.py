@@ -1,12 +1,21 @@
 """Conversation state definition for LangGraph."""
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional
 
 from langchain_core.messages import BaseMessage
 from typing_extensions import TypedDict
 
 
+class ConfigView(NamedTuple):
+    """Config values the nodes need, resolved once per turn."""
+
+    enhanced_prompt: Optional[str]  # None when the bot is not configured
+    use_emojis: bool
+    product_name: Optional[str]
+    payment_link: Optional[str]
+
+
 class ConversationState(TypedDict):
     """
     State object for the sales conversation graph.
@@ -16,6 +25,8 @@ class ConversationState(TypedDict):
 
     # Message history
     messages: List[BaseMessage]
+    user_message_count: int  # HumanMessages in `messages`, counted once at ingestion
+    last_user_message: Optional[str]  # Content of the newest HumanMessage, set at ingestion
 
     # User identification
     user_phone: str
@@ -25,6 +36,7 @@ class ConversationState(TypedDict):
     # Conversation analysis (updated continuously)
     intent_score: float  # 0-1 scale, how likely user is to buy
     sentiment: str  # positive/neutral/negative
+    sentiment_history: List[str]  # Sentiments of the last SENTIMENT_HISTORY_LEN user turns, oldest first
     stage: str  # welcome/qualifying/nurturing/closing/sold/follow_up
 
     # Conversation control
@@ -46,6 +58,7 @@ class ConversationState(TypedDict):
 
     # Configuration (loaded from DB/Gradio)
     config: Dict[str, Any]
+    config_view: ConfigView  # Derived from `config` at ingestion
 
     # Database session reference (for CRUD operations within nodes)
     db_session: Optional[Any]
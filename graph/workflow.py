@@ -1,15 +1,14 @@
 """LangGraph workflow compilation and execution."""
 
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from langgraph.graph import StateGraph, END
 
 from graph.state import ConversationState
 from graph.nodes import (
+    build_config_view,
     welcome_node,
-    intent_classifier_node,
-    sentiment_analyzer_node,
-    data_collector_node,
+    analysis_node,
     router_node,
     conversation_node,
     closing_node,
@@ -29,16 +28,15 @@ def create_sales_graph():
 
     Flow:
     1. welcome_node (if first message)
-    2. intent_classifier_node (always)
-    3. sentiment_analyzer_node (always)
-    4. data_collector_node (always)
-    5. router_node (decides next step)
+    2. analysis_node (always): intent, sentiment and data extraction
+       from one structured LLM call (skipped for exact keyword phrases)
+    3. router_node (decides next step)
         → conversation_node (default)
         → closing_node (high intent)
         → payment_node (ready to pay)
         → follow_up_node (leaving)
         → handoff_node (needs attention)
-    6. END
+    4. END
 
     Returns:
         Compiled StateGraph
@@ -50,9 +48,7 @@ def create_sales_graph():
 
     # Add all nodes
     workflow.add_node("welcome", welcome_node)
-    workflow.add_node("intent_classifier", intent_classifier_node)
-    workflow.add_node("sentiment_analyzer", sentiment_analyzer_node)
-    workflow.add_node("data_collector", data_collector_node)
+    workflow.add_node("analysis", analysis_node)
     workflow.add_node("conversation", conversation_node)
     workflow.add_node("closing", closing_node)
     workflow.add_node("payment", payment_node)
@@ -63,14 +59,12 @@ def create_sales_graph():
     # Set entry point
     workflow.set_entry_point("welcome")
 
-    # Define edges (sequential analysis pipeline)
-    workflow.add_edge("welcome", "intent_classifier")
-    workflow.add_edge("intent_classifier", "sentiment_analyzer")
-    workflow.add_edge("sentiment_analyzer", "data_collector")
+    # Define edges (intent, sentiment and data extraction share one analysis call)
+    workflow.add_edge("welcome", "analysis")
 
-    # Conditional routing from data_collector
+    # Conditional routing from analysis
     workflow.add_conditional_edges(
-        "data_collector",
+        "analysis",
         router_node,  # Router function determines next node
         {
             "conversation": "conversation",
@@ -97,6 +91,13 @@ def create_sales_graph():
     return graph
 
 
+# Nodes whose LLM tokens are user-facing and can be streamed
+STREAMING_NODES = ("conversation",)
+
+# Response returned when the graph fails to execute
+FALLBACK_RESPONSE = "I apologize, I'm having trouble responding right now. Could you please try again?"
+
+
 # Global graph instance
 sales_graph = None
 
@@ -116,6 +117,7 @@ async def process_message(
     config: Dict[str, Any],
     db_session: Any = None,
     db_user: Any = None,
+    sentiment_history: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """
     Process a user message through the sales graph.
@@ -127,36 +129,21 @@ async def process_message(
         config: Configuration dict
         db_session: Database session for CRUD operations
         db_user: Database User object (for HubSpot sync)
+        sentiment_history: Sentiments of the previous user turns, oldest first
+            (defaults to the sentiment stored on ``db_user``)
 
     Returns:
         Updated state dict with response
     """
     logger.info(f"Processing message from {user_phone}")
 
-    from langchain_core.messages import HumanMessage
-
     # Get graph
     graph = get_sales_graph()
 
     # Prepare initial state
-    initial_state: ConversationState = {
-        "messages": conversation_history + [HumanMessage(content=message)],
-        "user_phone": user_phone,
-        "user_name": None,  # Will be populated from DB or extracted
-        "user_email": None,
-        "intent_score": 0.0,
-        "sentiment": "neutral",
-        "stage": "welcome",
-        "conversation_mode": "AUTO",
-        "collected_data": {},
-        "payment_link_sent": False,
-        "follow_up_scheduled": None,
-        "follow_up_count": 0,
-        "current_response": None,
-        "config": config,
-        "db_session": db_session,
-        "db_user": db_user,  # Pass user object for HubSpot sync
-    }
+    initial_state = _build_initial_state(
+        user_phone, message, conversation_history, config, db_session, db_user, sentiment_history
+    )
 
     try:
         # Execute graph
@@ -173,5 +160,107 @@ async def process_message(
         # Return fallback response
         return {
             **initial_state,
-            "current_response": "I apologize, I'm having trouble responding right now. Could you please try again?",
+            "current_response": FALLBACK_RESPONSE,
+        }
+
+
+async def process_message_stream(
+    user_phone: str,
+    message: str,
+    conversation_history: list,
+    config: Dict[str, Any],
+    db_session: Any = None,
+    db_user: Any = None,
+    sentiment_history: Optional[List[str]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Process a user message through the sales graph, streaming the reply.
+
+    Tokens are only emitted for nodes in STREAMING_NODES; the final event
+    always carries the complete state, whose ``current_response`` is the
+    authoritative reply (e.g. after multi-part formatting).
+
+    Args:
+        user_phone: User's phone number
+        message: User's message text
+        conversation_history: List of previous messages (BaseMessage objects)
+        config: Configuration dict
+        db_session: Database session for CRUD operations
+        db_user: Database User object (for HubSpot sync)
+        sentiment_history: Sentiments of the previous user turns, oldest first
+            (defaults to the sentiment stored on ``db_user``)
+
+    Yields:
+        {"type": "token", "content": str} for each generated token, then
+        {"type": "final", "state": dict} once the graph has finished
+    """
+    logger.info(f"Streaming message from {user_phone}")
+
+    graph = get_sales_graph()
+    initial_state = _build_initial_state(
+        user_phone, message, conversation_history, config, db_session, db_user, sentiment_history
+    )
+    final_state: Dict[str, Any] = initial_state
+
+    try:
+        async for mode, payload in graph.astream(initial_state, stream_mode=["messages", "values"]):
+            if mode == "messages":
+                chunk, metadata = payload
+                if metadata.get("langgraph_node") in STREAMING_NODES and chunk.content:
+                    yield {"type": "token", "content": chunk.content}
+            else:
+                final_state = payload
+
+        logger.info("Graph streaming completed successfully")
+
+    except Exception as e:
+        import traceback
+        logger.error(f"Error streaming graph: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        final_state = {
+            **initial_state,
+            "current_response": FALLBACK_RESPONSE,
         }
+
+    yield {"type": "final", "state": final_state}
+
+
+def _build_initial_state(
+    user_phone: str,
+    message: str,
+    conversation_history: list,
+    config: Dict[str, Any],
+    db_session: Any,
+    db_user: Any,
+    sentiment_history: Optional[List[str]] = None,
+) -> ConversationState:
+    """Build the graph input state for a new user message."""
+    from langchain_core.messages import HumanMessage
+
+    if sentiment_history is None:
+        previous = getattr(db_user, "sentiment", None)
+        sentiment_history = [previous] if previous else []
+
+    return {
+        "messages": conversation_history + [HumanMessage(content=message)],
+        "user_message_count": sum(isinstance(m, HumanMessage) for m in conversation_history) + 1,
+        "last_user_message": message,
+        "user_phone": user_phone,
+        "user_name": None,  # Will be populated from DB or extracted
+        "user_email": None,
+        "intent_score": 0.0,
+        "sentiment": "neutral",
+        "sentiment_history": list(sentiment_history),
+        "stage": "welcome",
+        "conversation_mode": "AUTO",
+        "collected_data": {},
+        "payment_link_sent": False,
+        "follow_up_scheduled": None,
+        "follow_up_count": 0,
+        "conversation_summary": getattr(db_user, "conversation_summary", None),
+        "current_response": None,
+        "config": config,
+        "config_view": build_config_view(config),
+        "db_session": db_session,
+        "db_user": db_user,  # Pass user object for HubSpot sync
+    }
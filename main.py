@@ -13,13 +13,17 @@ from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import gradio as gr
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
 
+from database.engine import create_engine, create_session_factory
 from database.models import Base
+from graph.workflow import get_sales_graph
+from services import hubspot_sync
+from services._http import close_http_client
+from services.llm_service import get_llm_service
+from services.rag_service import get_rag_service
 from whatsapp_webhook import handle_whatsapp_webhook
 from utils.logging_config import setup_logging, get_logger
 
@@ -32,8 +36,8 @@ logger = get_logger(__name__)
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./sales_bot.db")
-engine = create_async_engine(DATABASE_URL, echo=False)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+engine = create_engine(DATABASE_URL)
+AsyncSessionLocal = create_session_factory(engine)
 
 
 @asynccontextmanager
@@ -48,10 +52,23 @@ async def lifespan(app: FastAPI):
 
     logger.info("Database initialized")
 
+    # Compile the graph and build the services now, so the first webhook
+    # request does not pay for it
+    try:
+        app.state.sales_graph = get_sales_graph()
+        app.state.llm_service = get_llm_service()
+        app.state.rag_service = get_rag_service()
+        logger.info("Sales graph and services warmed up")
+    except Exception as e:
+        logger.warning(f"Could not warm up graph/services: {e}")
+
     yield
 
     # Shutdown
     logger.info("Shutting down application...")
+    await close_http_client()
+    if hubspot_sync.hubspot_service is not None:
+        await hubspot_sync.hubspot_service.aclose()
 
 
 # Create FastAPI app
@@ -60,6 +77,8 @@ app = FastAPI(
     description="Webhook + UI for WhatsApp AI Sales Bot",
     version="1.1.0",
     lifespan=lifespan,
+    # orjson is already a Gradio dependency; use it for our endpoints too
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -79,22 +98,12 @@ async def whatsapp_webhook(request: Request):
     Method: POST
     """
     result = await handle_whatsapp_webhook(request, AsyncSessionLocal)
-    return JSONResponse(content=result)
-
-
-# Import Gradio demo from app.py
-# Note: We import at module level to avoid running demo.launch()
-import sys
-import importlib.util
+    return ORJSONResponse(content=result)
 
-# Load app.py without executing the __main__ block
-spec = importlib.util.spec_from_file_location("app_module", "app.py")
-app_module = importlib.util.module_from_spec(spec)
-sys.modules["app_module"] = app_module
-spec.loader.exec_module(app_module)
 
-# Get the demo instance
-demo = app_module.demo
+# Import Gradio demo from app.py (its demo.launch() is under a __main__ guard;
+# a regular import also reuses the cached bytecode on cold starts)
+from app import demo  # noqa: E402
 
 logger.info("Gradio UI loaded successfully")
 
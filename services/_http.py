@@ -0,0 +1,43 @@
+"""Shared HTTP client for outbound API calls."""
+
+from functools import lru_cache
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables httpx's HTTP/2 transport)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Keep-alive pool shared by the OpenAI-backed services (LLM, embeddings, TTS)
+HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+HTTP_TIMEOUT_SECONDS = 30
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide async HTTP client.
+
+    Reusing one client keeps TCP/TLS connections alive across requests
+    instead of paying a new handshake per service instance. With HTTP/2
+    (when ``h2`` is installed) concurrent calls to the same API are
+    multiplexed over a single connection.
+
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=HTTP_LIMITS,
+        timeout=HTTP_TIMEOUT_SECONDS,
+        follow_redirects=True,
+    )
+
+
+async def close_http_client() -> None:
+    """Close the shared client (on shutdown); a later call creates a new one."""
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
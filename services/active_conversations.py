@@ -0,0 +1,71 @@
+"""Shared snapshot of active conversations for the UI panels."""
+
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import sessionmaker
+
+from database import crud
+from database.changes import change_bus
+from database.engine import bounded_session
+from utils.cache import AsyncTTLCache
+
+# Conversations listed by the panels, and how long one query result is reused
+ACTIVE_CONVERSATIONS_LIMIT = 50
+SNAPSHOT_TTL_SECONDS = 2.0
+
+
+class ActiveConversationsService:
+    """Single TTL'd query of active users and their last message, shared by every panel."""
+
+    def __init__(self, ttl: float = SNAPSHOT_TTL_SECONDS, limit: int = ACTIVE_CONVERSATIONS_LIMIT):
+        """
+        Initialize the service.
+
+        Args:
+            ttl: Seconds a snapshot is reused
+            limit: Maximum number of conversations per snapshot
+        """
+        self.limit = limit
+        self._cache = AsyncTTLCache(ttl)
+
+    async def snapshot(self, db_session_factory: sessionmaker, min_version: int = 0) -> Tuple[int, List]:
+        """
+        Get the active conversations, querying at most once per TTL.
+
+        Args:
+            db_session_factory: Session factory used if a query is needed
+            min_version: Oldest acceptable "users" change-bus version; an older
+                cached snapshot is discarded and re-queried
+
+        Returns:
+            Tuple of (change-bus version read before the query, list of rows
+            from ``crud.get_active_users_compact``)
+        """
+        async def fetch() -> Tuple[int, List]:
+            version = change_bus.version("users")
+            async with bounded_session(db_session_factory) as db:
+                rows = await crud.get_active_users_compact(db, limit=self.limit)
+            return version, rows
+
+        version, rows = await self._cache.get(fetch)
+        if version < min_version:
+            # Cached snapshot predates a change the caller knows about
+            self._cache.invalidate()
+            version, rows = await self._cache.get(fetch)
+        return version, rows
+
+    def invalidate(self) -> None:
+        """Force the next snapshot to query the database."""
+        self._cache.invalidate()
+
+
+# Global instance
+active_conversations_service: Optional[ActiveConversationsService] = None
+
+
+def get_active_conversations_service() -> ActiveConversationsService:
+    """Get the global active conversations service instance."""
+    global active_conversations_service
+    if active_conversations_service is None:
+        active_conversations_service = ActiveConversationsService()
+    return active_conversations_service
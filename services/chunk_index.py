@@ -0,0 +1,88 @@
+"""In-memory matrix of RAG chunk embeddings for exact top-k search."""
+
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ChunkIndex:
+    """Brute-force cosine search over every chunk: one mat-vec per query.
+
+    For the few thousand chunks of product docs and FAQs this is faster
+    than a vector DB round trip and, being exact, needs no index tuning.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.enabled = NUMPY_AVAILABLE
+        # ((N, dim) float32 unit vectors, N chunk texts), swapped as one
+        # attribute so a search never pairs a matrix with another load's texts
+        self._data: Optional[Tuple["np.ndarray", List[str]]] = None
+
+        if not self.enabled:
+            logger.warning("numpy not available. In-memory chunk index disabled.")
+
+    def load(self, embeddings: Sequence[Sequence[float]], documents: Sequence[str]) -> None:
+        """
+        Replace the indexed chunks.
+
+        Args:
+            embeddings: One embedding per chunk
+            documents: Chunk texts, in the same order as ``embeddings``
+        """
+        if not self.enabled:
+            return
+
+        if len(documents) == 0:
+            self.clear()
+            return
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._data = (matrix / norms, list(documents))
+        logger.info(f"Chunk index loaded with {len(documents)} chunks")
+
+    def search(self, embedding: Sequence[float], k: int) -> List[str]:
+        """
+        Find the chunks most similar to a query.
+
+        Args:
+            embedding: Query embedding
+            k: Number of chunks to return
+
+        Returns:
+            Up to ``k`` chunk texts, most similar first
+        """
+        data = self._data
+        if not self.enabled or data is None or k <= 0:
+            return []
+        matrix, documents = data
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = matrix @ query
+        k = min(k, len(documents))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [documents[i] for i in top]
+
+    def clear(self) -> None:
+        """Drop every chunk."""
+        self._data = None
+
+    def __len__(self) -> int:
+        """Number of indexed chunks."""
+        data = self._data
+        return len(data[1]) if data is not None else 0
@@ -1,6 +1,7 @@
 """Configuration manager for loading and saving application settings."""
 
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, Iterable, Optional, Set
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -40,15 +41,24 @@ class ConfigManager:
         "closing_prompt": "",
     }
 
+    # Seconds a full config snapshot is served from memory before re-reading the DB
+    CACHE_TTL_SECONDS = 30
+
     def __init__(self):
         """Initialize configuration manager."""
         self._cache: Dict[str, Any] = {}
+        self._missing: Set[str] = set()  # Keys load_config found absent from the DB
+        self._all_cache: Dict[str, Any] = {"value": None, "expires": 0.0}
         logger.info("Config manager initialized")
 
     async def load_config(self, db: AsyncSession, key: str, default: Any = None) -> Any:
         """
         Load a configuration value.
 
+        Keys missing from the database are remembered, so they are not
+        queried again until the key is saved or the cache is cleared; the
+        default is still resolved per call.
+
         Args:
             db: Database session
             key: Configuration key
@@ -61,18 +71,18 @@ class ConfigManager:
         if key in self._cache:
             return self._cache[key]
 
-        # Load from database
-        value = await crud.get_config(db, key)
-
-        if value is None:
-            # Use default or fall back to DEFAULT_CONFIG
-            value = default if default is not None else self.DEFAULT_CONFIG.get(key)
-            logger.info(f"Config '{key}' not found, using default: {value}")
-        else:
-            logger.info(f"Loaded config '{key}': {value}")
-
-        # Cache it
-        self._cache[key] = value
+        if key not in self._missing:
+            # Load from database
+            value = await crud.get_config(db, key)
+            if value is not None:
+                logger.info(f"Loaded config '{key}': {value}")
+                self._cache[key] = value
+                return value
+            self._missing.add(key)
+
+        # Use default or fall back to DEFAULT_CONFIG
+        value = default if default is not None else self.DEFAULT_CONFIG.get(key)
+        logger.info(f"Config '{key}' not found, using default: {value}")
         return value
 
     async def save_config(self, db: AsyncSession, key: str, value: Any) -> None:
@@ -86,18 +96,44 @@ class ConfigManager:
         """
         await crud.set_config(db, key, value)
         self._cache[key] = value
+        self._missing.discard(key)
+        self.invalidate_cache()
         logger.info(f"Saved config '{key}': {value}")
 
-    async def load_all_configs(self, db: AsyncSession) -> Dict[str, Any]:
+    async def load_all_configs(
+        self, db: AsyncSession, keys: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
         """
         Load all configuration values.
 
+        Results are served from memory for CACHE_TTL_SECONDS; saving any
+        config through this manager invalidates the cached snapshot.
+
         Args:
             db: Database session
+            keys: Optional subset of keys; on a cold cache they are fetched
+                with a single ``IN`` query without refreshing the full snapshot
 
         Returns:
-            Dict of all configurations
+            Dict of all configurations (or of the requested keys)
         """
+        cache_valid = self._all_cache["value"] is not None and time.monotonic() < self._all_cache["expires"]
+
+        if keys is not None:
+            keys = list(keys)
+            if cache_valid:
+                snapshot = self._all_cache["value"]
+                return {key: snapshot.get(key, self.DEFAULT_CONFIG.get(key)) for key in keys}
+
+            configs = await crud.get_all_configs(db, keys=keys)
+            for key in keys:
+                if key not in configs:
+                    configs[key] = self.DEFAULT_CONFIG.get(key)
+            return configs
+
+        if cache_valid:
+            return dict(self._all_cache["value"])
+
         configs = await crud.get_all_configs(db)
 
         # Merge with defaults (defaults for missing keys)
@@ -105,12 +141,19 @@ class ConfigManager:
             if key not in configs:
                 configs[key] = value
 
-        # Update cache
-        self._cache = configs.copy()
+        self._store_snapshot(configs)
 
         logger.info(f"Loaded {len(configs)} configurations")
         return configs
 
+    def _store_snapshot(self, configs: Dict[str, Any]) -> None:
+        """Cache a full config snapshot (DEFAULT_CONFIG already merged)."""
+        self._cache = configs.copy()
+        self._all_cache = {
+            "value": configs.copy(),
+            "expires": time.monotonic() + self.CACHE_TTL_SECONDS,
+        }
+
     async def save_all_configs(self, db: AsyncSession, configs: Dict[str, Any]) -> None:
         """
         Save multiple configurations.
@@ -119,8 +162,10 @@ class ConfigManager:
             db: Database session
             configs: Dict of configurations to save
         """
-        for key, value in configs.items():
-            await self.save_config(db, key, value)
+        await crud.bulk_set_configs(db, configs)
+        self._cache.update(configs)
+        self._missing.difference_update(configs)
+        self.invalidate_cache()
 
         logger.info(f"Saved {len(configs)} configurations")
 
@@ -137,26 +182,35 @@ class ConfigManager:
         """
         return self._cache.get(key, default)
 
+    def invalidate_cache(self) -> None:
+        """Drop the cached config snapshot so the next load hits the database."""
+        self._all_cache = {"value": None, "expires": 0.0}
+
     def clear_cache(self) -> None:
         """Clear the configuration cache."""
         self._cache.clear()
+        self._missing.clear()
+        self.invalidate_cache()
         logger.info("Config cache cleared")
 
     async def initialize_defaults(self, db: AsyncSession) -> None:
         """
         Initialize default configurations in database if they don't exist.
 
+        Reads the stored configs once, inserts the missing defaults in a
+        single statement and caches the result as the full snapshot.
+
         Args:
             db: Database session
         """
-        for key, value in self.DEFAULT_CONFIG.items():
-            existing = await crud.get_config(db, key)
-            if existing is None:
-                await crud.set_config(db, key, value)
-                logger.info(f"Initialized default config '{key}': {value}")
+        existing = await crud.get_all_configs(db)
+        missing = {key: value for key, value in self.DEFAULT_CONFIG.items() if key not in existing}
+
+        if missing:
+            await crud.bulk_set_configs(db, missing, only_missing=True)
+            logger.info(f"Initialized {len(missing)} default configs: {list(missing)}")
 
-        # Load all into cache
-        await self.load_all_configs(db)
+        self._store_snapshot({**self.DEFAULT_CONFIG, **existing})
 
 
 # Global instance (will be initialized in app.py)
@@ -1,15 +1,37 @@
 """HubSpot CRM synchronization service."""
 
+import asyncio
 import os
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-import requests
+import httpx
 
+from utils.cache import TTLCache
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Contact properties returned by searches (phone tells phone matches from
+# email matches; the rest are compared before updating)
+SEARCH_PROPERTIES = ["phone", "email", "firstname", "lastname", "lifecyclestage"]
+
+# Contacts fetched or found by search are reused for this long (a chatty
+# conversation syncs the same contact every few turns)
+CONTACT_CACHE_SIZE = 1024
+CONTACT_CACHE_TTL_SECONDS = 300
+
+# Keep-alive pool for HubSpot API calls
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+HTTP_TIMEOUT_SECONDS = 10.0
+
+# Retries of idempotent requests on rate limiting / server errors (a contact
+# create or search POST is never resent)
+RETRY_METHODS = {"GET"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.2
+
 
 class HubSpotService:
     """Service for syncing customer data to HubSpot CRM."""
@@ -31,6 +53,13 @@ class HubSpotService:
         Args:
             api_key: HubSpot API key (Private App Access Token)
         """
+        # Contact data by contact ID, and contact ID by (phone, email) search
+        self._contact_cache = TTLCache(CONTACT_CACHE_SIZE, CONTACT_CACHE_TTL_SECONDS)
+        self._search_cache = TTLCache(CONTACT_CACHE_SIZE, CONTACT_CACHE_TTL_SECONDS)
+
+        # In-flight contact searches started by prefetch_contact, by phone
+        self._prefetch: Dict[str, asyncio.Task] = {}
+
         self.api_key = api_key or os.getenv("HUBSPOT_ACCESS_TOKEN")
         if not self.api_key:
             logger.warning("HubSpot API key not found, sync will be disabled")
@@ -42,8 +71,70 @@ class HubSpotService:
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json",
             }
+
+            # One pooled async client: calls reuse the TCP/TLS connection and
+            # never block the event loop
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=HTTP_TIMEOUT_SECONDS,
+                limits=HTTP_LIMITS,
+            )
             logger.info("HubSpot service initialized")
 
+    async def aclose(self) -> None:
+        """Close the HTTP client (on application shutdown)."""
+        if self.enabled:
+            await self._client.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request to the HubSpot API.
+
+        Requests in RETRY_METHODS are retried with exponential backoff while
+        the response status is in RETRY_STATUSES.
+
+        Args:
+            method: HTTP method
+            path: API path (relative to base_url)
+            **kwargs: Extra arguments forwarded to ``httpx.AsyncClient.request``
+
+        Returns:
+            The last response received
+        """
+        attempt = 0
+        while True:
+            response = await self._client.request(method, path, **kwargs)
+            if method not in RETRY_METHODS or response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                return response
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+            attempt += 1
+
+    def prefetch_contact(self, phone: str, email: Optional[str] = None) -> Optional[asyncio.Task]:
+        """
+        Start looking up a contact in the background.
+
+        Called as soon as a message arrives, so the search overlaps with the
+        LLM calls; a later sync_contact for the same phone awaits this search
+        instead of sending its own. The result lands in the contact caches.
+
+        Args:
+            phone: Phone number
+            email: Email address (optional)
+
+        Returns:
+            The search task, or None if HubSpot is disabled
+        """
+        if not self.enabled or not phone:
+            return None
+
+        task = self._prefetch.get(phone)
+        if task is None:
+            task = asyncio.create_task(self._search_contact(phone, email))
+            self._prefetch[phone] = task
+            task.add_done_callback(lambda done: self._prefetch.pop(phone, None) if self._prefetch.get(phone) is done else None)
+        return task
+
     async def sync_contact(
         self,
         user_data: Dict[str, Any],
@@ -105,6 +196,11 @@ class HubSpotService:
 
             # Step 2: If no valid contact_id, search by phone/email
             if not contact_id:
+                # Let a prefetched search finish and fill the cache first
+                pending = self._prefetch.get(phone)
+                if pending is not None:
+                    await pending
+
                 existing_contact = await self._search_contact(phone, user_data.get("email"))
 
                 if existing_contact:
@@ -151,16 +247,21 @@ class HubSpotService:
         Returns:
             Contact data if found, None otherwise
         """
+        cached = self._contact_cache.get(contact_id)
+        if cached is not None:
+            logger.debug(f"HubSpot contact {contact_id} served from cache")
+            return cached
+
         try:
-            response = requests.get(
-                f"{self.base_url}/crm/v3/objects/contacts/{contact_id}",
-                headers=self.headers,
-                timeout=10,
+            response = await self._request(
+                "GET",
+                f"/crm/v3/objects/contacts/{contact_id}",
             )
 
             if response.status_code == 200:
                 contact = response.json()
                 logger.info(f"Retrieved HubSpot contact: {contact_id}")
+                self._contact_cache.set(contact_id, contact)
                 return contact
             elif response.status_code == 404:
                 logger.warning(f"HubSpot contact {contact_id} not found (404)")
@@ -177,6 +278,9 @@ class HubSpotService:
         """
         Search for existing contact by phone or email.
 
+        Both are searched in one request (filter groups are OR'd); a phone
+        match is preferred over an email match.
+
         Args:
             phone: Phone number
             email: Email address (optional)
@@ -184,66 +288,40 @@ class HubSpotService:
         Returns:
             Contact data if found, None otherwise
         """
+        # A phone-only hit answers any search for that phone (phone matches win)
+        search_key = (phone, email)
+        cached_id = self._search_cache.get(search_key) or self._search_cache.get((phone, None))
+        if cached_id is not None:
+            contact = await self._get_contact_by_id(cached_id)
+            if contact:
+                return contact
+
         try:
-            # Search by phone first
-            search_payload = {
-                "filterGroups": [
-                    {
-                        "filters": [
-                            {
-                                "propertyName": "phone",
-                                "operator": "EQ",
-                                "value": phone,
-                            }
-                        ]
-                    }
-                ]
-            }
+            filter_groups = [{"filters": [{"propertyName": "phone", "operator": "EQ", "value": phone}]}]
+            if email:
+                filter_groups.append({"filters": [{"propertyName": "email", "operator": "EQ", "value": email}]})
 
-            response = requests.post(
-                f"{self.base_url}/crm/v3/objects/contacts/search",
-                headers=self.headers,
+            search_payload = {"filterGroups": filter_groups, "properties": SEARCH_PROPERTIES}
+
+            response = await self._request(
+                "POST",
+                "/crm/v3/objects/contacts/search",
                 json=search_payload,
-                timeout=10,
             )
 
             if response.status_code == 200:
                 results = response.json().get("results", [])
                 if results:
-                    contact = results[0]
-                    logger.info(f"Found HubSpot contact by phone: {contact['id']}")
+                    by_phone = [c for c in results if c.get("properties", {}).get("phone") == phone]
+                    contact = (by_phone or results)[0]
+                    matched = "phone" if by_phone or not email else "email"
+                    logger.info(f"Found HubSpot contact by {matched}: {contact['id']}")
+                    self._search_cache.set(search_key, contact["id"])
+                    if by_phone:
+                        self._search_cache.set((phone, None), contact["id"])
+                    self._contact_cache.set(contact["id"], contact)
                     return contact
 
-            # If not found by phone and email is available, try email
-            if email:
-                search_payload = {
-                    "filterGroups": [
-                        {
-                            "filters": [
-                                {
-                                    "propertyName": "email",
-                                    "operator": "EQ",
-                                    "value": email,
-                                }
-                            ]
-                        }
-                    ]
-                }
-
-                response = requests.post(
-                    f"{self.base_url}/crm/v3/objects/contacts/search",
-                    headers=self.headers,
-                    json=search_payload,
-                    timeout=10,
-                )
-
-                if response.status_code == 200:
-                    results = response.json().get("results", [])
-                    if results:
-                        contact = results[0]
-                        logger.info(f"Found HubSpot contact by email: {contact['id']}")
-                        return contact
-
             logger.info(f"No existing HubSpot contact found for phone: {phone}")
             return None
 
@@ -267,11 +345,10 @@ class HubSpotService:
 
             payload = {"properties": properties}
 
-            response = requests.post(
-                f"{self.base_url}/crm/v3/objects/contacts",
-                headers=self.headers,
+            response = await self._request(
+                "POST",
+                "/crm/v3/objects/contacts",
                 json=payload,
-                timeout=10,
             )
 
             if response.status_code in [200, 201]:
@@ -279,6 +356,7 @@ class HubSpotService:
                 contact_id = result["id"]
                 lifecyclestage = result.get("properties", {}).get("lifecyclestage")
                 logger.info(f"✅ Created HubSpot contact: {contact_id} (stage: {lifecyclestage})")
+                self._search_cache.set((user_data.get("phone"), user_data.get("email")), contact_id)
                 return {
                     "id": contact_id,
                     "lifecyclestage": lifecyclestage
@@ -294,11 +372,10 @@ class HubSpotService:
                                              'hs_content_membership_notes', 'hs_lead_status']}
 
                 retry_payload = {"properties": standard_properties}
-                retry_response = requests.post(
-                    f"{self.base_url}/crm/v3/objects/contacts",
-                    headers=self.headers,
+                retry_response = await self._request(
+                    "POST",
+                    "/crm/v3/objects/contacts",
                     json=retry_payload,
-                    timeout=10,
                 )
 
                 if retry_response.status_code in [200, 201]:
@@ -306,6 +383,7 @@ class HubSpotService:
                     contact_id = result["id"]
                     lifecyclestage = result.get("properties", {}).get("lifecyclestage")
                     logger.info(f"✅ Created HubSpot contact {contact_id} (without custom fields, stage: {lifecyclestage})")
+                    self._search_cache.set((user_data.get("phone"), user_data.get("email")), contact_id)
                     return {
                         "id": contact_id,
                         "lifecyclestage": lifecyclestage
@@ -357,15 +435,15 @@ class HubSpotService:
 
             payload = {"properties": update_properties}
 
-            response = requests.patch(
-                f"{self.base_url}/crm/v3/objects/contacts/{contact_id}",
-                headers=self.headers,
+            response = await self._request(
+                "PATCH",
+                f"/crm/v3/objects/contacts/{contact_id}",
                 json=payload,
-                timeout=10,
             )
 
             if response.status_code == 200:
                 logger.info(f"✅ Updated HubSpot contact {contact_id}: {list(update_properties.keys())}")
+                self._remember_properties(contact_id, update_properties)
                 return True
             elif response.status_code == 400 and "PROPERTY_DOESNT_EXIST" in response.text:
                 # If custom field doesn't exist, retry without it
@@ -379,15 +457,15 @@ class HubSpotService:
 
                 if standard_properties:
                     retry_payload = {"properties": standard_properties}
-                    retry_response = requests.patch(
-                        f"{self.base_url}/crm/v3/objects/contacts/{contact_id}",
-                        headers=self.headers,
+                    retry_response = await self._request(
+                        "PATCH",
+                        f"/crm/v3/objects/contacts/{contact_id}",
                         json=retry_payload,
-                        timeout=10,
                     )
 
                     if retry_response.status_code == 200:
                         logger.info(f"✅ Updated HubSpot contact {contact_id} (without custom fields): {list(standard_properties.keys())}")
+                        self._remember_properties(contact_id, standard_properties)
                         return True
 
                 logger.error(f"Failed to update HubSpot contact even without custom fields")
@@ -400,6 +478,12 @@ class HubSpotService:
             logger.error(f"Error updating HubSpot contact: {e}")
             return False
 
+    def _remember_properties(self, contact_id: str, properties: Dict[str, Any]) -> None:
+        """Apply successfully written properties to the cached contact, if any."""
+        cached = self._contact_cache.get(contact_id)
+        if cached is not None:
+            cached.setdefault("properties", {}).update({key: str(value) for key, value in properties.items()})
+
     def _prepare_properties(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Prepare HubSpot properties from user data.
@@ -0,0 +1,111 @@
+"""Micro-batching scheduler for provider calls that accept many items at once."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Maximum number of requests dispatched together
+MAX_BATCH = 16
+
+# Maximum time the first request of a batch waits for companions (milliseconds)
+MAX_DELAY_MS = 25
+
+
+class LLMBatcher:
+    """
+    Collect requests arriving close together and dispatch them as one batch.
+
+    Only worth it when ``batch_fn`` makes a single provider call for the whole
+    batch (e.g. embedding several texts in one request); fanning independent
+    calls out would just add the wait.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch: int = MAX_BATCH,
+        max_delay_ms: int = MAX_DELAY_MS,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            batch_fn: Async function receiving a list of items and returning
+                one result (or exception) per item, in order
+            max_batch: Maximum batch size
+            max_delay_ms: Maximum wait for a batch to fill up
+        """
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatches: set = set()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Submit a request and wait for its result.
+
+        Args:
+            item: Request payload passed to ``batch_fn``
+
+        Returns:
+            The result produced for this item
+
+        Raises:
+            Exception: Whatever ``batch_fn`` reported for this item
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def _ensure_worker(self) -> None:
+        """Start the worker on the running loop (restarting it if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Pop up to ``max_batch`` items (or wait ``max_delay``) and dispatch them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Dispatch without blocking the collection of the next batch
+            task = loop.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[tuple]) -> None:
+        """Run one batch and resolve each request's future."""
+        logger.debug(f"Dispatching LLM batch of {len(batch)}")
+        try:
+            results = await self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
@@ -1,16 +1,118 @@
 """LLM service with intelligent model routing."""
 
+import asyncio
+import hashlib
 import os
 import re
+import unicodedata
 from typing import Any, Dict, List, Optional
 
+import orjson
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 
+from services._http import get_http_client
+from utils.cache import TTLCache
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Classification results reused for repeated messages ("hola", "si", "gracias"...)
+CLASSIFICATION_CACHE_SIZE = 10_000
+CLASSIFICATION_CACHE_TTL_SECONDS = 3600
+
+# Trivial messages answered without an LLM call (keys are normalize_message output)
+_GREETINGS = {"hola", "buenas", "buen dia", "buenos dias", "buenas tardes", "buenas noches", "hey", "hi", "hello"}
+_THANKS = {"gracias", "muchas gracias", "mil gracias", "genial", "perfecto", "excelente", "thanks", "thank you"}
+_AFFIRMATIONS = {"si", "ok", "okay", "oki", "dale", "claro", "de acuerdo", "listo", "yes"}
+
+# A greeting starts a conversation: "interested", as the classification prompt requires
+_GREETING_INTENT = {"category": "interested", "score": 0.45}
+_SHORTCUT_SENTIMENTS = {
+    **{m: "neutral" for m in _GREETINGS | _AFFIRMATIONS},
+    **{m: "positive" for m in _THANKS},
+}
+
+
+# Closing messages with the payment link: a fixed text, so no LLM call is made.
+# Placeholders: {name} (", Nombre" or empty), {product_name}, {link}
+CLOSING_TEMPLATES = (
+    "¡Perfecto{name}! Gracias por tu interés en {product_name}. Aquí tienes tu link de pago: {link}\n\nSi tienes cualquier pregunta, escríbeme.",
+    "¡Excelente decisión{name}! Puedes completar tu compra de {product_name} aquí: {link}\n\nCualquier duda que tengas, estoy para ayudarte.",
+    "¡Genial{name}! Ya está todo listo para que empieces con {product_name}. Este es tu link de pago: {link}\n\n¿Alguna pregunta? Aquí estoy.",
+)
+
+
+# Structured output for analyze_turn: intent, sentiment and extracted data in one call
+_NULLABLE_STRING = {"type": ["string", "null"]}
+_EXTRACTED_FIELDS = ("name", "email", "phone", "needs", "budget", "pain_points")
+TURN_ANALYSIS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "turn_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "intent": {
+                    "type": "object",
+                    "properties": {
+                        "category": {
+                            "type": "string",
+                            "enum": ["browsing", "interested", "ready_to_buy", "objection", "leaving"],
+                        },
+                        "score": {"type": "number"},
+                    },
+                    "required": ["category", "score"],
+                    "additionalProperties": False,
+                },
+                "sentiment": {"type": "string", "enum": ["positive", "neutral", "negative"]},
+                "extracted_data": {
+                    "type": "object",
+                    "properties": {field: _NULLABLE_STRING for field in _EXTRACTED_FIELDS},
+                    "required": list(_EXTRACTED_FIELDS),
+                    "additionalProperties": False,
+                },
+            },
+            "required": ["intent", "sentiment", "extracted_data"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def normalize_message(message: str) -> str:
+    """
+    Normalize a short message for cache and shortcut lookups.
+
+    Lowercases, drops accents and surrounding punctuation, and collapses
+    whitespace, so "¡Hola!" and "hola" share one entry.
+
+    Args:
+        message: Raw user message
+
+    Returns:
+        Normalized text
+    """
+    text = unicodedata.normalize("NFKD", message.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def _cache_key(normalized: str) -> str:
+    """Fixed-size key for a normalized message."""
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def _copy_turn_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy an analyze_turn result so cached entries cannot be mutated by callers."""
+    return {
+        "intent": dict(analysis["intent"]),
+        "sentiment": analysis["sentiment"],
+        "extracted_data": dict(analysis["extracted_data"]),
+    }
+
 
 class LLMService:
     """Service for managing LLM interactions with intelligent model routing."""
@@ -31,14 +133,21 @@ class LLMService:
             model="gpt-4o-mini",
             api_key=self.api_key,
             temperature=0.7,
+            http_async_client=get_http_client(),
         )
 
         self.gpt4o = ChatOpenAI(
             model="gpt-4o",
             api_key=self.api_key,
             temperature=0.8,
+            http_async_client=get_http_client(),
         )
 
+        # Per-message classification caches (intent and sentiment only use the message)
+        self._intent_cache = TTLCache(CLASSIFICATION_CACHE_SIZE, CLASSIFICATION_CACHE_TTL_SECONDS)
+        self._sentiment_cache = TTLCache(CLASSIFICATION_CACHE_SIZE, CLASSIFICATION_CACHE_TTL_SECONDS)
+        self._turn_cache = TTLCache(CLASSIFICATION_CACHE_SIZE, CLASSIFICATION_CACHE_TTL_SECONDS)
+
         logger.info("LLM service initialized with GPT-4o and GPT-4o-mini")
 
     def split_into_parts(self, text: str, max_words: int = 50) -> List[str]:
@@ -114,6 +223,8 @@ class LLMService:
         """
         Classify user intent and calculate intent score.
 
+        Deprecated: graph turns use analyze_turn, which covers this in one call.
+
         Args:
             message: User's message
             conversation_history: Previous messages for context
@@ -121,6 +232,16 @@ class LLMService:
         Returns:
             Dict with intent category and score (0-1)
         """
+        normalized = normalize_message(message)
+        if normalized in _GREETINGS:
+            return dict(_GREETING_INTENT)
+
+        key = _cache_key(normalized)
+        cached = self._intent_cache.get(key)
+        if cached is not None:
+            logger.debug("Intent served from cache")
+            return dict(cached)
+
         llm = self.get_llm_for_task("classification")
 
         prompt = f"""Analiza el siguiente mensaje de un cliente potencial y clasifica su intención.
@@ -144,9 +265,9 @@ Responde SOLO con JSON válido en este formato exacto:
             response = await llm.ainvoke(messages)
 
             # Parse response
-            import json
-            result = json.loads(response.content)
+            result = orjson.loads(response.content)
             logger.info(f"Intent classified: {result}")
+            self._intent_cache.set(key, dict(result))
             return result
         except Exception as e:
             logger.error(f"Intent classification error: {e}")
@@ -156,12 +277,24 @@ Responde SOLO con JSON válido en este formato exacto:
         """
         Analyze sentiment of user's message.
 
+        Deprecated: graph turns use analyze_turn, which covers this in one call.
+
         Args:
             message: User's message
 
         Returns:
             Sentiment: positive/neutral/negative
         """
+        normalized = normalize_message(message)
+        if normalized in _SHORTCUT_SENTIMENTS:
+            return _SHORTCUT_SENTIMENTS[normalized]
+
+        key = _cache_key(normalized)
+        cached = self._sentiment_cache.get(key)
+        if cached is not None:
+            logger.debug("Sentiment served from cache")
+            return cached
+
         llm = self.get_llm_for_task("sentiment")
 
         prompt = f"""Analiza el sentimiento de este mensaje del cliente.
@@ -179,6 +312,7 @@ Responde con UNA SOLA PALABRA: positive, neutral, o negative"""
                 sentiment = "neutral"
 
             logger.info(f"Sentiment analyzed: {sentiment}")
+            self._sentiment_cache.set(key, sentiment)
             return sentiment
         except Exception as e:
             logger.error(f"Sentiment analysis error: {e}")
@@ -188,6 +322,8 @@ Responde con UNA SOLA PALABRA: positive, neutral, o negative"""
         """
         Extract user data from message (name, email, needs, budget, etc.).
 
+        Deprecated: graph turns use analyze_turn, which covers this in one call.
+
         Args:
             message: User's message
             conversation_history: Previous messages for context
@@ -228,59 +364,9 @@ Responde SOLO con JSON válido:
             messages = [HumanMessage(content=prompt)]
             response = await llm.ainvoke(messages)
 
-            import json
-            import re
-            result = json.loads(response.content)
-
-            # Filter out null values
-            result = {k: v for k, v in result.items() if v is not None and v != ""}
-
-            # VALIDATION: Post-process and validate extracted data
-            validated_result = {}
-
-            # Validate and process name
-            if "name" in result and result["name"]:
-                name = result["name"].strip()
-                # Filter out greetings and invalid names
-                invalid_names = ["hola", "buenos dias", "buenas tardes", "buenas noches", "hello", "hi"]
-                if name.lower() not in invalid_names and len(name) > 1:
-                    validated_result["name"] = name.title()
-
-            # Validate email format
-            if "email" in result and result["email"]:
-                email = result["email"].strip()
-                # Basic email validation regex
-                if re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
-                    validated_result["email"] = email.lower()
-
-            # Validate phone format
-            if "phone" in result and result["phone"]:
-                phone = result["phone"].strip()
-                # Check if it contains mostly numbers (allow +, -, spaces, parentheses)
-                cleaned_phone = re.sub(r'[\s\-\(\)]', '', phone)
-                if cleaned_phone.startswith('+'):
-                    cleaned_phone = cleaned_phone[1:]
-                if cleaned_phone.isdigit() and len(cleaned_phone) >= 7:
-                    validated_result["phone"] = phone
-
-            # Validate needs (should be meaningful text, at least 5 characters)
-            if "needs" in result and result["needs"]:
-                needs = result["needs"].strip()
-                if len(needs) >= 5:
-                    validated_result["needs"] = needs
-
-            # Validate budget (check it mentions money or numbers)
-            if "budget" in result and result["budget"]:
-                budget = result["budget"].strip()
-                # Should contain numbers or money-related keywords
-                if re.search(r'\d+|pesos|dolares|euros|precio|costo', budget.lower()):
-                    validated_result["budget"] = budget
-
-            # Validate pain_points (should be meaningful text)
-            if "pain_points" in result and result["pain_points"]:
-                pain_points = result["pain_points"].strip()
-                if len(pain_points) >= 5:
-                    validated_result["pain_points"] = pain_points
+            result = orjson.loads(response.content)
+
+            validated_result = self._validate_extracted_data(result)
 
             logger.info(f"Data extracted and validated: {validated_result}")
             return validated_result
@@ -289,6 +375,147 @@ Responde SOLO con JSON válido:
             logger.error(f"Data extraction error: {e}")
             return {}
 
+    @staticmethod
+    def _validate_extracted_data(result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Drop empty or implausible fields from raw extracted data.
+
+        Args:
+            result: Fields as returned by the LLM
+
+        Returns:
+            Validated and normalized fields
+        """
+        # Filter out null values
+        result = {k: v for k, v in result.items() if v is not None and v != ""}
+
+        # VALIDATION: Post-process and validate extracted data
+        validated_result = {}
+
+        # Validate and process name
+        if "name" in result and result["name"]:
+            name = result["name"].strip()
+            # Filter out greetings and invalid names
+            invalid_names = ["hola", "buenos dias", "buenas tardes", "buenas noches", "hello", "hi"]
+            if name.lower() not in invalid_names and len(name) > 1:
+                validated_result["name"] = name.title()
+
+        # Validate email format
+        if "email" in result and result["email"]:
+            email = result["email"].strip()
+            # Basic email validation regex
+            if re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
+                validated_result["email"] = email.lower()
+
+        # Validate phone format
+        if "phone" in result and result["phone"]:
+            phone = result["phone"].strip()
+            # Check if it contains mostly numbers (allow +, -, spaces, parentheses)
+            cleaned_phone = re.sub(r'[\s\-\(\)]', '', phone)
+            if cleaned_phone.startswith('+'):
+                cleaned_phone = cleaned_phone[1:]
+            if cleaned_phone.isdigit() and len(cleaned_phone) >= 7:
+                validated_result["phone"] = phone
+
+        # Validate needs (should be meaningful text, at least 5 characters)
+        if "needs" in result and result["needs"]:
+            needs = result["needs"].strip()
+            if len(needs) >= 5:
+                validated_result["needs"] = needs
+
+        # Validate budget (check it mentions money or numbers)
+        if "budget" in result and result["budget"]:
+            budget = result["budget"].strip()
+            # Should contain numbers or money-related keywords
+            if re.search(r'\d+|pesos|dolares|euros|precio|costo', budget.lower()):
+                validated_result["budget"] = budget
+
+        # Validate pain_points (should be meaningful text)
+        if "pain_points" in result and result["pain_points"]:
+            pain_points = result["pain_points"].strip()
+            if len(pain_points) >= 5:
+                validated_result["pain_points"] = pain_points
+
+        return validated_result
+
+    async def analyze_turn(self, message: str, conversation_history: Optional[List[BaseMessage]] = None) -> Dict[str, Any]:
+        """
+        Classify intent, analyze sentiment and extract data with a single LLM call.
+
+        Replaces the three separate GPT-4o-mini calls made per turn by
+        classify_intent, analyze_sentiment and extract_data. All of them only
+        depend on the message, so results are cached per normalized message.
+        If the combined call fails, the three separate calls are used instead.
+
+        Args:
+            message: User's message
+            conversation_history: Previous messages for context
+
+        Returns:
+            Dict with "intent" (category and score), "sentiment"
+            (positive/neutral/negative) and "extracted_data" (validated fields)
+        """
+        normalized = normalize_message(message)
+        if normalized in _GREETINGS:
+            return {"intent": dict(_GREETING_INTENT), "sentiment": "neutral", "extracted_data": {}}
+
+        key = _cache_key(normalized)
+        cached = self._turn_cache.get(key)
+        if cached is not None:
+            logger.debug("Turn analysis served from cache")
+            return _copy_turn_analysis(cached)
+
+        llm = self.get_llm_for_task("analysis")
+
+        prompt = f"""Analiza el siguiente mensaje de un cliente potencial.
+
+Mensaje: "{message}"
+
+1. intent: clasifica su intención en una de estas categorías:
+- browsing: Solo está mirando, no listo para comprar (puntuación: 0.0-0.3)
+- interested: Muestra interés, hace preguntas (puntuación: 0.3-0.6)
+- ready_to_buy: Señales claras de compra (puntuación: 0.6-0.9)
+- objection: Tiene dudas u objeciones (puntuación: 0.4-0.6)
+- leaving: Quiere terminar la conversación (puntuación: 0.0-0.2)
+IMPORTANTE: Un saludo inicial como "hola", "buenos días", "hey" debe clasificarse como "interested" con puntuación entre 0.4-0.5.
+
+2. sentiment: positive, neutral o negative.
+
+3. extracted_data: extrae ÚNICAMENTE información EXPLÍCITA del cliente. NO inventes ni asumas datos; si un dato no está presente, usa null.
+- name: Nombre completo del cliente (Capitalizar), no saludos como "hola" o "buenos días"
+- email: Email válido (usuario@dominio)
+- phone: Número de teléfono completo
+- needs: Lo que el cliente EXPLÍCITAMENTE dice que busca o necesita
+- budget: Presupuesto o rango de precio que el cliente MENCIONA
+- pain_points: Problemas específicos que el cliente MENCIONA que quiere resolver"""
+
+        try:
+            response = await llm.ainvoke([HumanMessage(content=prompt)], response_format=TURN_ANALYSIS_FORMAT)
+            raw = orjson.loads(response.content)
+
+            sentiment = raw.get("sentiment")
+            if sentiment not in ("positive", "neutral", "negative"):
+                sentiment = "neutral"
+            result = {
+                "intent": {"category": raw["intent"]["category"], "score": float(raw["intent"]["score"])},
+                "sentiment": sentiment,
+                "extracted_data": self._validate_extracted_data(raw.get("extracted_data") or {}),
+            }
+        except Exception as e:
+            logger.error(f"Turn analysis error, falling back to separate calls: {e}")
+            intent, sentiment, extracted_data = await asyncio.gather(
+                self.classify_intent(message, conversation_history),
+                self.analyze_sentiment(message),
+                self.extract_data(message, conversation_history),
+            )
+            return {"intent": intent, "sentiment": sentiment, "extracted_data": extracted_data}
+
+        logger.info(f"Turn analyzed: {result}")
+        self._turn_cache.set(key, _copy_turn_analysis(result))
+        self._intent_cache.set(key, dict(result["intent"]))
+        self._sentiment_cache.set(key, sentiment)
+        return result
+
     async def generate_response(
         self,
         messages: List[BaseMessage],
@@ -379,41 +606,28 @@ Responde SOLO con JSON válido:
 
     async def generate_closing_message(self, user_data: Dict[str, Any], payment_link: str) -> str:
         """
-        Generate a closing message with payment link.
+        Build a closing message with payment link.
+
+        Picks one of CLOSING_TEMPLATES, always the same one for a given
+        customer, without calling the LLM.
 
         Args:
-            user_data: Collected user data
+            user_data: Collected user data (name, phone, product_name)
             payment_link: Payment link to include
 
         Returns:
             Closing message with payment link
         """
-        llm = self.get_llm_for_task("closing")
-
-        name = user_data.get("name", "")
-
-        prompt = f"""Genera un mensaje de cierre cálido y profesional para un cliente que está listo para comprar.
-
-Nombre del cliente: {name if name else "cliente"}
-Link de pago: {payment_link}
-
-El mensaje debe:
-1. Agradecerles por su interés
-2. Confirmar que están listos para proceder
-3. Incluir el link de pago de forma natural
-4. Animarlos a contactar si tienen preguntas
-5. Ser conciso (máximo 2-3 oraciones)
-
-Genera SOLO el texto del mensaje, sin comentarios adicionales."""
-
-        try:
-            messages = [HumanMessage(content=prompt)]
-            response = await llm.ainvoke(messages)
-            logger.info("Closing message generated")
-            return response.content
-        except Exception as e:
-            logger.error(f"Closing message generation error: {e}")
-            return f"Great! Here's your payment link: {payment_link}\n\nFeel free to reach out if you have any questions!"
+        name = user_data.get("name") or ""
+        seed = str(user_data.get("phone") or name).encode()
+        template = CLOSING_TEMPLATES[int.from_bytes(hashlib.blake2b(seed, digest_size=4).digest(), "big") % len(CLOSING_TEMPLATES)]
+
+        logger.info("Closing message generated")
+        return template.format(
+            name=f", {name}" if name else "",
+            product_name=user_data.get("product_name") or "nuestro producto",
+            link=payment_link,
+        )
 
     async def generate_follow_up_message(self, user_data: Dict[str, Any], follow_up_count: int) -> str:
         """
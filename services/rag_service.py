@@ -1,8 +1,13 @@
 """RAG service for document upload and retrieval."""
 
+import asyncio
+import io
 import os
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
+
+from langchain_core.documents import Document
 
 try:
     import chromadb
@@ -14,14 +19,29 @@ try:
 except ImportError:
     CHROMADB_AVAILABLE = False
 
+from services._http import get_http_client
+from services.chunk_index import ChunkIndex
+from services.llm_batcher import LLMBatcher
+from services.semantic_cache import SemanticCache
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Query embeddings from concurrent turns are sent together: up to this many
+# texts per request, waiting at most this long for companions (milliseconds)
+EMBED_MAX_BATCH = 16
+EMBED_MAX_DELAY_MS = 10
+
+# Chunk count reuse window (every turn checks it; ingestion invalidates it)
+STATS_TTL_SECONDS = 30
+
 
 class RAGService:
     """Service for RAG (Retrieval-Augmented Generation) operations."""
 
+    # Formats that can be parsed straight from bytes (no file on disk needed)
+    BYTES_EXTENSIONS = (".txt", ".pdf", ".docx")
+
     def __init__(self, openai_api_key: Optional[str] = None, persist_directory: str = "./chroma_db"):
         """
         Initialize RAG service.
@@ -43,8 +63,23 @@ class RAGService:
         self.embeddings = OpenAIEmbeddings(
             model="text-embedding-3-small",
             api_key=api_key,
+            http_async_client=get_http_client(),
         )
 
+        # Micro-batches query embeddings of concurrent users into one request
+        self._query_embedder = LLMBatcher(
+            batch_fn=self.embeddings.aembed_documents,
+            max_batch=EMBED_MAX_BATCH,
+            max_delay_ms=EMBED_MAX_DELAY_MS,
+        )
+
+        # Cached collection.count() and when it expires
+        self._cached_count: Optional[int] = None
+        self._count_cache_expiry = 0.0
+
+        # Context retrieved for earlier, near-identical queries (one cache per k)
+        self._context_caches: Dict[int, SemanticCache] = {}
+
         # Initialize ChromaDB
         self.persist_directory = persist_directory
         Path(persist_directory).mkdir(parents=True, exist_ok=True)
@@ -63,6 +98,12 @@ class RAGService:
             self.collection = self.client.create_collection(name=self.collection_name)
             logger.info(f"Created new collection '{self.collection_name}'")
 
+        # All chunk embeddings kept in memory; queries search it instead of
+        # ChromaDB whenever it loaded successfully
+        self._index = ChunkIndex()
+        self._index_ready = False
+        self._load_index()
+
         # Text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
@@ -73,12 +114,13 @@ class RAGService:
         self.enabled = True
         logger.info("RAG service initialized")
 
-    async def upload_document(self, file_path: str) -> int:
+    async def upload_document(self, source: Union[str, bytes], *, filename: Optional[str] = None) -> int:
         """
         Upload and process a single document.
 
         Args:
-            file_path: Path to the document file
+            source: Path to the document file, or its raw bytes
+            filename: Original file name (required when ``source`` is bytes)
 
         Returns:
             Number of chunks created
@@ -86,52 +128,138 @@ class RAGService:
         Raises:
             ValueError: If file format is not supported
         """
-        file_path_obj = Path(file_path)
-        if not file_path_obj.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+        if isinstance(source, bytes):
+            if not filename:
+                raise ValueError("filename is required when uploading raw bytes")
+            file_path_obj = Path(filename)
+        else:
+            file_path_obj = Path(source)
+            if not file_path_obj.exists():
+                raise FileNotFoundError(f"File not found: {source}")
 
         extension = file_path_obj.suffix.lower()
 
         try:
+            logger.info(f"Loading document: {file_path_obj.name}")
+
+            # Parsing and splitting are CPU-bound: run them in a worker thread
+            chunks = await asyncio.to_thread(self.parse_and_split, source, extension, file_path_obj.name)
+            logger.info(f"Split document into {len(chunks)} chunks")
+
+            await self.embed_and_insert(chunks, file_path_obj)
+            self._context_caches.clear()
+
+            logger.info(f"Successfully uploaded {len(chunks)} chunks from {file_path_obj.name}")
+            return len(chunks)
+
+        except Exception as e:
+            logger.error(f"Error uploading document {file_path_obj.name}: {e}")
+            raise
+
+    def parse_and_split(self, source: Union[str, bytes], extension: str, source_name: str) -> List[Document]:
+        """
+        Load a document and split it into chunks (synchronous, CPU-bound).
+
+        Args:
+            source: Path to the document file, or its raw bytes
+            extension: Lower-case file extension (e.g. ".pdf")
+            source_name: File name stored as the document source
+
+        Returns:
+            List of chunk documents
+
+        Raises:
+            ValueError: If file format is not supported
+        """
+        if isinstance(source, bytes):
+            documents = self._load_from_bytes(source, extension, source_name)
+        else:
             # Load document based on file type
             if extension == ".pdf":
-                loader = PyMuPDFLoader(file_path)
+                loader = PyMuPDFLoader(source)
             elif extension == ".txt":
-                loader = TextLoader(file_path)
+                loader = TextLoader(source)
             elif extension in [".doc", ".docx"]:
-                loader = UnstructuredWordDocumentLoader(file_path)
+                loader = UnstructuredWordDocumentLoader(source)
             else:
                 raise ValueError(f"Unsupported file format: {extension}")
 
-            logger.info(f"Loading document: {file_path_obj.name}")
             documents = loader.load()
 
-            # Split into chunks
-            chunks = self.text_splitter.split_documents(documents)
-            logger.info(f"Split document into {len(chunks)} chunks")
+        return self.text_splitter.split_documents(documents)
 
-            # Generate embeddings and store
-            for i, chunk in enumerate(chunks):
-                # Generate embedding
-                embedding = self.embeddings.embed_query(chunk.page_content)
+    async def embed_and_insert(self, chunks: List[Document], file_path_obj: Path) -> None:
+        """
+        Embed chunks and store them in the collection.
 
-                # Create unique ID
-                doc_id = f"{file_path_obj.stem}_{i}"
+        Args:
+            chunks: Chunk documents from ``parse_and_split``
+            file_path_obj: Original file path, used for ids and metadata
+        """
+        # Generate all embeddings in one (awaitable) request and store them together
+        texts = [chunk.page_content for chunk in chunks]
+        if not texts:
+            return
 
-                # Add to ChromaDB
-                self.collection.add(
-                    ids=[doc_id],
-                    embeddings=[embedding],
-                    documents=[chunk.page_content],
-                    metadatas=[{"source": file_path_obj.name, "chunk_index": i}],
-                )
+        embeddings = await self.embeddings.aembed_documents(texts)
+        await asyncio.to_thread(
+            self.collection.add,
+            ids=[f"{file_path_obj.stem}_{i}" for i in range(len(texts))],
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=[{"source": file_path_obj.name, "chunk_index": i} for i in range(len(texts))],
+        )
+        self._cached_count = None
+        await asyncio.to_thread(self._load_index)
 
-            logger.info(f"Successfully uploaded {len(chunks)} chunks from {file_path_obj.name}")
-            return len(chunks)
+    def _load_index(self) -> None:
+        """(Re)load the in-memory chunk index from the collection (synchronous)."""
+        if not self._index.enabled:
+            return
 
+        try:
+            data = self.collection.get(include=["embeddings", "documents"])
+            self._index.load(data["embeddings"], data["documents"])
+            self._index_ready = True
         except Exception as e:
-            logger.error(f"Error uploading document {file_path}: {e}")
-            raise
+            logger.error(f"Error loading chunk index, falling back to ChromaDB queries: {e}")
+            self._index_ready = False
+
+    def _load_from_bytes(self, data: bytes, extension: str, source_name: str) -> List[Document]:
+        """
+        Parse an in-memory document into LangChain documents.
+
+        Args:
+            data: Raw file contents
+            extension: Lower-case file extension (e.g. ".pdf")
+            source_name: File name stored as the document source
+
+        Returns:
+            List of documents (one per PDF page, one otherwise)
+
+        Raises:
+            ValueError: If the format cannot be parsed from bytes
+        """
+        if extension == ".txt":
+            return [Document(page_content=data.decode("utf-8", errors="replace"), metadata={"source": source_name})]
+
+        if extension == ".pdf":
+            from pypdf import PdfReader
+
+            reader = PdfReader(io.BytesIO(data))
+            return [
+                Document(page_content=page.extract_text() or "", metadata={"source": source_name, "page": i})
+                for i, page in enumerate(reader.pages)
+            ]
+
+        if extension == ".docx":
+            import docx
+
+            document = docx.Document(io.BytesIO(data))
+            text = "\n".join(paragraph.text for paragraph in document.paragraphs)
+            return [Document(page_content=text, metadata={"source": source_name})]
+
+        raise ValueError(f"Unsupported in-memory file format: {extension}")
 
     async def upload_documents(self, file_paths: List[str]) -> int:
         """
@@ -159,6 +287,9 @@ class RAGService:
         """
         Retrieve relevant context for a query.
 
+        Queries semantically equivalent to a recent one (e.g. rephrasings of
+        "¿cuánto cuesta?") reuse its context without a vector search.
+
         Args:
             query: Search query
             k: Number of top results to retrieve
@@ -170,24 +301,36 @@ class RAGService:
             return ""
 
         try:
-            # Generate query embedding
-            query_embedding = self.embeddings.embed_query(query)
-
-            # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=k,
-            )
-
-            # Extract and format results
-            if results["documents"] and len(results["documents"][0]) > 0:
-                contexts = results["documents"][0]
+            # Generate query embedding (batched with other in-flight queries)
+            query_embedding = await self._query_embedder.submit(query)
+
+            context_cache = self._context_caches.setdefault(k, SemanticCache())
+            cached = context_cache.lookup(query_embedding)
+            if cached is not None:
+                logger.info("Reusing RAG context of a similar recent query")
+                return cached
+
+            if self._index_ready:
+                contexts = self._index.search(query_embedding, k)
+            else:
+                # Search in ChromaDB (sync client, keep it off the event loop)
+                results = await asyncio.to_thread(
+                    self.collection.query,
+                    query_embeddings=[query_embedding],
+                    n_results=k,
+                )
+                contexts = results["documents"][0] if results["documents"] else []
+
+            # Format results
+            if contexts:
                 context_text = "\n\n---\n\n".join(contexts)
                 logger.info(f"Retrieved {len(contexts)} relevant chunks for query")
-                return context_text
             else:
                 logger.info("No relevant context found")
-                return ""
+                context_text = ""
+
+            context_cache.store(query_embedding, context_text)
+            return context_text
 
         except Exception as e:
             logger.error(f"Error retrieving context: {e}")
@@ -197,11 +340,17 @@ class RAGService:
         """
         Get statistics about the document collection.
 
+        The chunk count is cached for STATS_TTL_SECONDS and refreshed right
+        after documents are added or the collection is cleared.
+
         Returns:
             Dict with collection statistics
         """
         try:
-            count = self.collection.count()
+            if self._cached_count is None or time.monotonic() >= self._count_cache_expiry:
+                self._cached_count = self.collection.count()
+                self._count_cache_expiry = time.monotonic() + STATS_TTL_SECONDS
+            count = self._cached_count
             return {
                 "total_chunks": count,
                 "collection_name": self.collection_name,
@@ -215,6 +364,9 @@ class RAGService:
         try:
             self.client.delete_collection(name=self.collection_name)
             self.collection = self.client.create_collection(name=self.collection_name)
+            self._context_caches.clear()
+            self._cached_count = None
+            self._index.clear()
             logger.info("Collection cleared successfully")
         except Exception as e:
             logger.error(f"Error clearing collection: {e}")
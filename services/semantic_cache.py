@@ -0,0 +1,125 @@
+"""Semantic cache mapping query embeddings to previously retrieved RAG context."""
+
+import bisect
+import time
+from typing import List, Optional, Sequence
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Cosine similarity above which two queries are treated as the same question
+SIMILARITY_THRESHOLD = 0.95
+
+# How long a cached context is reused, and how many are kept
+ENTRY_TTL_SECONDS = 3600
+MAX_ENTRIES = 1024
+
+
+class SemanticCache:
+    """Nearest-neighbour cache over unit-normalized query embeddings."""
+
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        ttl: float = ENTRY_TTL_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            ttl: Seconds an entry stays valid
+            max_entries: Maximum number of entries (oldest dropped first)
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = NUMPY_AVAILABLE
+        self._vectors = None  # (N, dim) matrix, one unit vector per entry
+        self._values: List[str] = []
+        self._expires: List[float] = []  # Ascending: entries are appended in time order
+
+        if not self.enabled:
+            logger.warning("numpy not available. Semantic cache disabled.")
+
+    def lookup(self, embedding: Sequence[float]) -> Optional[str]:
+        """
+        Find the value stored for the most similar earlier query.
+
+        Args:
+            embedding: Query embedding
+
+        Returns:
+            Cached value, or None if no entry is similar enough
+        """
+        if not self.enabled:
+            return None
+
+        self._drop_expired()
+        if not self._values:
+            return None
+
+        similarities = self._vectors @ _unit(embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        logger.debug(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+        return self._values[best]
+
+    def store(self, embedding: Sequence[float], value: str) -> None:
+        """
+        Cache a value for a query embedding.
+
+        Args:
+            embedding: Query embedding
+            value: Value to return for similar queries
+        """
+        if not self.enabled:
+            return
+
+        self._drop_expired()
+        if len(self._values) >= self.max_entries:
+            self._drop_first(len(self._values) - self.max_entries + 1)
+
+        row = _unit(embedding)[np.newaxis, :]
+        self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+        self._values.append(value)
+        self._expires.append(time.monotonic() + self.ttl)
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after the document collection changed)."""
+        self._vectors = None
+        self._values = []
+        self._expires = []
+
+    def __len__(self) -> int:
+        """Number of stored entries."""
+        return len(self._values)
+
+    def _drop_expired(self) -> None:
+        """Remove the expired entries, which always form a prefix."""
+        expired = bisect.bisect_right(self._expires, time.monotonic())
+        if expired:
+            self._drop_first(expired)
+
+    def _drop_first(self, count: int) -> None:
+        """Remove the ``count`` oldest entries."""
+        self._values = self._values[count:]
+        self._expires = self._expires[count:]
+        self._vectors = self._vectors[count:] if self._values else None
+
+
+def _unit(embedding: Sequence[float]):
+    """Convert an embedding to a float32 unit vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
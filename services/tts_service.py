@@ -2,10 +2,11 @@
 
 import base64
 import os
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from openai import AsyncOpenAI
 
+from services._http import get_http_client
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -16,6 +17,9 @@ class TTSService:
 
     AVAILABLE_VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
 
+    # Size of the pieces yielded by stream_audio
+    STREAM_CHUNK_BYTES = 64 * 1024
+
     def __init__(self, openai_api_key: Optional[str] = None):
         """
         Initialize TTS service.
@@ -27,7 +31,7 @@ class TTSService:
         if not api_key:
             raise ValueError("OPENAI_API_KEY must be provided or set in environment")
 
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = AsyncOpenAI(api_key=api_key, http_client=get_http_client())
         logger.info("TTS service initialized")
 
     async def generate_audio(self, text: str, voice: str = "nova") -> bytes:
@@ -65,6 +69,30 @@ class TTSService:
             logger.error(f"TTS generation error: {e}")
             raise
 
+    async def stream_audio(self, text: str, voice: str = "nova") -> AsyncIterator[bytes]:
+        """
+        Generate audio from text, yielding MP3 chunks as they are received.
+
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+
+        Yields:
+            Pieces of the MP3 audio, in order
+        """
+        if voice not in self.AVAILABLE_VOICES:
+            logger.warning(f"Invalid voice '{voice}', using 'nova' as fallback")
+            voice = "nova"
+
+        logger.info(f"Streaming audio with voice '{voice}' (text length: {len(text)})")
+        async with self.client.audio.speech.with_streaming_response.create(
+            model="tts-1",
+            voice=voice,
+            input=text,
+        ) as response:
+            async for chunk in response.iter_bytes(self.STREAM_CHUNK_BYTES):
+                yield chunk
+
     async def generate_audio_base64(self, text: str, voice: str = "nova") -> str:
         """
         Generate audio and return as base64 string.
@@ -1,14 +1,19 @@
 """Twilio service for sending WhatsApp messages."""
 
 import os
+import threading
 from typing import Optional
 
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Sends run in worker threads; a hung request must not hold one forever
+HTTP_TIMEOUT_SECONDS = 15
+
 
 class TwilioService:
     """Service for sending WhatsApp messages via Twilio."""
@@ -38,7 +43,12 @@ class TwilioService:
         if not self.whatsapp_number.startswith("whatsapp:"):
             self.whatsapp_number = f"whatsapp:{self.whatsapp_number}"
 
-        self.client = Client(self.account_sid, self.auth_token)
+        # One pooled requests.Session for the process keeps the TLS connection alive between sends
+        self.client = Client(
+            self.account_sid,
+            self.auth_token,
+            http_client=TwilioHttpClient(pool_connections=True, timeout=HTTP_TIMEOUT_SECONDS),
+        )
         logger.info(f"Twilio service initialized with number {self.whatsapp_number}")
 
     def send_message(self, to_phone: str, message: str, media_url: Optional[str] = None) -> dict:
@@ -122,11 +132,15 @@ class TwilioService:
 
 # Global instance (will be initialized in app.py)
 twilio_service: Optional[TwilioService] = None
+_twilio_lock = threading.Lock()
 
 
 def get_twilio_service() -> TwilioService:
     """Get the global Twilio service instance."""
     global twilio_service
     if twilio_service is None:
-        twilio_service = TwilioService()
+        # Callers may be worker threads; build the client only once
+        with _twilio_lock:
+            if twilio_service is None:
+                twilio_service = TwilioService()
     return twilio_service
@@ -26,6 +26,25 @@ def mock_db_session():
     return session
 
 
+@pytest.fixture
+async def db():
+    """Create a fresh in-memory database session."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from database.models import Base
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+    await engine.dispose()
+
+
 @pytest.fixture
 def sample_config():
     """Sample configuration for tests."""
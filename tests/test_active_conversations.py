@@ -0,0 +1,26 @@
+"""Unit tests for the shared active conversations snapshot."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from database.changes import change_bus
+from services.active_conversations import ActiveConversationsService
+
+
+@pytest.mark.asyncio
+async def test_snapshot_shared_until_a_newer_version_is_required():
+    """Test that panels share one query unless they have seen a newer change."""
+    service = ActiveConversationsService(ttl=60)
+    session_factory = MagicMock()
+
+    with patch("services.active_conversations.crud.get_active_users_compact", new=AsyncMock(return_value=[])) as mock_get:
+        version, rows = await service.snapshot(session_factory)
+        await service.snapshot(session_factory, min_version=version)
+        assert mock_get.await_count == 1
+
+        change_bus.notify("users")
+        newer, _ = await service.snapshot(session_factory, min_version=change_bus.version("users"))
+
+    assert rows == []
+    assert newer == version + 1
+    assert mock_get.await_count == 2
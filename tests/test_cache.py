@@ -0,0 +1,55 @@
+"""Unit tests for the async TTL cache."""
+
+import asyncio
+import pytest
+
+from utils.cache import AsyncTTLCache, TTLCache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_share_one_refresh():
+    """Test that concurrent callers trigger a single producer call."""
+    cache = AsyncTTLCache(ttl=10)
+    calls = 0
+
+    async def producer():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(cache.get(producer) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_refresh():
+    """Test that invalidation makes the next get recompute."""
+    cache = AsyncTTLCache(ttl=10)
+    values = iter([1, 2])
+
+    async def producer():
+        return next(values)
+
+    assert await cache.get(producer) == 1
+    assert await cache.get(producer) == 1
+    cache.invalidate()
+    assert await cache.get(producer) == 2
+
+
+def test_ttl_cache_expiry_and_lru_eviction():
+    """Test that entries expire and the least recently used one is evicted."""
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    expired = TTLCache(maxsize=2, ttl=0)
+    expired.set("a", 1)
+    assert expired.get("a", "missing") == "missing"
@@ -0,0 +1,36 @@
+"""Unit tests for the change bus."""
+
+import asyncio
+import pytest
+
+from database import crud
+from database.changes import ChangeBus, change_bus
+
+
+@pytest.mark.asyncio
+async def test_notify_bumps_version_and_wakes_subscribers():
+    """Test that notify increments the topic version and reaches subscribers."""
+    bus = ChangeBus()
+    queue = bus.subscribe()
+
+    bus.notify("users")
+
+    assert bus.version("users") == 1
+    assert bus.version("other") == 0
+    assert await asyncio.wait_for(queue.get(), timeout=1) == "users"
+
+    bus.unsubscribe(queue)
+    bus.notify("users")
+    await asyncio.sleep(0)
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_crud_writes_notify_users_topic(db):
+    """Test that user and message writes are announced on the bus."""
+    before = change_bus.version("users")
+
+    user = await crud.create_user(db, "+1000")
+    await crud.create_message(db, user.id, "hello", "user")
+
+    assert change_bus.version("users") == before + 2
@@ -0,0 +1,46 @@
+"""Unit tests for the Gradio chat component."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+pytest.importorskip("gradio")
+
+import gradio as gr
+
+from gradio_ui import chat_component_v2
+from utils.circuit_breaker import CircuitBreaker
+
+
+def _chat_handler(db_session_factory):
+    """Build the component and return its process_chat_message handler."""
+    with gr.Blocks() as demo:
+        chat_component_v2.create_chat_component(db_session_factory)
+    fns = demo.fns.values() if isinstance(demo.fns, dict) else demo.fns
+    return next(f.fn for f in fns if getattr(f.fn, "__name__", "") == "process_chat_message")
+
+
+@pytest.mark.asyncio
+async def test_failing_graph_opens_breaker(monkeypatch):
+    """Test turns answered with the fallback response count as failures."""
+    breaker = CircuitBreaker("test", window=10, max_failures=1, cooldown_seconds=60)
+    monkeypatch.setattr(chat_component_v2, "_BREAKER", breaker)
+    monkeypatch.setattr(chat_component_v2, "log_pool_status", lambda factory: None)
+
+    config_manager = MagicMock()
+    # RAG enabled: replies are not served from the response cache
+    config_manager.load_all_configs = AsyncMock(return_value={"rag_enabled": True})
+    monkeypatch.setattr(chat_component_v2, "get_config_manager", lambda: config_manager)
+
+    graph = MagicMock()
+    graph.astream = MagicMock(side_effect=RuntimeError("LLM down"))
+    monkeypatch.setattr("graph.workflow.get_sales_graph", lambda: graph)
+
+    handler = _chat_handler(MagicMock())
+    history, session_msgs, sentiments = [], chat_component_v2._new_session_messages(), []
+
+    for message in ("Hola", "¿Sigues ahí?"):
+        async for _ in handler(message, history, session_msgs, sentiments):
+            pass
+
+    assert history[-1]["content"] == chat_component_v2.FALLBACK_RESPONSE
+    assert not breaker.allow()
@@ -0,0 +1,32 @@
+"""Unit tests for the in-memory RAG chunk index."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.chunk_index import ChunkIndex
+
+
+def test_search_returns_top_k_most_similar_first():
+    """Test exact cosine top-k ordering."""
+    index = ChunkIndex()
+    index.load(
+        [[1.0, 0.0], [0.0, 2.0], [0.7, 0.7], [-1.0, 0.0]],
+        ["precio", "envio", "precio y envio", "otro"],
+    )
+
+    assert index.search([1.0, 0.1], k=2) == ["precio", "precio y envio"]
+    assert index.search([0.0, 1.0], k=10) == ["envio", "precio y envio", "precio", "otro"]
+
+
+def test_empty_and_cleared_index_return_nothing():
+    """Test searching before loading and after clearing."""
+    index = ChunkIndex()
+    assert index.search([1.0, 0.0], k=3) == []
+
+    index.load([[1.0, 0.0]], ["precio"])
+    assert len(index) == 1
+
+    index.clear()
+    assert index.search([1.0, 0.0], k=3) == []
+    assert len(index) == 0
@@ -0,0 +1,28 @@
+"""Unit tests for the circuit breaker."""
+
+from utils.circuit_breaker import CircuitBreaker
+
+
+def test_breaker_opens_after_too_many_failures():
+    """Test that the breaker rejects calls once failures exceed the threshold."""
+    breaker = CircuitBreaker("test", window=10, max_failures=3, cooldown_seconds=60)
+
+    for _ in range(3):
+        breaker.record(False)
+    assert breaker.allow()
+
+    breaker.record(False)
+    assert not breaker.allow()
+
+
+def test_breaker_closes_after_cooldown():
+    """Test that the breaker lets calls through again after the cooldown."""
+    breaker = CircuitBreaker("test", window=10, max_failures=1, cooldown_seconds=0)
+
+    breaker.record(False)
+    breaker.record(False)
+
+    assert breaker.allow()
+    # Window was reset on close
+    breaker.record(False)
+    assert breaker.allow()
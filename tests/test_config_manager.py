@@ -0,0 +1,115 @@
+"""Unit tests for the configuration manager."""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from services.config_manager import ConfigManager
+
+
+@pytest.mark.asyncio
+async def test_load_all_configs_served_from_cache(mock_db_session):
+    """Test that repeated loads within the TTL do not hit the database."""
+    manager = ConfigManager()
+
+    with patch("services.config_manager.crud.get_all_configs", new=AsyncMock(return_value={"system_prompt": "Hi"})) as mock_get:
+        first = await manager.load_all_configs(mock_db_session)
+        second = await manager.load_all_configs(mock_db_session)
+
+    assert mock_get.await_count == 1
+    assert first == second
+    assert first["system_prompt"] == "Hi"
+    # Defaults are merged for missing keys
+    assert first["tts_voice"] == "nova"
+
+
+@pytest.mark.asyncio
+async def test_save_config_invalidates_cache(mock_db_session):
+    """Test that saving a config forces the next load to re-read the database."""
+    manager = ConfigManager()
+
+    with patch("services.config_manager.crud.get_all_configs", new=AsyncMock(return_value={})) as mock_get, \
+         patch("services.config_manager.crud.set_config", new=AsyncMock()):
+        await manager.load_all_configs(mock_db_session)
+        await manager.save_config(mock_db_session, "payment_link", "https://example.com/pay")
+        await manager.load_all_configs(mock_db_session)
+
+    assert mock_get.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_configs_are_copies(mock_db_session):
+    """Test that callers cannot mutate the cached snapshot."""
+    manager = ConfigManager()
+
+    with patch("services.config_manager.crud.get_all_configs", new=AsyncMock(return_value={})):
+        configs = await manager.load_all_configs(mock_db_session)
+        configs["system_prompt"] = "mutated"
+        again = await manager.load_all_configs(mock_db_session)
+
+    assert again["system_prompt"] == ""
+
+
+@pytest.mark.asyncio
+async def test_save_all_configs_uses_single_bulk_write(mock_db_session):
+    """Test that saving several configs issues one bulk write."""
+    manager = ConfigManager()
+    configs = {"payment_link": "https://example.com/pay", "use_emojis": False}
+
+    with patch("services.config_manager.crud.bulk_set_configs", new=AsyncMock()) as mock_bulk, \
+         patch("services.config_manager.crud.set_config", new=AsyncMock()) as mock_set:
+        await manager.save_all_configs(mock_db_session, configs)
+
+    mock_bulk.assert_awaited_once_with(mock_db_session, configs)
+    mock_set.assert_not_awaited()
+    assert manager.get_cached("use_emojis") is False
+
+
+@pytest.mark.asyncio
+async def test_load_subset_of_keys(mock_db_session):
+    """Test that a key subset is fetched in one query, or served from a warm snapshot."""
+    manager = ConfigManager()
+    keys = ("payment_link", "tts_voice")
+
+    with patch("services.config_manager.crud.get_all_configs", new=AsyncMock(side_effect=lambda *a, **kw: {"payment_link": "x"})) as mock_get:
+        cold = await manager.load_all_configs(mock_db_session, keys=keys)
+        mock_get.assert_awaited_once_with(mock_db_session, keys=list(keys))
+
+        await manager.load_all_configs(mock_db_session)
+        warm = await manager.load_all_configs(mock_db_session, keys=keys)
+
+    assert cold == {"payment_link": "x", "tts_voice": "nova"}
+    assert warm == cold
+    assert mock_get.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_initialize_defaults_single_read_and_bulk_insert(mock_db_session):
+    """Test that defaults are seeded with one read and one bulk insert."""
+    manager = ConfigManager()
+
+    with patch("services.config_manager.crud.get_all_configs", new=AsyncMock(return_value={"system_prompt": "Hi"})) as mock_get, \
+         patch("services.config_manager.crud.bulk_set_configs", new=AsyncMock()) as mock_bulk:
+        await manager.initialize_defaults(mock_db_session)
+        configs = await manager.load_all_configs(mock_db_session)
+
+    mock_get.assert_awaited_once()
+    missing = mock_bulk.await_args.args[1]
+    assert "system_prompt" not in missing and missing["tts_voice"] == "nova"
+    assert mock_bulk.await_args.kwargs == {"only_missing": True}
+    assert configs["system_prompt"] == "Hi"
+
+
+@pytest.mark.asyncio
+async def test_load_config_caches_missing_keys(mock_db_session):
+    """Test that a key absent from the database is only queried once."""
+    manager = ConfigManager()
+
+    with patch("services.config_manager.crud.get_config", new=AsyncMock(return_value=None)) as mock_get, \
+         patch("services.config_manager.crud.set_config", new=AsyncMock()):
+        first = await manager.load_config(mock_db_session, "custom_key", default="a")
+        second = await manager.load_config(mock_db_session, "custom_key", default="b")
+        await manager.save_config(mock_db_session, "custom_key", "saved")
+        third = await manager.load_config(mock_db_session, "custom_key")
+
+    assert (first, second, third) == ("a", "b", "saved")
+    assert mock_get.await_count == 1
@@ -0,0 +1,166 @@
+"""Unit tests for CRUD operations against an in-memory SQLite database."""
+
+from datetime import datetime
+
+import pytest
+
+from database import crud
+
+
+@pytest.mark.asyncio
+async def test_bulk_set_configs_inserts_and_updates(db):
+    """Test that bulk_set_configs upserts every key in one call."""
+    await crud.set_config(db, "payment_link", "https://old.example.com")
+
+    await crud.bulk_set_configs(db, {
+        "payment_link": "https://new.example.com",
+        "use_emojis": False,
+        "max_words_per_response": 80,
+    })
+
+    configs = await crud.get_all_configs(db)
+    assert configs == {
+        "payment_link": "https://new.example.com",
+        "use_emojis": False,
+        "max_words_per_response": 80,
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_all_configs_filters_keys(db):
+    """Test that get_all_configs can load only the requested keys."""
+    await crud.bulk_set_configs(db, {"payment_link": "https://example.com", "use_emojis": True})
+
+    configs = await crud.get_all_configs(db, keys=["use_emojis", "missing"])
+
+    assert configs == {"use_emojis": True}
+
+
+@pytest.mark.asyncio
+async def test_uploaded_document_manifest(db):
+    """Test recording, looking up and clearing ingested documents."""
+    await crud.add_uploaded_document(db, "a" * 64, "/tmp/catalog.pdf", 12)
+
+    found = await crud.get_uploaded_document(db, "a" * 64)
+    assert found.n_chunks == 12
+    assert await crud.get_uploaded_document(db, "b" * 64) is None
+
+    await crud.clear_uploaded_documents(db)
+    db.expunge_all()
+    assert await crud.get_uploaded_document(db, "a" * 64) is None
+
+
+@pytest.mark.asyncio
+async def test_get_latest_messages_for_users(db):
+    """Test that the latest message of each user is fetched in one call."""
+    alice = await crud.create_user(db, "+1000")
+    bob = await crud.create_user(db, "+2000")
+    carol = await crud.create_user(db, "+3000")
+    await crud.create_message(db, alice.id, "first", "user")
+    await crud.create_message(db, alice.id, "second", "bot")
+    await crud.create_message(db, bob.id, "hello", "user")
+
+    latest = await crud.get_latest_messages_for_users(db, [alice.id, bob.id, carol.id])
+
+    assert {uid: m.message_text for uid, m in latest.items()} == {alice.id: "second", bob.id: "hello"}
+
+
+@pytest.mark.asyncio
+async def test_get_active_users_with_last_message(db):
+    """Test that active users come back with their last message text."""
+    alice = await crud.create_user(db, "+1000")
+    await crud.create_message(db, alice.id, "first", "user")
+    await crud.create_message(db, alice.id, "latest", "bot")
+    await crud.update_user(db, alice.id, last_message_at=datetime.utcnow())
+
+    rows = await crud.get_active_users_with_last_message(db, limit=10)
+
+    assert [(user.id, text) for user, text in rows] == [(alice.id, "latest")]
+
+
+@pytest.mark.asyncio
+async def test_get_user_messages_returns_latest_in_order(db):
+    """Test that the limit keeps the most recent messages, oldest first."""
+    alice = await crud.create_user(db, "+1000")
+    for text in ("one", "two", "three"):
+        await crud.create_message(db, alice.id, text, "user")
+
+    messages = await crud.get_user_messages(db, alice.id, limit=2)
+
+    assert [m.message_text for m in messages] == ["two", "three"]
+
+
+@pytest.mark.asyncio
+async def test_conversation_mode_updates(db):
+    """Test setting and toggling the conversation mode without loading the user."""
+    alice = await crud.create_user(db, "+1000")
+
+    assert await crud.toggle_conversation_mode(db, alice.id) == "MANUAL"
+    assert await crud.toggle_conversation_mode(db, alice.id) == "AUTO"
+    assert await crud.set_conversation_mode(db, alice.id, "NEEDS_ATTENTION") is True
+    assert await crud.toggle_conversation_mode(db, alice.id) == "AUTO"
+    assert await crud.toggle_conversation_mode(db, 999) is None
+    assert await crud.set_conversation_mode(db, 999, "AUTO") is False
+
+
+@pytest.mark.asyncio
+async def test_create_message_maintains_user_counters(db):
+    """Test that the message counter and last activity live on the user row."""
+    alice = await crud.create_user(db, "+1000")
+    await crud.create_message(db, alice.id, "one", "user")
+    await crud.create_message(db, alice.id, "two", "bot")
+
+    user = await crud.get_user_by_id(db, alice.id)
+
+    assert user.total_messages == 2
+    assert user.last_message_at is not None
+
+
+@pytest.mark.asyncio
+async def test_update_user_returns_updated_row(db):
+    """Test that update_user returns the fresh user and ignores unknown fields."""
+    alice = await crud.create_user(db, "+1000")
+
+    user = await crud.update_user(db, alice.id, name="Alice", conversation_mode="MANUAL", bogus=1)
+
+    assert (user.id, user.name, user.conversation_mode) == (alice.id, "Alice", "MANUAL")
+    assert alice.name == "Alice"
+    assert await crud.update_user(db, 999, name="Nobody") is None
+
+
+@pytest.mark.asyncio
+async def test_get_active_users_compact(db):
+    """Test that the compact listing returns plain rows with the last message."""
+    alice = await crud.create_user(db, "+1000", name="Alice")
+    await crud.create_message(db, alice.id, "first", "user")
+    await crud.create_message(db, alice.id, "latest", "bot")
+    await crud.create_user(db, "+2000")
+
+    rows = await crud.get_active_users_compact(db, limit=10)
+
+    assert [(r.id, r.phone, r.name, r.conversation_mode, r.last_message) for r in rows] == [
+        (alice.id, "+1000", "Alice", "AUTO", "latest")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_set_configs_only_missing_keeps_existing(db):
+    """Test that seeding defaults does not overwrite stored values."""
+    await crud.set_config(db, "payment_link", "https://custom.example.com")
+
+    await crud.bulk_set_configs(db, {"payment_link": "", "tts_voice": "nova"}, only_missing=True)
+
+    configs = await crud.get_all_configs(db)
+    assert configs == {"payment_link": "https://custom.example.com", "tts_voice": "nova"}
+
+
+@pytest.mark.asyncio
+async def test_init_default_configs_keeps_existing(db):
+    """Test that default configs are seeded without overwriting stored ones."""
+    await crud.set_config(db, "tts_voice", "alloy")
+
+    await crud.init_default_configs(db)
+
+    configs = await crud.get_all_configs(db)
+    assert configs["tts_voice"] == "alloy"
+    assert configs["payment_link"] == "https://example.com/pay"
@@ -0,0 +1,86 @@
+"""Unit tests for engine construction helpers."""
+
+import pytest
+
+from database.engine import create_engine, create_session_factory, describe_pool
+
+
+def test_sqlite_engine_reports_pool():
+    """Test that the SQLite engine builds and its pool can be described."""
+    engine = create_engine("sqlite+aiosqlite:///:memory:")
+    factory = create_session_factory(engine)
+
+    info = describe_pool(engine)
+
+    assert factory.kw["bind"] is engine
+    assert info["pool"]
+
+
+def test_log_pool_status_warns_on_null_pool(caplog):
+    """Test that a NullPool-backed factory is reported."""
+    from sqlalchemy.pool import NullPool
+
+    from database.engine import log_pool_status
+
+    engine = create_engine("sqlite+aiosqlite:///:memory:", poolclass=NullPool)
+
+    with caplog.at_level("WARNING"):
+        log_pool_status(create_session_factory(engine))
+
+    assert "NullPool" in caplog.text
+
+
+def test_bounded_concurrency_follows_pool_capacity(tmp_path):
+    """Test the session limit is derived from the engine's actual pool."""
+    from database.engine import DB_HEADROOM, POOL_SIZE, bounded_concurrency, pool_capacity
+
+    sqlite_engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}")
+    sized_engine = create_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", pool_size=POOL_SIZE, max_overflow=0
+    )
+
+    assert pool_capacity(sqlite_engine) == 15  # SQLAlchemy default 5 + 10 overflow
+    assert bounded_concurrency(sqlite_engine) == 15 - DB_HEADROOM
+    assert bounded_concurrency(sized_engine) == POOL_SIZE - DB_HEADROOM
+
+
+@pytest.mark.asyncio
+async def test_bounded_session_caps_concurrency(tmp_path):
+    """Test that no more sessions than the pool allows are open at once."""
+    import asyncio
+
+    from database import engine as engine_module
+
+    # Capacity 4, minus DB_HEADROOM
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", pool_size=3, max_overflow=1)
+    factory = create_session_factory(engine)
+    open_sessions = peak = 0
+
+    async def use_session():
+        nonlocal open_sessions, peak
+        async with engine_module.bounded_session(factory):
+            open_sessions += 1
+            peak = max(peak, open_sessions)
+            await asyncio.sleep(0.01)
+            open_sessions -= 1
+
+    await asyncio.gather(*(use_session() for _ in range(5)))
+    await engine.dispose()
+
+    assert peak == 4 - engine_module.DB_HEADROOM
+
+
+@pytest.mark.asyncio
+async def test_sqlite_connections_use_wal(tmp_path):
+    """Test that SQLite connections get the journal/cache pragmas."""
+    from sqlalchemy import text
+
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}")
+
+    async with engine.connect() as conn:
+        journal_mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+        synchronous = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+
+    await engine.dispose()
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
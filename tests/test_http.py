@@ -0,0 +1,18 @@
+"""Unit tests for the shared HTTP client."""
+
+import pytest
+
+from services._http import close_http_client, get_http_client
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_and_recreated_after_close():
+    """Test that one client is shared until it is closed on shutdown."""
+    client = get_http_client()
+    assert get_http_client() is client
+
+    await close_http_client()
+
+    assert client.is_closed
+    assert get_http_client() is not client
+    await close_http_client()
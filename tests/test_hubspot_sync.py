@@ -0,0 +1,129 @@
+"""Unit tests for the HubSpot sync service."""
+
+import httpx
+import pytest
+
+from services.hubspot_sync import HubSpotService
+
+
+def make_service(handler):
+    """Create a HubSpot service whose HTTP client is served by ``handler``."""
+    service = HubSpotService(api_key="test-token")
+    service._client = httpx.AsyncClient(
+        base_url=service.base_url,
+        headers=service.headers,
+        transport=httpx.MockTransport(handler),
+    )
+    return service
+
+
+@pytest.mark.asyncio
+async def test_get_retries_on_rate_limit(monkeypatch):
+    """Test that GETs are retried on 429 and POSTs are not."""
+    monkeypatch.setattr("services.hubspot_sync.RETRY_BACKOFF_SECONDS", 0)
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if request.method == "GET" and len(calls) == 1:
+            return httpx.Response(429)
+        if request.method == "GET":
+            return httpx.Response(200, json={"id": "42", "properties": {}})
+        return httpx.Response(503)
+
+    service = make_service(handler)
+
+    contact = await service._get_contact_by_id("42")
+    created = await service._create_contact({"phone": "+123"})
+
+    assert contact["id"] == "42"
+    assert created is None
+    assert calls == ["GET", "GET", "POST"]
+
+
+@pytest.mark.asyncio
+async def test_sync_contact_creates_when_not_found():
+    """Test that an unknown phone creates a new contact with auth headers."""
+    seen = []
+
+    def handler(request):
+        seen.append((request.method, request.url.path, request.headers["Authorization"]))
+        if request.url.path.endswith("/search"):
+            return httpx.Response(200, json={"results": []})
+        return httpx.Response(201, json={"id": "7", "properties": {"lifecyclestage": "lead"}})
+
+    service = make_service(handler)
+
+    result = await service.sync_contact({"phone": "+123", "stage": "welcome"})
+
+    assert result["contact_id"] == "7"
+    assert result["action"] == "created"
+    assert seen[-1] == ("POST", "/crm/v3/objects/contacts", "Bearer test-token")
+
+
+@pytest.mark.asyncio
+async def test_search_contact_single_request_prefers_phone():
+    """Test phone and email are searched together, preferring the phone match."""
+    import json
+
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        return httpx.Response(200, json={"results": [
+            {"id": "1", "properties": {"email": "ana@example.com"}},
+            {"id": "2", "properties": {"phone": "+123"}},
+        ]})
+
+    service = make_service(handler)
+
+    contact = await service._search_contact("+123", "ana@example.com")
+
+    assert contact["id"] == "2"
+    assert len(payloads) == 1
+    assert [g["filters"][0]["propertyName"] for g in payloads[0]["filterGroups"]] == ["phone", "email"]
+
+
+@pytest.mark.asyncio
+async def test_repeated_syncs_reuse_cached_contact():
+    """Test a second sync of the same user does not search HubSpot again."""
+    calls = []
+
+    def handler(request):
+        calls.append((request.method, request.url.path))
+        if request.url.path.endswith("/search"):
+            return httpx.Response(200, json={"results": [{"id": "9", "properties": {"phone": "+123"}}]})
+        return httpx.Response(200, json={"id": "9"})
+
+    service = make_service(handler)
+
+    await service.sync_contact({"phone": "+123", "sentiment": "positive"})
+    await service.sync_contact({"phone": "+123", "sentiment": "positive"})
+    await service.sync_contact({"phone": "+123", "sentiment": "negative"})
+
+    # Unchanged data is not patched again; the cached copy reflects the update
+    assert calls == [
+        ("POST", "/crm/v3/objects/contacts/search"),
+        ("PATCH", "/crm/v3/objects/contacts/9"),
+        ("PATCH", "/crm/v3/objects/contacts/9"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sync_contact_awaits_prefetched_search():
+    """Test a sync after prefetch_contact reuses the prefetched search."""
+    calls = []
+
+    def handler(request):
+        calls.append((request.method, request.url.path))
+        if request.url.path.endswith("/search"):
+            return httpx.Response(200, json={"results": [{"id": "5", "properties": {"phone": "+123"}}]})
+        return httpx.Response(200, json={"id": "5"})
+
+    service = make_service(handler)
+
+    service.prefetch_contact("+123")
+    result = await service.sync_contact({"phone": "+123", "email": "ana@example.com"})
+
+    assert result["contact_id"] == "5"
+    assert calls.count(("POST", "/crm/v3/objects/contacts/search")) == 1
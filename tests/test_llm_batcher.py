@@ -0,0 +1,24 @@
+"""Unit tests for the LLM micro-batcher."""
+
+import asyncio
+import pytest
+
+from services.llm_batcher import LLMBatcher
+
+
+@pytest.mark.asyncio
+async def test_batch_respects_max_size_and_errors():
+    """Test that batches are capped and per-item exceptions are propagated."""
+    batches = []
+
+    async def batch_fn(items):
+        batches.append(len(items))
+        return [ValueError("boom") if item == 2 else item for item in items]
+
+    batcher = LLMBatcher(batch_fn=batch_fn, max_batch=2, max_delay_ms=20)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(4)), return_exceptions=True)
+
+    assert results[:2] == [0, 1]
+    assert isinstance(results[2], ValueError)
+    assert results[3] == 3
+    assert batches == [2, 2]
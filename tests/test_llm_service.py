@@ -205,3 +205,79 @@ def test_get_llm_for_task_heavyweight(llm_service):
 
     llm = llm_service.get_llm_for_task("closing")
     assert llm == llm_service.gpt4o
+
+
+@pytest.mark.asyncio
+async def test_classifications_cached_and_shortcut(llm_service):
+    """Test that repeated messages and trivial greetings skip the LLM."""
+    mock_response = MagicMock()
+    mock_response.content = '{"category": "interested", "score": 0.7}'
+
+    mock_llm = AsyncMock()
+    mock_llm.ainvoke = AsyncMock(return_value=mock_response)
+    llm_service.gpt4o_mini = mock_llm
+
+    first = await llm_service.classify_intent("¿Cuánto cuesta?")
+    second = await llm_service.classify_intent("  cuanto cuesta ")
+    greeting = await llm_service.classify_intent("¡Hola!")
+    thanks = await llm_service.analyze_sentiment("Muchas gracias!!")
+
+    assert first == second == {"category": "interested", "score": 0.7}
+    assert greeting["category"] == "interested"
+    assert thanks == "positive"
+    assert mock_llm.ainvoke.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_analyze_turn_single_call(llm_service):
+    """Test that one structured call yields intent, sentiment and validated data."""
+    mock_response = MagicMock()
+    mock_response.content = (
+        '{"intent": {"category": "ready_to_buy", "score": 0.8}, "sentiment": "positive", '
+        '"extracted_data": {"name": "juan perez", "email": "not-an-email", "phone": null, '
+        '"needs": null, "budget": null, "pain_points": null}}'
+    )
+
+    mock_llm = AsyncMock()
+    mock_llm.ainvoke = AsyncMock(return_value=mock_response)
+    llm_service.gpt4o_mini = mock_llm
+
+    result = await llm_service.analyze_turn("Soy juan perez y quiero comprar")
+    again = await llm_service.analyze_turn("soy Juan Perez y quiero comprar")
+
+    assert result == {
+        "intent": {"category": "ready_to_buy", "score": 0.8},
+        "sentiment": "positive",
+        "extracted_data": {"name": "Juan Perez"},
+    }
+    assert again == result
+    assert mock_llm.ainvoke.await_count == 1
+    assert "response_format" in mock_llm.ainvoke.call_args.kwargs
+
+
+@pytest.mark.asyncio
+async def test_analyze_turn_falls_back_to_separate_calls(llm_service):
+    """Test that a failed combined call falls back to the individual analyses."""
+    llm_service.gpt4o_mini = AsyncMock()
+    llm_service.gpt4o_mini.ainvoke = AsyncMock(side_effect=RuntimeError("boom"))
+    llm_service.classify_intent = AsyncMock(return_value={"category": "interested", "score": 0.5})
+    llm_service.analyze_sentiment = AsyncMock(return_value="neutral")
+    llm_service.extract_data = AsyncMock(return_value={})
+
+    result = await llm_service.analyze_turn("Quiero saber el precio")
+
+    assert result == {"intent": {"category": "interested", "score": 0.5}, "sentiment": "neutral", "extracted_data": {}}
+
+
+@pytest.mark.asyncio
+async def test_closing_message_uses_template_without_llm(llm_service):
+    """Test the closing message is a fixed template picked per customer."""
+    llm_service.gpt4o = AsyncMock()
+    user_data = {"name": "Lucas", "phone": "+5491112345678", "product_name": "CRM Pro"}
+
+    first = await llm_service.generate_closing_message(user_data, "https://pay.example/1")
+    second = await llm_service.generate_closing_message(user_data, "https://pay.example/1")
+
+    assert first == second
+    assert ", Lucas" in first and "CRM Pro" in first and "https://pay.example/1" in first
+    llm_service.gpt4o.ainvoke.assert_not_called()
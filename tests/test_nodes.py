@@ -7,11 +7,13 @@ from langchain_core.messages import HumanMessage, AIMessage
 
 from graph.nodes import (
     welcome_node,
-    intent_classifier_node,
-    sentiment_analyzer_node,
-    data_collector_node,
+    analysis_node,
     router_node,
     conversation_node,
+    summary_node,
+    _sentiment_updates,
+    _windowed_history,
+    HISTORY_WINDOW,
 )
 
 
@@ -45,57 +47,54 @@ async def test_welcome_node_returning_user(sample_conversation_state):
     assert result == {}
 
 
+def _turn_analysis(category="interested", score=0.5, sentiment="neutral", extracted_data=None):
+    """Build an llm_service.analyze_turn result."""
+    return {
+        "intent": {"category": category, "score": score},
+        "sentiment": sentiment,
+        "extracted_data": extracted_data or {},
+    }
+
+
 @pytest.mark.asyncio
-async def test_intent_classifier_node(sample_conversation_state):
-    """Test intent classification node."""
+async def test_analysis_node_sets_intent_score(sample_conversation_state):
+    """Test the analysis node stores the classified intent score."""
     mock_llm_service = MagicMock()
-    mock_llm_service.classify_intent = AsyncMock(
-        return_value={"category": "interested", "score": 0.7}
-    )
+    mock_llm_service.analyze_turn = AsyncMock(return_value=_turn_analysis("interested", 0.7))
 
     with patch("graph.nodes.get_llm_service", return_value=mock_llm_service):
-        result = await intent_classifier_node(sample_conversation_state)
+        result = await analysis_node(sample_conversation_state)
 
         assert "intent_score" in result
         assert result["intent_score"] == 0.7
 
 
-@pytest.mark.asyncio
-async def test_sentiment_analyzer_node_positive(sample_conversation_state):
-    """Test sentiment analysis with positive sentiment."""
-    mock_llm_service = MagicMock()
-    mock_llm_service.analyze_sentiment = AsyncMock(return_value="positive")
+def test_sentiment_updates_positive(sample_conversation_state):
+    """Test sentiment updates with positive sentiment."""
+    result = _sentiment_updates(sample_conversation_state, "positive")
 
-    with patch("graph.nodes.get_llm_service", return_value=mock_llm_service):
-        result = await sentiment_analyzer_node(sample_conversation_state)
+    assert result["sentiment"] == "positive"
+    assert "conversation_mode" not in result  # Should not trigger handoff
 
-        assert result["sentiment"] == "positive"
-        assert "conversation_mode" not in result  # Should not trigger handoff
 
+def test_sentiment_updates_negative(sample_conversation_state):
+    """Test sentiment updates with negative sentiment."""
+    result = _sentiment_updates(sample_conversation_state, "negative")
 
-@pytest.mark.asyncio
-async def test_sentiment_analyzer_node_negative(sample_conversation_state):
-    """Test sentiment analysis with negative sentiment."""
-    mock_llm_service = MagicMock()
-    mock_llm_service.analyze_sentiment = AsyncMock(return_value="negative")
-
-    with patch("graph.nodes.get_llm_service", return_value=mock_llm_service):
-        result = await sentiment_analyzer_node(sample_conversation_state)
-
-        assert result["sentiment"] == "negative"
+    assert result["sentiment"] == "negative"
 
 
 @pytest.mark.asyncio
-async def test_data_collector_node(sample_conversation_state):
-    """Test data collector extracts user information."""
+async def test_analysis_node_collects_user_data(sample_conversation_state):
+    """Test the analysis node stores extracted user information."""
     # Remove existing user_name and user_email to test extraction
     sample_conversation_state["user_name"] = None
     sample_conversation_state["user_email"] = None
 
     mock_llm_service = MagicMock()
-    mock_llm_service.extract_data = AsyncMock(
-        return_value={"name": "John Doe", "email": "john@example.com"}
-    )
+    mock_llm_service.analyze_turn = AsyncMock(return_value=_turn_analysis(
+        extracted_data={"name": "John Doe", "email": "john@example.com"}
+    ))
 
     mock_hubspot_service = MagicMock()
     mock_hubspot_service.enabled = False
@@ -103,7 +102,7 @@ async def test_data_collector_node(sample_conversation_state):
     with patch("graph.nodes.get_llm_service", return_value=mock_llm_service), \
          patch("graph.nodes.get_hubspot_service", return_value=mock_hubspot_service):
 
-        result = await data_collector_node(sample_conversation_state)
+        result = await analysis_node(sample_conversation_state)
 
         assert "collected_data" in result
         assert result["collected_data"]["name"] == "John Doe"
@@ -165,3 +164,255 @@ def test_router_node_default(sample_conversation_state):
     result = router_node(sample_conversation_state)
 
     assert result == "conversation"
+
+
+def test_build_enhanced_system_prompt_is_memoized():
+    """Test that identical prompt fields reuse the same built prompt."""
+    from graph.nodes import build_enhanced_system_prompt
+
+    config = {"system_prompt": "Be helpful.", "product_name": "Widget"}
+
+    first = build_enhanced_system_prompt(config)
+    second = build_enhanced_system_prompt(dict(config))
+    changed = build_enhanced_system_prompt({**config, "product_price": "$10"})
+
+    assert first is second
+    assert "Widget" in first
+    assert "$10" in changed and "$10" not in first
+
+
+@pytest.mark.asyncio
+async def test_welcome_node_uses_user_message_count(sample_conversation_state):
+    """Test welcome node trusts the precomputed user message count."""
+    sample_conversation_state["user_message_count"] = 3
+
+    result = await welcome_node(sample_conversation_state)
+
+    assert result == {}
+
+
+@pytest.mark.asyncio
+async def test_analysis_node_merges_all_analyses(sample_conversation_state):
+    """Test analysis node merges intent, sentiment and data from one analyze_turn call."""
+    mock_llm_service = MagicMock()
+    mock_llm_service.analyze_turn = AsyncMock(return_value={
+        "intent": {"category": "interested", "score": 0.6},
+        "sentiment": "positive",
+        "extracted_data": {"name": "John Doe"},
+    })
+
+    mock_hubspot_service = MagicMock()
+    mock_hubspot_service.enabled = False
+
+    with patch("graph.nodes.get_llm_service", return_value=mock_llm_service), \
+         patch("graph.nodes.get_hubspot_service", return_value=mock_hubspot_service):
+        result = await analysis_node(sample_conversation_state)
+
+    assert result["intent_score"] == 0.6
+    assert result["sentiment"] == "positive"
+    assert result["user_name"] == "John Doe"
+    assert result["collected_data"]["name"] == "John Doe"
+
+
+@pytest.mark.asyncio
+async def test_nodes_read_last_user_message_from_state(sample_conversation_state):
+    """Test nodes use the last user message stored at ingestion."""
+    sample_conversation_state["last_user_message"] = "Quiero comprar el plan anual"
+
+    mock_llm_service = MagicMock()
+    mock_llm_service.analyze_turn = AsyncMock(return_value=_turn_analysis("ready_to_buy", 0.8))
+
+    with patch("graph.nodes.get_llm_service", return_value=mock_llm_service):
+        await analysis_node(sample_conversation_state)
+
+    assert mock_llm_service.analyze_turn.await_args.args[0] == "Quiero comprar el plan anual"
+
+
+@pytest.mark.asyncio
+async def test_summary_node_syncs_hubspot_in_background(sample_conversation_state):
+    """Test summary node returns before the HubSpot sync completes."""
+    import asyncio
+
+    release = asyncio.Event()
+
+    async def slow_sync(user_data):
+        await release.wait()
+
+    mock_llm_service = MagicMock()
+    mock_llm_service.generate_response = AsyncMock(return_value="Resumen")
+    mock_hubspot_service = MagicMock()
+    mock_hubspot_service.enabled = True
+    mock_hubspot_service.sync_contact = AsyncMock(side_effect=slow_sync)
+
+    with patch("graph.nodes.get_llm_service", return_value=mock_llm_service), \
+         patch("graph.nodes.get_hubspot_service", return_value=mock_hubspot_service):
+        result = await asyncio.wait_for(summary_node(sample_conversation_state), timeout=1)
+
+    assert result["conversation_summary"] == "Resumen"
+    release.set()
+    await asyncio.sleep(0)
+    mock_hubspot_service.sync_contact.assert_awaited_once()
+
+
+def test_windowed_history_keeps_recent_messages_and_summary(sample_conversation_state):
+    """Test long histories are cut to the window plus the summary."""
+    messages = [HumanMessage(content=f"msg {i}") for i in range(HISTORY_WINDOW + 5)]
+    sample_conversation_state["messages"] = messages
+    sample_conversation_state["conversation_summary"] = "Cliente busca un CRM"
+
+    history = _windowed_history(sample_conversation_state)
+
+    assert len(history) == HISTORY_WINDOW + 1
+    assert history[0].content == "Resumen previo: Cliente busca un CRM"
+    assert history[1:] == messages[-HISTORY_WINDOW:]
+
+
+def test_windowed_history_short_conversation_unchanged(sample_conversation_state):
+    """Test short histories are passed through without a summary."""
+    sample_conversation_state["conversation_summary"] = "Resumen"
+
+    history = _windowed_history(sample_conversation_state)
+
+    assert history == sample_conversation_state["messages"]
+
+
+@pytest.mark.asyncio
+async def test_analysis_node_keyword_shortcut_skips_llm(sample_conversation_state):
+    """Test short buying/leaving messages are classified without the LLM."""
+    mock_llm_service = MagicMock()
+    mock_llm_service.analyze_turn = AsyncMock()
+
+    with patch("graph.nodes.get_llm_service", return_value=mock_llm_service):
+        sample_conversation_state["last_user_message"] = "Quiero pagar ya"
+        buying = await analysis_node(sample_conversation_state)
+        sample_conversation_state["last_user_message"] = "Mañana te aviso"
+        leaving = await analysis_node(sample_conversation_state)
+        sample_conversation_state["last_user_message"] = "No quiero comprar"
+        await analysis_node(sample_conversation_state)
+
+    assert buying["intent_score"] == 0.95
+    assert leaving["intent_score"] == 0.1
+    mock_llm_service.analyze_turn.assert_awaited_once()
+
+
+@pytest.mark.parametrize("message", [
+    "¿aceptan tarjeta?",
+    "¿cuánto es el pago?",
+    "pago mañana",
+    "compro después del almuerzo",
+    "soy Juan, quiero comprar",
+])
+def test_keyword_shortcut_ignores_ambiguous_messages(message):
+    """Test questions and messages beyond the exact phrases go to the LLM."""
+    from graph.nodes import _keyword_analysis
+
+    assert _keyword_analysis(message) is None
+
+
+@pytest.mark.asyncio
+async def test_analysis_node_extracts_name_next_to_buying_phrase(sample_conversation_state):
+    """Test a buying phrase with a name still runs extraction."""
+    sample_conversation_state["last_user_message"] = "soy Juan, quiero comprar"
+    mock_llm_service = MagicMock()
+    mock_llm_service.analyze_turn = AsyncMock(return_value={
+        "intent": {"category": "ready_to_buy", "score": 0.9},
+        "sentiment": "positive",
+        "extracted_data": {"name": "Juan"},
+    })
+    mock_hubspot_service = MagicMock()
+    mock_hubspot_service.enabled = False
+
+    with patch("graph.nodes.get_llm_service", return_value=mock_llm_service), \
+         patch("graph.nodes.get_hubspot_service", return_value=mock_hubspot_service):
+        result = await analysis_node(sample_conversation_state)
+
+    assert result["user_name"] == "Juan"
+
+
+@pytest.mark.asyncio
+async def test_two_negative_turns_trigger_handoff(sample_conversation_state):
+    """Test the bounded sentiment history flags consecutive negative turns."""
+    mock_llm_service = MagicMock()
+    mock_llm_service.analyze_turn = AsyncMock(return_value=_turn_analysis(sentiment="negative"))
+
+    sample_conversation_state["sentiment_history"] = ["positive", "neutral", "neutral", "negative"]
+    with patch("graph.nodes.get_llm_service", return_value=mock_llm_service):
+        result = await analysis_node(sample_conversation_state)
+
+    assert result["sentiment_history"] == ["neutral", "neutral", "negative", "negative"]
+    assert result["conversation_mode"] == "NEEDS_ATTENTION"
+
+
+@pytest.mark.asyncio
+async def test_handoff_node_reads_config_view(sample_conversation_state):
+    """Test nodes use the config view resolved at ingestion."""
+    from graph.nodes import build_config_view, handoff_node
+
+    sample_conversation_state["config_view"] = build_config_view({"product_name": "CRM Pro"})
+
+    result = await handoff_node(sample_conversation_state)
+
+    assert "CRM Pro" in result["current_response"]
+
+
+def test_build_transcript_renders_conversation():
+    """Test the summary transcript renders user and bot messages."""
+    from graph.nodes import build_transcript
+
+    messages = [
+        HumanMessage(content="Hola"),
+        AIMessage(content="¡Hola! ¿Cómo te llamas?"),
+        HumanMessage(content="Soy Ana"),
+    ]
+
+    assert build_transcript(messages) == "Cliente: Hola\nBot: ¡Hola! ¿Cómo te llamas?\nCliente: Soy Ana"
+
+
+@pytest.mark.asyncio
+async def test_process_message_stream_forwards_sentiment_history():
+    """Test the streaming path seeds the graph with the caller's sentiments."""
+    from graph import workflow
+
+    seen = {}
+
+    async def astream(initial_state, stream_mode):
+        seen.update(initial_state)
+        yield "values", initial_state
+
+    graph = MagicMock()
+    graph.astream = astream
+
+    with patch("graph.workflow.get_sales_graph", return_value=graph):
+        events = [
+            event async for event in workflow.process_message_stream(
+                "+123", "Esto no sirve", [], {}, sentiment_history=["negative"]
+            )
+        ]
+
+    assert seen["sentiment_history"] == ["negative"]
+    assert events[-1]["type"] == "final"
+
+
+@pytest.mark.asyncio
+async def test_hubspot_sync_result_saved_through_fresh_session(db):
+    """Test the background HubSpot sync stores the contact even after the turn committed."""
+    from database import crud
+    from graph.nodes import _sync_hubspot
+
+    user = await crud.create_user(db, phone="+123")
+    await db.commit()
+
+    mock_hubspot_service = MagicMock()
+    mock_hubspot_service.sync_contact = AsyncMock(return_value={
+        "contact_id": "hs-42",
+        "lifecyclestage": "lead",
+        "synced_at": datetime(2024, 1, 1),
+        "action": "created",
+    })
+
+    await _sync_hubspot(mock_hubspot_service, {"user_phone": "+123", "db_session": db, "db_user": user})
+
+    stored = await crud.get_user_by_phone(db, "+123")
+    await db.refresh(stored)
+    assert stored.hubspot_contact_id == "hs-42"
+    assert stored.hubspot_lifecyclestage == "lead"
@@ -0,0 +1,33 @@
+"""Unit tests for the semantic RAG context cache."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.semantic_cache import SemanticCache
+
+
+def test_similar_queries_hit_and_distant_ones_miss():
+    """Test that only embeddings above the similarity threshold hit."""
+    cache = SemanticCache(threshold=0.95)
+    cache.store([1.0, 0.0, 0.0], "price context")
+
+    assert cache.lookup([0.99, 0.05, 0.0]) == "price context"
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+
+
+def test_entries_expire_and_are_bounded():
+    """Test TTL expiry, the entry cap and clearing."""
+    expired = SemanticCache(ttl=0)
+    expired.store([1.0, 0.0], "old")
+    assert expired.lookup([1.0, 0.0]) is None
+
+    bounded = SemanticCache(max_entries=2)
+    for i, vector in enumerate(([1.0, 0.0], [0.0, 1.0], [-1.0, 0.0])):
+        bounded.store(vector, str(i))
+    assert len(bounded) == 2
+    assert bounded.lookup([1.0, 0.0]) is None
+    assert bounded.lookup([-1.0, 0.0]) == "2"
+
+    bounded.clear()
+    assert len(bounded) == 0
@@ -0,0 +1,108 @@
+"""Small in-process caches shared by the UI panels."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class AsyncTTLCache:
+    """Single-value cache for an async producer, with single-flight refresh."""
+
+    def __init__(self, ttl: float):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a computed value is reused
+        """
+        self.ttl = ttl
+        self._value: Any = None
+        self._expires_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def get(self, producer: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get the cached value, calling ``producer`` once if it has expired.
+
+        Concurrent callers arriving while a refresh runs wait for it and
+        share its result instead of calling ``producer`` again.
+
+        Args:
+            producer: Zero-argument coroutine function computing a fresh value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        if time.monotonic() < self._expires_at:
+            return self._value
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # Another caller may have refreshed it while we waited
+            if time.monotonic() < self._expires_at:
+                return self._value
+
+            self._value = await producer()
+            self._expires_at = time.monotonic() + self.ttl
+            return self._value
+
+    def invalidate(self) -> None:
+        """Force the next ``get`` to recompute the value."""
+        self._expires_at = 0.0
+
+
+class TTLCache:
+    """Bounded key/value cache whose entries expire, evicting the least recently used."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries kept
+            ttl: Seconds an entry stays valid after being set
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a live entry.
+
+        Args:
+            key: Entry key
+            default: Value returned when the key is missing or expired
+
+        Returns:
+            The cached value or ``default``
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store an entry, evicting the least recently used one if full.
+
+        Args:
+            key: Entry key
+            value: Value to cache
+        """
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Number of stored entries, including expired ones not yet dropped."""
+        return len(self._data)
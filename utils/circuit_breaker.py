@@ -0,0 +1,70 @@
+"""Failure-rate circuit breaker for slow or failing downstream calls."""
+
+import threading
+import time
+from collections import deque
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class CircuitBreaker:
+    """Trip after too many recent failures and short-circuit calls for a while."""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 50,
+        max_failures: int = 25,
+        cooldown_seconds: float = 30.0,
+    ):
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Name used in log messages
+            window: Number of recent outcomes tracked
+            max_failures: Failures within the window above which the breaker opens
+            cooldown_seconds: How long the breaker stays open once tripped
+        """
+        self.name = name
+        self.max_failures = max_failures
+        self.cooldown_seconds = cooldown_seconds
+        self._outcomes: deque = deque(maxlen=window)
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may go through.
+
+        Returns:
+            False while the breaker is open
+        """
+        with self._lock:
+            if not self._open_until:
+                return True
+            if time.monotonic() < self._open_until:
+                return False
+            # Cooldown elapsed: close and start from a clean window
+            self._open_until = 0.0
+            self._outcomes.clear()
+            logger.warning(f"Circuit '{self.name}' closed after cooldown")
+            return True
+
+    def record(self, success: bool) -> None:
+        """
+        Record the outcome of a call.
+
+        Args:
+            success: Whether the call completed in time without errors
+        """
+        with self._lock:
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if not self._open_until and failures > self.max_failures:
+                self._open_until = time.monotonic() + self.cooldown_seconds
+                logger.warning(
+                    f"Circuit '{self.name}' opened: {failures}/{len(self._outcomes)} recent calls failed"
+                )
@@ -1,6 +1,7 @@
 """Helper functions for the application."""
 
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, List
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
@@ -136,10 +137,14 @@ def calculate_sentiment_emoji(sentiment: str) -> str:
     return emoji_map.get(sentiment, "😐")
 
 
+@lru_cache(maxsize=4096)
 def format_timestamp(dt: datetime) -> str:
     """
     Format datetime for display.
 
+    Memoized: the panels re-format the same ``last_message_at`` values on
+    every refresh.
+
     Args:
         dt: Datetime object
 
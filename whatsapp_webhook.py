@@ -10,6 +10,7 @@ from langchain_core.messages import AIMessage, HumanMessage
 from database import crud
 from graph.workflow import process_message
 from services.config_manager import get_config_manager
+from services.hubspot_sync import get_hubspot_service
 from services.twilio_service import get_twilio_service
 from services.tts_service import get_tts_service
 from services.scheduler_service import get_scheduler_service
@@ -56,6 +57,9 @@ async def handle_whatsapp_webhook(request: Request, db_session_factory) -> Dict[
         # Format phone number
         phone = format_phone_number(from_number)
 
+        # Look up the HubSpot contact while the message is processed
+        get_hubspot_service().prefetch_contact(phone)
+
         # Get or create user
         async with db_session_factory() as db:
             user = await crud.get_user_by_phone(db, phone)
@@ -81,11 +85,15 @@ async def handle_whatsapp_webhook(request: Request, db_session_factory) -> Dict[
             # Load conversation history
             messages = await crud.get_user_messages(db, user.id, limit=50)
             conversation_history = []
+            sentiment_history = []
             for msg in messages[:-1]:  # Exclude the message we just saved
                 if msg.sender == "user":
                     conversation_history.append(HumanMessage(content=str(msg.message_text)))
                 else:
                     conversation_history.append(AIMessage(content=str(msg.message_text)))
+                    # Bot replies record the sentiment of the turn they answered
+                    if msg.message_metadata and msg.message_metadata.get("sentiment"):
+                        sentiment_history.append(msg.message_metadata["sentiment"])
 
             # Load configuration
             config_manager = get_config_manager()
@@ -99,6 +107,7 @@ async def handle_whatsapp_webhook(request: Request, db_session_factory) -> Dict[
                 conversation_history=conversation_history,
                 config=config,
                 db_session=db,
+                sentiment_history=sentiment_history,
             )
 
             # Get response